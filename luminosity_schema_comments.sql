@@ -9,6 +9,8 @@ COMMENT ON COLUMN students.last_name IS 'Student last name';
 COMMENT ON COLUMN students.birthdate IS 'Date of birth';
 COMMENT ON COLUMN students.gender IS 'Student gender (M/F/Other)';
 COMMENT ON COLUMN students.grade IS 'Foreign key to grade_levels.grade — student''s current grade';
+COMMENT ON COLUMN students.enrollment_date IS 'Date the student enrolled (first day of their first school year)';
+COMMENT ON COLUMN students.withdraw_date IS 'Date the student withdrew or graduated (last day of their last school year); blank while enrolled';
 
 -- ===========================
 -- 👨‍👩‍👧 Table: guardians
@@ -0,0 +1,32 @@
+-- 🏫 school_profile
+COMMENT ON TABLE school_profile IS 'Basic facts about the school (one row per school).';
+COMMENT ON COLUMN school_profile.school_id IS 'Primary key: unique school identifier.';
+COMMENT ON COLUMN school_profile.school_name IS 'Official name of the school.';
+COMMENT ON COLUMN school_profile.address IS 'Street address.';
+COMMENT ON COLUMN school_profile.city IS 'City.';
+COMMENT ON COLUMN school_profile.state IS 'State (two-letter code).';
+COMMENT ON COLUMN school_profile.zip IS 'ZIP code.';
+COMMENT ON COLUMN school_profile.phone IS 'Main office phone number.';
+COMMENT ON COLUMN school_profile.founded_year IS 'Year the school was founded.';
+
+-- 🔑 users
+COMMENT ON TABLE users IS 'Portal accounts for students, guardians, teachers and administrators.';
+COMMENT ON COLUMN users.user_id IS 'Primary key: unique account identifier.';
+COMMENT ON COLUMN users.username IS 'Login name, unique across all roles.';
+COMMENT ON COLUMN users.email IS 'Account email address.';
+COMMENT ON COLUMN users.role IS 'Account role (student, guardian, teacher, admin).';
+COMMENT ON COLUMN users.person_id IS 'Soft reference to students.student_id, guardians.guardian_id or teachers.teacher_id, depending on role (blank for admins).';
+COMMENT ON COLUMN users.created_on IS 'Date the account was created.';
+COMMENT ON COLUMN users.last_login IS 'Date and time of the most recent login in the last 30 days, if any.';
+COMMENT ON COLUMN users.is_active IS 'Boolean: whether the account can log in.';
+
+-- 📣 announcements
+COMMENT ON TABLE announcements IS 'Posts shown in class and school-wide portal feeds.';
+COMMENT ON COLUMN announcements.announcement_id IS 'Primary key: unique announcement identifier.';
+COMMENT ON COLUMN announcements.class_id IS 'Foreign key to classes.class_id (blank for school-wide posts).';
+COMMENT ON COLUMN announcements.term_id IS 'Foreign key to terms.term_id — term in which it was posted.';
+COMMENT ON COLUMN announcements.posted_by IS 'Foreign key to users.user_id — author of the post.';
+COMMENT ON COLUMN announcements.posted_at IS 'Date and time the post was published.';
+COMMENT ON COLUMN announcements.audience IS 'Feed the post appears in (class or school).';
+COMMENT ON COLUMN announcements.title IS 'Headline of the announcement.';
+COMMENT ON COLUMN announcements.body IS 'Full text of the announcement.';
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+advance_dataset.py
+------------------
+Incremental ("daily tick") updates: move an existing dataset forward to
+--through, generating only the rows for school days after each table's
+high-water mark – attendance, assignments due, their grades, discipline.
+
+INPUT  (in --data_dir)
+  ├── students.csv, classes.csv, enrollments.csv
+  ├── school_calendar.csv    # future school days must already be in the calendar
+  ├── student_traits.npy     # shared latent traits (built on first use)
+  └── watermarks.json        # high-water marks (created on the first run)
+
+--through must fall inside school_calendar.csv and not before the
+earliest watermark; anything else is rejected before a file is touched.
+
+OUTPUT
+  --mode delta   (default)   deltas/<table>/<through>.csv, one small file per tick
+  --mode append              rows appended to <table>.csv in place
+  └── watermarks.json        # updated last, so an interrupted tick is simply re-run
+
+Append mode writes only the new rows. Before the first byte it records each
+table's size in watermarks.json ("append_from"), and the next run truncates
+the tables back to those sizes if a tick died halfway. Appended tables keep
+their old .manifest entry (re-hashing would read the whole file).
+
+watermarks.json keeps, per table, the last date covered and how many IDs
+were issued. On the first run it is seeded from the existing files (max
+date per table). Delta IDs use a wider keyed sequence than the full-year
+generators, so they never collide with rows already in the dataset, and
+they continue across ticks.
+
+Assignments are drawn per school week with a week-seeded generator, so a
+week split over several ticks gets the same assignments as one big tick.
+
+Example – extend the calendar by a year, then tick into it
+  python scripts/reference_data.py --out_dir 2015/csv --years 2 --tables school_calendar
+  python scripts/advance_dataset.py --data_dir 2015/csv --through 2016-09-02 --seed 7
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from block_compression import read_csv, resolve_csv
+from generate_assignments_and_grades import generate_assignments, generate_grades
+from generate_attendance import _attendance_for
+from generate_discipline_reports import generate_reports
+from id_utils import IdSequence
+from profiles import active_profile
+from school_calendar import SchoolCalendar
+from staging import StagedFile, write_text
+from student_traits import load_traits
+
+WATERMARKS_FILE = "watermarks.json"
+DELTA_DIR       = "deltas"
+DELTA_ID_WIDTH  = 10           # hex digits; wider than any full-year ID → no clashes
+
+# table → (date column, ID column, ID prefix)
+TABLES = {
+    "attendance":         ("date",         "attendance_id", "A"),
+    "assignments":        ("due_date",     "assignment_id", "A"),
+    "grades":             ("submitted_on", "grade_id",      "G"),
+    "discipline_reports": ("date",         "report_id",     "D"),
+}
+
+# salt per stream so every table draws from its own deterministic generator
+_SALT = {"attendance": 1, "assignments": 2, "grades": 3, "discipline_reports": 4, "ids": 5}
+
+
+# ── watermarks ────────────────────────────────────────────────────────
+
+def _max_date(path: Path | None, column: str) -> str | None:
+    if path is None:
+        return None
+    dates = read_csv(path, usecols=[column])[column]
+    return None if dates.empty else str(dates.max())
+
+
+def init_watermarks(data_dir: Path, school_days: np.ndarray, seed: int) -> dict:
+    """Seed the marks from the existing files (or the day before school starts)."""
+    before_start = str(school_days[0] - 1) if len(school_days) else "1970-01-01"
+    marks = {"seed": seed, "tables": {}}
+    for table, (date_col, id_col, _) in TABLES.items():
+        path = resolve_csv(data_dir, table)
+        width = DELTA_ID_WIDTH
+        if path is not None:
+            ids = read_csv(path, usecols=[id_col], nrows=1000)[id_col].astype(str)
+            # one hex digit wider than the existing "X_…" IDs
+            width = max(width, int(ids.str.len().max()) - 1)
+        # grades are emitted with their assignments, so they share its mark
+        source = "assignments" if table == "grades" else table
+        through = _max_date(resolve_csv(data_dir, source), TABLES[source][0]) or before_start
+        marks["tables"][table] = {"through": through, "next_id": 0, "id_width": width}
+    return marks
+
+
+def load_watermarks(data_dir: Path, school_days: np.ndarray, seed: int | None) -> dict:
+    path = data_dir / WATERMARKS_FILE
+    if path.exists():
+        return json.loads(path.read_text())
+    return init_watermarks(data_dir, school_days, 0 if seed is None else seed)
+
+
+def save_watermarks(data_dir: Path, marks: dict):
+    write_text(data_dir / WATERMARKS_FILE, json.dumps(marks, indent=2) + "\n")
+
+
+def rollback_append(data_dir: Path, marks: dict):
+    """Truncate the tables an interrupted append tick grew back to their recorded sizes."""
+    for table, size in marks.pop("append_from", {}).items():
+        path = data_dir / f"{table}.csv"
+        if size is None:
+            path.unlink(missing_ok=True)
+        elif path.exists() and path.stat().st_size > size:
+            os.truncate(path, size)
+
+
+def begin_append(data_dir: Path, marks: dict):
+    """Record every table's size in watermarks.json before appending to any of them."""
+    sizes = {}
+    for table in TABLES:
+        path = data_dir / f"{table}.csv"
+        if resolve_csv(data_dir, table) not in (None, path):
+            raise SystemExit(f"❌ {table} is compressed – use --mode delta")
+        sizes[table] = path.stat().st_size if path.exists() else None
+    marks["append_from"] = sizes
+    save_watermarks(data_dir, marks)
+
+
+def _ids(marks: dict, table: str, n: int) -> np.ndarray:
+    """Next `n` delta IDs for `table`, continuing its keyed sequence."""
+    mark = marks["tables"][table]
+    key = np.random.default_rng([marks["seed"], _SALT["ids"], _SALT[table]])
+    seq = IdSequence(TABLES[table][2], 16 ** mark["id_width"] // 16, key,
+                     width=mark["id_width"], start=mark["next_id"])
+    ids = seq.take(n)
+    mark["next_id"] = seq.issued
+    return ids
+
+
+def _rng(marks: dict, table: str, *key: int) -> np.random.Generator:
+    return np.random.default_rng([marks["seed"], _SALT[table], *key])
+
+
+def _day(value) -> int:
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+# ── delta generators ─────────────────────────────────────────────────
+
+def check_through(school_days: np.ndarray, marks: dict, through: np.datetime64):
+    """ValueError when `through` is outside the calendar or before every table's watermark."""
+    if not len(school_days) or not school_days[0] <= through <= school_days[-1]:
+        span = f"{school_days[0]} … {school_days[-1]}" if len(school_days) else "no school days"
+        raise ValueError(f"--through {through} is outside school_calendar.csv ({span}) – "
+                         f"extend it first (reference_data.py --years)")
+    earliest = min(np.datetime64(mark["through"], "D") for mark in marks["tables"].values())
+    if through < earliest:
+        raise ValueError(f"--through {through} is before the watermarks (every table is through "
+                         f"{earliest} or later)")
+
+
+def _new_days(school_days: np.ndarray, after: str, through: np.datetime64) -> np.ndarray:
+    lo = np.searchsorted(school_days, np.datetime64(after, "D"), side="right")
+    hi = np.searchsorted(school_days, through, side="right")
+    return school_days[lo:hi]
+
+
+def attendance_delta(students, days, traits, marks) -> pd.DataFrame:
+    rng = _rng(marks, "attendance", _day(days[-1]))
+    throwaway = IdSequence("A", len(students) * len(days), rng)
+    delta = _attendance_for(students, days, traits, throwaway, rng)
+    delta["attendance_id"] = _ids(marks, "attendance", len(delta))
+    return delta
+
+
+def assignments_delta(classes, school_days, days, marks) -> pd.DataFrame:
+    """Assignments due on `days`, drawn week by week with week-seeded generators."""
+    mondays = days.astype(np.int64) - (days.astype(np.int64) + 3) % 7
+    chunks = []
+    for monday in np.unique(mondays).tolist():
+        week = school_days[(school_days >= np.datetime64(monday, "D"))
+                           & (school_days < np.datetime64(monday + 7, "D"))]
+        drawn = generate_assignments(classes, week, _rng(marks, "assignments", monday),
+                                     per_week=tuple(active_profile()["assignments"]["per_week_range"]))
+        due = drawn["due_date"].to_numpy().astype("datetime64[D]")
+        chunks.append(drawn[(due >= days[0]) & (due <= days[-1])])
+    delta = pd.concat(chunks, ignore_index=True)
+    delta["assignment_id"] = _ids(marks, "assignments", len(delta))
+    return delta.sort_values(["due_date", "class_id"], kind="stable", ignore_index=True)
+
+
+def grades_delta(assignments, enrollments, traits, school_start, days, marks) -> pd.DataFrame:
+    cfg = active_profile()["assignments"]
+    delta = generate_grades(assignments, enrollments, traits, _rng(marks, "grades", _day(days[-1])),
+                            school_start=school_start,
+                            late_prob=cfg["late_submission_prob"],
+                            perfect_prob=cfg["perfect_score_prob"],
+                            failing_prob=cfg["failing_score_prob"])
+    if len(delta):
+        delta["grade_id"] = _ids(marks, "grades", len(delta))
+    return delta
+
+
+def discipline_delta(students, school_days, days, traits, marks) -> pd.DataFrame:
+    # yearly rates scaled to the share of a school year these days represent
+    years = np.unique((school_days.astype("datetime64[M]") - 7).astype("datetime64[Y]"))
+    fraction = len(days) / (len(school_days) / max(len(years), 1))
+    delta = generate_reports(students, days, rng=_rng(marks, "discipline_reports", _day(days[-1])),
+                             traits=traits, year_fraction=fraction)
+    delta["report_id"] = _ids(marks, "discipline_reports", len(delta))
+    return delta
+
+
+# ── output ────────────────────────────────────────────────────────────
+
+def emit(data_dir: Path, table: str, delta: pd.DataFrame, through: str, mode: str) -> Path:
+    if mode == "append":                               # in place; begin_append recorded the old size
+        path = data_dir / f"{table}.csv"
+        with open(path, "ab") as f:
+            f.write(delta.to_csv(index=False, header=f.tell() == 0).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        return path
+    path = data_dir / DELTA_DIR / table / f"{through}.csv"
+    with StagedFile(path) as f:
+        f.write(delta.to_csv(index=False).encode("utf-8"))
+    return path
+
+
+def advance(data_dir: Path, through, mode: str = "delta", seed: int | None = None) -> dict[str, int]:
+    """Generate every table up to `through`; returns table → delta rows written."""
+    through = np.datetime64(through, "D")
+    school_days = SchoolCalendar.from_csv(data_dir / "school_calendar.csv").school_days()
+    marks = load_watermarks(data_dir, school_days, seed)
+    rollback_append(data_dir, marks)
+    check_through(school_days, marks, through)
+    if mode == "append":
+        begin_append(data_dir, marks)
+    tag = str(through)
+    written = {table: 0 for table in TABLES}
+
+    students = pd.read_csv(data_dir / "students.csv")
+    traits = load_traits(data_dir, students["student_id"], marks["seed"])
+
+    days = _new_days(school_days, marks["tables"]["attendance"]["through"], through)
+    if len(days):
+        delta = attendance_delta(students, days, traits, marks)
+        emit(data_dir, "attendance", delta, tag, mode)
+        written["attendance"] = len(delta)
+        marks["tables"]["attendance"]["through"] = str(days[-1])
+
+    days = _new_days(school_days, marks["tables"]["assignments"]["through"], through)
+    if len(days):
+        classes = pd.read_csv(data_dir / "classes.csv")
+        enrollments = pd.read_csv(data_dir / "enrollments.csv")
+        assignments = assignments_delta(classes, school_days, days, marks)
+        grades = grades_delta(assignments, enrollments, traits, school_days[0], days, marks)
+        emit(data_dir, "assignments", assignments, tag, mode)
+        emit(data_dir, "grades", grades, tag, mode)
+        written["assignments"], written["grades"] = len(assignments), len(grades)
+        marks["tables"]["assignments"]["through"] = str(days[-1])
+        marks["tables"]["grades"]["through"] = str(days[-1])
+
+    days = _new_days(school_days, marks["tables"]["discipline_reports"]["through"], through)
+    if len(days):
+        delta = discipline_delta(students, school_days, days, traits, marks)
+        emit(data_dir, "discipline_reports", delta, tag, mode)
+        written["discipline_reports"] = len(delta)
+        marks["tables"]["discipline_reports"]["through"] = str(days[-1])
+
+    marks.pop("append_from", None)
+    save_watermarks(data_dir, marks)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Advance a dataset to a target date (delta rows only).")
+    parser.add_argument("--data_dir", required=True, type=Path)
+    parser.add_argument("--through", required=True, help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--mode", choices=["delta", "append"], default="delta",
+                        help="write deltas/<table>/<through>.csv (default) or append to <table>.csv")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for the delta streams (first run only; kept in watermarks.json)")
+    args = parser.parse_args()
+
+    print(f"[1/2] Advancing {args.data_dir} to {args.through} …")
+    try:
+        written = advance(args.data_dir, args.through, args.mode, args.seed)
+    except ValueError as exc:
+        parser.error(str(exc))
+    for table, n in written.items():
+        print(f"      → {table:<20} {n:,} new rows")
+    print(f"[2/2] Done! High-water marks in {args.data_dir / WATERMARKS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
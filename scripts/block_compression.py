@@ -0,0 +1,264 @@
+"""
+block_compression.py
+--------------------
+Block-compressed CSV files: the output is cut into ~4 MB blocks on row
+boundaries and every block is compressed *independently* on a thread pool.
+
+  • Each block is a complete gzip member / zstd frame / lz4 frame, so the
+    file is still a normal .gz/.zst/.lz4 stream for zcat, zstdcat, etc.
+  • A small `<file>.idx` sidecar (JSON) records the byte offset and raw size
+    of every block, so readers can seek and decompress blocks in parallel.
+    It also records the file size; an index that does not match its file
+    (a reader racing a rewrite) is ignored and the file is streamed.
+
+Both files are staged and renamed into place (see staging.py), data first.
+
+Codecs: gzip is always available; zstd (`pip install zstandard`) and lz4
+(`pip install lz4`) are used when installed. `best_codec()` picks the
+fastest one present.
+"""
+
+from __future__ import annotations
+import io
+import json
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from staging import StagedFile, write_text
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:                                    # optional: pip install zstandard
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:                                    # optional: pip install lz4
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+
+BLOCK_SIZE   = 4 << 20                 # raw bytes per block (cut on the next row boundary)
+GZIP_LEVEL   = 6
+ZSTD_LEVEL   = 3
+WORKERS      = min(8, os.cpu_count() or 1)
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "lz4": ".lz4"}
+
+
+# ── codecs ────────────────────────────────────────────────────────────
+
+def _gzip_compress(data: bytes) -> bytes:
+    c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)        # 31 → gzip container
+    return c.compress(data) + c.flush()
+
+
+def _require(codec: str):
+    if codec == "zstd" and zstandard is None:
+        raise RuntimeError("zstd compression requested but the 'zstandard' package is not installed")
+    if codec == "lz4" and lz4 is None:
+        raise RuntimeError("lz4 compression requested but the 'lz4' package is not installed")
+    if codec not in SUFFIXES:
+        raise ValueError(f"unknown compression: {codec!r}")
+
+
+def compress_block(codec: str, data: bytes) -> bytes:
+    if codec == "gzip":
+        return _gzip_compress(data)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return lz4.frame.compress(data)
+
+
+def decompress_block(codec: str, data: bytes) -> bytes:
+    if codec == "gzip":
+        return zlib.decompress(data, 31)
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return lz4.frame.decompress(data)
+
+
+def available_codecs() -> list[str]:
+    """Installed codecs, fastest first."""
+    codecs = []
+    if zstandard is not None:
+        codecs.append("zstd")
+    if lz4 is not None:
+        codecs.append("lz4")
+    return codecs + ["gzip"]
+
+
+def best_codec() -> str:
+    return available_codecs()[0]
+
+
+def resolve_codec(compression: str | None) -> str | None:
+    """Map a CLI value (None / 'auto' / codec name) to a codec name."""
+    if compression in (None, "none"):
+        return None
+    if compression == "auto":
+        return best_codec()
+    _require(compression)
+    return compression
+
+
+def codec_for(path: Path) -> str | None:
+    """Infer the codec from a file suffix (None for plain CSV)."""
+    for codec, suffix in SUFFIXES.items():
+        if path.name.endswith(suffix):
+            return codec
+    return None
+
+
+# ── writer ────────────────────────────────────────────────────────────
+
+class BlockCompressedWriter:
+    """Binary file-like sink that compresses row-aligned blocks in parallel."""
+
+    def __init__(self, path: Path, codec: str, block_size: int = BLOCK_SIZE, workers: int = WORKERS):
+        _require(codec)
+        self.path = Path(path)
+        self.codec = codec
+        self.block_size = block_size
+        self._file = StagedFile(self.path)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"compress:{self.path.name}")
+        self._pending: deque = deque()
+        self._max_pending = 2 * workers
+        self._buffer = bytearray()
+        self._blocks: list[tuple[int, int, int]] = []     # (offset, compressed, raw)
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            # last row end within block_size; a row longer than that ends the block after it
+            cut = self._buffer.rfind(b"\n", 0, self.block_size) + 1 or self._buffer.find(b"\n", self.block_size) + 1
+            if cut == 0:                                   # one giant row, not finished yet – keep buffering
+                break
+            self._submit(bytes(self._buffer[:cut]))
+            del self._buffer[:cut]
+        return len(data)
+
+    def _submit(self, block: bytes):
+        self._pending.append((len(block), self._pool.submit(compress_block, self.codec, block)))
+        while len(self._pending) > self._max_pending:
+            self._drain_one()
+
+    def _drain_one(self):
+        raw_len, future = self._pending.popleft()
+        data = future.result()
+        self._file.write(data)
+        self._blocks.append((self._offset, len(data), raw_len))
+        self._offset += len(data)
+
+    @property
+    def bytes(self) -> int:
+        return self._file.bytes
+
+    @property
+    def sha256(self) -> str:
+        return self._file.sha256
+
+    def close(self):
+        """Compress what is left, then commit the file and its index."""
+        if self._pool is None:
+            return
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._drain_one()
+        except BaseException:
+            self.abort()
+            raise
+        self._pool.shutdown(wait=True)
+        self._pool = None
+        self._file.commit()
+        index = {"codec": self.codec, "bytes": self._offset, "blocks": self._blocks}
+        write_text(Path(f"{self.path}.idx"), json.dumps(index))
+
+    def abort(self):
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+        self._file.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+# ── reader ────────────────────────────────────────────────────────────
+
+def load_index(path: Path) -> dict | None:
+    """The .idx sidecar of `path`, or None when there is none or it belongs to another version."""
+    index_path = Path(f"{path}.idx")
+    try:
+        index = json.loads(index_path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    if index.get("bytes", None) not in (None, Path(path).stat().st_size):
+        return None
+    return index
+
+
+def read_bytes(path: Path, workers: int = WORKERS) -> bytes:
+    """Decompress a whole file, block-parallel when a .idx sidecar exists."""
+    path = Path(path)
+    codec = codec_for(path)
+    if codec is None:
+        return path.read_bytes()
+    _require(codec)
+
+    if load_index(path) is None:                           # foreign file (or stale index): stream it
+        if codec == "gzip":
+            import gzip
+            return gzip.decompress(path.read_bytes())
+        if codec == "zstd":
+            with zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True,
+                                                            closefd=True) as r:
+                return r.read()
+        return lz4.frame.decompress(path.read_bytes())
+
+    blocks = load_index(path)["blocks"]
+
+    def read_block(block):
+        offset, length, _ = block
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return decompress_block(codec, f.read(length))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return b"".join(pool.map(read_block, blocks))
+
+
+def read_csv(path: Path, **kwargs) -> pd.DataFrame:
+    """`pd.read_csv` that understands block-compressed files."""
+    import pandas as pd                 # lazy: keeps `import block_compression` cheap
+    path = Path(path)
+    if codec_for(path) is None:
+        return pd.read_csv(path, **kwargs)
+    return pd.read_csv(io.BytesIO(read_bytes(path)), **kwargs)
+
+
+def resolve_csv(data_dir: Path, table: str) -> Path | None:
+    """Return `<table>.csv` or its compressed variant in data_dir, if any."""
+    for suffix in ("", *SUFFIXES.values()):
+        path = Path(data_dir) / f"{table}.csv{suffix}"
+        if path.exists():
+            return path
+    return None
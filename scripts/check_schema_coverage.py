@@ -2,33 +2,313 @@
 """
 check_schema_coverage.py
 -------------------------
-Scans /2015/csv for actual CSVs and compares to expected schema tables.
+Coverage + conformance check of a CSV folder against the documented
+schema (see schema_spec.py – the DBML and the COMMENT ON files are the
+source of truth, nothing is hard-coded here).
+
+INPUT
+  ├── luminosity_schema_v15.dbml
+  ├── luminosity_schema_comments*.sql
+  └── --data_dir (default clean_csv/)   # .csv, .csv.gz, .csv.zst, .csv.lz4
+
+Per table it reports:
+  • coverage   – documented tables with no file, files with no documented table
+  • columns    – missing / unexpected columns, order differences
+  • types      – values that don't parse as the column's type (int, float,
+                 date = YYYY-MM-DD, time, boolean, key)
+  • nullability – blanks in primary-key / not-null columns
+
+Large files are sampled, never loaded whole: files up to --sample_mb are
+streamed in chunks; bigger ones are read as a head window plus evenly
+spaced windows (whole blocks for block-compressed files with a .idx,
+byte ranges re-synced to the next line for plain CSV, the head only for
+foreign compressed streams). --full streams everything.
+
+Exit status is 0 unless --strict is given and an error was found.
+
+Example
+  python scripts/check_schema_coverage.py --data_dir clean_csv --strict
 """
 
+from __future__ import annotations
+import argparse
+import io
+import re
 from pathlib import Path
 
-# List of all planned or schema-based table names
-expected_tables = {
-    "students", "guardians", "teachers", "classes", "enrollments",
-    "assignments", "grades", "attendance", "school_years", "terms",
-    "school_calendar", "periods", "payments", "fee_types",
-    "users", "announcements", "discipline_reports", "standardized_tests"
+import pandas as pd
+
+from block_compression import SUFFIXES, codec_for, decompress_block, load_index
+from schema_spec import DBML_FILE, ROOT_DIR, comment_files, load_schema
+
+SAMPLE_MB   = 64            # raw bytes checked per file before switching to sampling
+WINDOWS     = 16            # sampled windows per large file (head included)
+CHUNK_ROWS  = 200_000       # rows per parsed chunk when streaming a whole file
+MAX_EXAMPLES = 3
+
+# checker type → full-match pattern for non-blank values (None: anything goes)
+TYPE_PATTERNS = {
+    "int":      r"[-+]?\d+",
+    "float":    r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?",
+    "date":     r"\d{4}-\d{2}-\d{2}",
+    "datetime": r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?",
+    "time":     r"\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?",
+    "boolean":  r"(?i:true|false|t|f|yes|no|y|n|0|1)",
+    "key":      r"[\w-]+",          # generator IDs (A_3f9c01), codes (FEE01) or integers
+    "varchar":  None,
+    "text":     None,
 }
 
-# Path to your CSV directory
-csv_dir = Path("2015/csv")
-actual_csvs = {f.stem for f in csv_dir.glob("*.csv")}
 
-print("✅ Existing CSV files:")
-for name in sorted(actual_csvs):
-    print(f"  - {name}")
+# ── reading ───────────────────────────────────────────────────────────
+
+def table_files(data_dir: Path) -> dict[str, Path]:
+    """table → CSV path (plain or compressed) present in data_dir."""
+    found = {}
+    for path in sorted(Path(data_dir).iterdir()):
+        name = path.name
+        for suffix in ("", *SUFFIXES.values()):
+            if name.endswith(f".csv{suffix}"):
+                found.setdefault(name[:-len(f".csv{suffix}")], path)
+                break
+    return found
+
+
+def _cut(data: bytes, head: bool) -> bytes:
+    """Trim a raw window to whole lines (drop the partial first line unless at file start)."""
+    start = 0 if head else data.find(b"\n") + 1
+    end = data.rfind(b"\n") + 1
+    return data[start:end] if end > start else b""
+
+
+def _stream(path: Path):
+    """Binary stream of a compressed file without a .idx sidecar."""
+    codec = codec_for(path)
+    if codec == "gzip":
+        import gzip
+        return gzip.open(path, "rb")
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True,
+                                                          closefd=True)
+    import lz4.frame
+    return lz4.frame.open(path, "rb")
+
+
+def read_windows(path: Path, budget: int, windows: int = WINDOWS):
+    """(raw byte windows, sampled?) – each window holds whole lines; the first starts at the header."""
+    codec = codec_for(path)
+    index = load_index(path) if codec else None
+
+    if codec is None:
+        size = path.stat().st_size
+        if size <= budget:
+            return None, False                       # small: let pandas stream the file
+        step = size // windows
+        width = budget // windows
+        out = []
+        with open(path, "rb") as f:
+            for i in range(windows):
+                f.seek(i * step)
+                out.append(_cut(f.read(width), head=i == 0))
+        return out, True
+
+    if index is not None:
+        blocks = index["blocks"]
+        raw = sum(b[2] for b in blocks)
+        picks = range(len(blocks))
+        if raw > budget:
+            per_block = max(raw // len(blocks), 1)
+            n = max(1, min(len(blocks), budget // per_block))
+            picks = sorted({round(i * (len(blocks) - 1) / max(n - 1, 1)) for i in range(n)})
+        out = []
+        with open(path, "rb") as f:
+            for i in picks:
+                offset, length, _ = blocks[i]
+                f.seek(offset)
+                out.append(decompress_block(codec, f.read(length)))   # blocks end on a row boundary
+        return out, raw > budget
+
+    with _stream(path) as f:
+        data = f.read(budget + 1)
+    return [_cut(data[:budget], head=True)], len(data) > budget
+
+
+def _chunks(path: Path, opts: dict):
+    if codec_for(path) is None:
+        yield from pd.read_csv(path, chunksize=CHUNK_ROWS, **opts)
+        return
+    with _stream(path) as f:
+        yield from pd.read_csv(f, chunksize=CHUNK_ROWS, **opts)
+
+
+def open_frames(path: Path, budget: int, full: bool = False):
+    """(iterator of all-string DataFrames over the file or a sample of it, sampled?)"""
+    opts = dict(dtype=str, keep_default_na=False)
+    windows, sampled = (None, False) if full else read_windows(path, budget)
+    if windows is None:
+        return _chunks(path, opts), False
+
+    def parse():
+        header = None
+        for window in windows:
+            if not window:
+                continue
+            if header is None:
+                frame = pd.read_csv(io.BytesIO(window), **opts)
+                header = list(frame.columns)
+            else:
+                frame = pd.read_csv(io.BytesIO(window), header=None, names=header, **opts)
+            yield frame
+    return parse(), sampled
+
+
+# ── checks ────────────────────────────────────────────────────────────
+
+def _pattern(col: dict):
+    """(type name, pattern matching whole *non-conforming* lines) for a column spec."""
+    kind = "key" if col["key"] and col["type"] in ("int", "key") else col["type"]
+    regex = TYPE_PATTERNS.get(kind)
+    return kind, (re.compile(rf"^(?!(?:{regex})$).+$", re.M) if regex else None)
+
+
+def _nonconforming(values: pd.Series, pattern: re.Pattern) -> set[str]:
+    """Distinct values that fail the type – one regex scan over the joined distinct values."""
+    uniques = pd.unique(values.to_numpy(dtype=object))
+    text = "\n".join(uniques)
+    bad = set(pattern.findall(text))
+    if text.count("\n") != len(uniques) - 1:          # embedded newlines never conform
+        bad |= {u for u in uniques if "\n" in u}
+    return bad
+
+
+def check_table(table: str, spec: dict, path: Path, budget: int, full: bool = False) -> dict:
+    """Check one file against its spec; returns {"rows", "sampled", "errors", "warnings"}."""
+    expected = list(spec["columns"])
+    errors, warnings = [], []
+    stats: dict[str, dict] = {}
+    patterns = {name: _pattern(col) for name, col in spec["columns"].items()}
+    actual = None
+    rows, sampled = 0, False
+    try:
+        frames, sampled = open_frames(path, budget, full)
+        for frame in frames:
+            if actual is None:
+                actual = [c.strip().lstrip("\ufeff") for c in frame.columns]
+                missing = [c for c in expected if c not in actual]
+                extra = [c for c in actual if c not in spec["columns"]]
+                if missing:
+                    errors.append(f"missing column(s): {', '.join(missing)}")
+                if extra:
+                    errors.append(f"undocumented column(s): {', '.join(extra)}")
+                common = [c for c in actual if c in spec["columns"]]
+                if not missing and common != expected:
+                    warnings.append(f"column order differs from the schema: {', '.join(actual)}")
+                stats = {c: {"blank": 0, "bad": 0, "examples": []} for c in expected if c in actual}
+            frame.columns = actual
+            rows += len(frame)
+            for name, s in stats.items():
+                values = frame[name]
+                s["blank"] += int((values == "").sum())
+                _, pattern = patterns[name]
+                if pattern is None:
+                    continue
+                bad = _nonconforming(values, pattern)
+                if bad:
+                    s["bad"] += int(values.isin(bad).sum())
+                    room = MAX_EXAMPLES - len(s["examples"])
+                    s["examples"] += sorted(bad)[:room] if room > 0 else []
+    except (pd.errors.ParserError, UnicodeDecodeError, OSError) as exc:
+        errors.append(f"unreadable: {str(exc).splitlines()[0]}")
+
+    for name, s in stats.items():
+        col = spec["columns"][name]
+        if col["required"] and s["blank"]:
+            errors.append(f"{name}: {s['blank']:,} blank value(s) in a required column")
+        if s["bad"]:
+            kind, _ = patterns[name]
+            errors.append(f"{name}: {s['bad']:,} value(s) are not {kind}, e.g. "
+                          f"{', '.join(repr(v) for v in s['examples'])}")
+    return {"rows": rows, "sampled": sampled, "errors": errors, "warnings": warnings}
+
+
+def check(data_dir: Path, schema: dict, budget: int, full: bool = False):
+    """Yield (kind, table, detail) for every table – kind ∈ table / missing / extra / planned."""
+    files = table_files(data_dir)
+    for table, spec in schema.items():
+        if spec["planned"]:
+            if table in files:
+                yield "table", table, check_table(table, spec, files[table], budget, full)
+            else:
+                yield "planned", table, None
+        elif table in files:
+            yield "table", table, check_table(table, spec, files[table], budget, full)
+        else:
+            yield "missing", table, None
+    for table in sorted(set(files) - set(schema)):
+        yield "extra", table, files[table]
+
+
+# ── main ──────────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CSVs against the DBML + COMMENT ON schema.")
+    parser.add_argument("--data_dir", type=Path, default=ROOT_DIR / "clean_csv")
+    parser.add_argument("--dbml", type=Path, default=DBML_FILE)
+    parser.add_argument("--comments", type=Path, nargs="+", default=None,
+                        help="COMMENT ON files, in order (default: luminosity_schema_comments*.sql)")
+    parser.add_argument("--sample_mb", type=float, default=SAMPLE_MB,
+                        help="raw MB checked per file; larger files are sampled (default %(default)s)")
+    parser.add_argument("--full", action="store_true", help="stream every row of every file")
+    parser.add_argument("--strict", action="store_true", help="exit 1 when any error is found")
+    args = parser.parse_args()
+    if not args.data_dir.is_dir():
+        parser.error(f"no such directory: {args.data_dir}")
+
+    print("[1/3] Loading schema …")
+    comments = args.comments or comment_files()
+    schema = load_schema(args.dbml, comments)
+    planned = sum(t["planned"] for t in schema.values())
+    print(f"      → {len(schema) - planned} documented tables, {planned} planned (DBML only)")
+
+    print(f"[2/3] Checking {args.data_dir} …")
+    budget = int(args.sample_mb * (1 << 20))
+    n_errors = n_warnings = 0
+    missing, extra, later = [], [], []
+    for kind, table, detail in check(args.data_dir, schema, budget, args.full):
+        if kind == "missing":
+            missing.append(table)
+        elif kind == "extra":
+            extra.append(table)
+        elif kind == "planned":
+            later.append(table)
+        else:
+            how = "sampled" if detail["sampled"] else "all"
+            mark = "❌" if detail["errors"] else "⚠️ " if detail["warnings"] else "✅"
+            print(f"  {mark} {table:<25} {detail['rows']:>12,} rows ({how})")
+            for msg in detail["errors"]:
+                print(f"       ✗ {msg}")
+            for msg in detail["warnings"]:
+                print(f"       ! {msg}")
+            n_errors += len(detail["errors"])
+            n_warnings += len(detail["warnings"])
+
+    print("\n🧩 Missing (documented, no file):")
+    for name in missing:
+        print(f"  ❌ {name}")
+    print("\n📦 Extra (in folder but not in schema):")
+    for name in extra:
+        print(f"  ⚠️  {name}")
+    print("\n📐 Planned (DBML only, not generated yet):")
+    for name in later:
+        print(f"  · {name}")
+
+    n_errors += len(missing)
+    n_warnings += len(extra)
+    print(f"\n[3/3] Done! {n_errors} error(s), {n_warnings} warning(s)")
+    if args.strict and n_errors:
+        raise SystemExit(1)
 
-print("\n🧩 Missing (still need to generate):")
-missing = expected_tables - actual_csvs
-for name in sorted(missing):
-    print(f"  ❌ {name}")
 
-print("\n📦 Extra (in folder but not in schema):")
-extra = actual_csvs - expected_tables
-for name in sorted(extra):
-    print(f"  ⚠️  {name}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+code_tables.py
+--------------
+Small-integer codes for the low-cardinality text columns of the big
+tables (attendance status, discipline type / severity / action, …).
+
+Generators draw these columns as int8 codes and keep them as pandas
+categoricals, so a chunk holds one byte per value instead of a Python
+string, and the CSV writer decodes them to labels only when it
+serializes. With --codes a generator writes the codes themselves and a
+lookup table next to the data:
+
+  attendance.csv                status = 0 / 1 / 2
+  attendance_statuses.csv       code, label  (0 Present, 1 Tardy, 2 Absent)
+
+transform_csvs.py decodes coded columns back to labels through those
+lookup files, so clean_csv/ keeps the documented text layout.
+
+    STATUS = CodeTable("attendance_statuses", ["Present", "Tardy", "Absent"])
+    STATUS.categorical(codes)          # labels for the CSV, 1 byte per row in memory
+    STATUS.encode(frame["status"])     # labels or codes → int8 codes
+"""
+
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from csv_writer import write_frame
+
+
+class CodeTable:
+    """Fixed label list; a value's code is its position."""
+
+    def __init__(self, name: str, labels):
+        self.name = name
+        self.labels = np.array(list(labels), dtype=object)
+        if len(self.labels) > np.iinfo(np.int8).max:
+            raise ValueError(f"{name}: {len(self.labels)} labels do not fit in int8 codes")
+        self._index = pd.Index(self.labels)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def code(self, label: str) -> np.int8:
+        return np.int8(self._index.get_loc(label))
+
+    def categorical(self, codes: np.ndarray) -> pd.Categorical:
+        """int codes → categorical column (written to CSV as labels)."""
+        return pd.Categorical.from_codes(codes, categories=self._index)
+
+    def column(self, codes: np.ndarray, as_codes: bool = False):
+        """What a generator puts in its frame: the codes with --codes, else the categorical."""
+        return np.asarray(codes, dtype=np.int8) if as_codes else self.categorical(codes)
+
+    def encode(self, values) -> np.ndarray:
+        """Labels, codes or a categorical of this table → int8 codes (unknown labels raise)."""
+        values = pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        if pd.api.types.is_numeric_dtype(values):
+            codes = values.to_numpy(dtype=np.int64)
+        else:
+            text = values.astype(str)
+            codes = self._index.get_indexer(text)
+            if (codes < 0).any() and text.str.fullmatch(r"\d+").all():
+                codes = text.astype(np.int64).to_numpy()          # codes read back as text
+        if ((codes < 0) | (codes >= len(self))).any():
+            bad = pd.unique(values[(codes < 0) | (codes >= len(self))])[:3]
+            raise ValueError(f"{self.name}: not a label or code: {', '.join(map(repr, bad))}")
+        return codes.astype(np.int8)
+
+    def decode(self, values) -> np.ndarray:
+        """Labels or codes → labels."""
+        return self.labels[self.encode(values)]
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"code": np.arange(len(self), dtype=np.int8), "label": self.labels})
+
+    def write(self, out_dir: Path) -> Path:
+        """Write the lookup table as <out_dir>/<name>.csv."""
+        return write_frame(Path(out_dir) / f"{self.name}.csv", self.frame())
+
+    @classmethod
+    def read(cls, path: Path) -> "CodeTable":
+        lookup = pd.read_csv(path, keep_default_na=False).sort_values("code")
+        if not np.array_equal(lookup["code"].to_numpy(), np.arange(len(lookup))):
+            raise ValueError(f"{path}: codes must be 0 … {len(lookup) - 1}")
+        return cls(Path(path).stem, lookup["label"])
+
+
+ATTENDANCE_STATUS = CodeTable("attendance_statuses", ["Present", "Tardy", "Absent"])
@@ -0,0 +1,149 @@
+"""
+csv_writer.py
+-------------
+Background CSV writer so generators can keep producing rows while the
+previous chunk is being serialized, compressed and flushed to disk.
+
+    with BackgroundCSVWriter(out_dir / "attendance.csv", compression="gzip") as w:
+        for chunk in generate_attendance_chunks(students, school_days, traits):
+            w.write(chunk)          # returns as soon as the queue has room
+
+The queue holds at most `max_pending` chunks (2 = double buffering), so a
+slow disk applies back-pressure instead of letting memory grow unbounded.
+Compressed output goes through block_compression.BlockCompressedWriter.
+
+Small static tables (lookups, terms, …) use `write_rows`, which needs only
+the stdlib `csv` module – pandas is never imported on that path.
+
+Every writer here stages its output and renames it into place when it is
+complete, then records it in the folder's manifest (see staging.py); a
+failed or interrupted write leaves the previous file untouched.
+"""
+
+from __future__ import annotations
+import csv
+import queue
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from block_compression import SUFFIXES, BlockCompressedWriter, resolve_codec
+from staging import StagedFile, record, staged_text
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# values accepted by the generators' --compression flag
+COMPRESSION_CHOICES = ["auto", *SUFFIXES]
+
+WRITE_CHUNK_ROWS = 100_000     # rows per chunk when writing an in-memory frame
+
+_STOP = object()
+
+
+def output_path(path: Path, codec: str | None) -> Path:
+    """Append the codec suffix (if any) to a .csv path."""
+    suffix = SUFFIXES.get(codec, "")
+    return path if not suffix or path.name.endswith(suffix) else path.with_name(path.name + suffix)
+
+
+def _open_sink(path: Path, codec: str | None):
+    if codec is None:
+        return StagedFile(path)
+    return BlockCompressedWriter(path, codec)
+
+
+class BackgroundCSVWriter:
+    """Serialize DataFrame chunks to one CSV file on a dedicated thread."""
+
+    def __init__(self, path: Path, compression: str | None = None, max_pending: int = 2):
+        codec = resolve_codec(compression)
+        self.path = output_path(Path(path), codec)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rows = 0
+        self._sink = _open_sink(self.path, codec)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: BaseException | None = None
+        self._header = True
+        self._thread = threading.Thread(target=self._run, name=f"csv-writer:{self.path.name}", daemon=True)
+        self._thread.start()
+
+    # -- writer thread ------------------------------------------------
+
+    def _run(self):
+        try:
+            while True:
+                chunk = self._queue.get()
+                if chunk is _STOP:
+                    break
+                if self._error is None:
+                    data = chunk.to_csv(index=False, header=self._header).encode("utf-8")
+                    self._sink.write(data)
+                    self._header = False
+        except BaseException as exc:          # surfaced on the producer side
+            self._error = exc
+            # keep draining so the producer never blocks on a full queue
+            while self._queue.get() is not _STOP:
+                pass
+
+    # -- producer side ------------------------------------------------
+
+    def write(self, chunk: pd.DataFrame):
+        if self._error is not None:
+            raise self._error
+        self.rows += len(chunk)
+        self._queue.put(chunk)
+
+    def close(self):
+        """Finish writing, then move the file into place and record it."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._error is not None:
+            self._sink.abort()
+            raise self._error
+        if isinstance(self._sink, StagedFile):
+            self._sink.commit()
+        else:
+            self._sink.close()
+        record(self.path, self.rows, self._sink.bytes, self._sink.sha256)
+
+    def abort(self):
+        """Stop and discard the output; the previous file (if any) is left as it was."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._sink.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def write_chunks(path: Path, chunks, compression: str | None = None) -> tuple[Path, int]:
+    """Drain an iterable of DataFrames into `path`; returns (path, row count)."""
+    with BackgroundCSVWriter(path, compression=compression) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return writer.path, writer.rows
+
+
+def write_frame(path: Path, df: pd.DataFrame, compression: str | None = None) -> Path:
+    """Write an in-memory DataFrame, chunked so compression can run in parallel."""
+    chunks = (df.iloc[i:i + WRITE_CHUNK_ROWS] for i in range(0, max(len(df), 1), WRITE_CHUNK_ROWS))
+    return write_chunks(path, chunks, compression)[0]
+
+
+def write_rows(path: Path, rows: list[dict]) -> Path:
+    """Write a list of dicts (one per row, same keys) as a plain CSV."""
+    path = Path(path)
+    with staged_text(path, rows=len(rows)) as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]), lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
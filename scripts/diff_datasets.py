@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+diff_datasets.py
+----------------
+What changed between two generation runs, table by table – for checking
+a generator change before it lands.
+
+INPUT
+  ├── --old      dataset folder (e.g. a run from before the change)
+  ├── --new      dataset folder       # .csv, .csv.gz, .csv.zst, .csv.lz4
+  └── luminosity_schema_v15.dbml + luminosity_schema_comments*.sql   # types, keys, refs
+
+OUTPUT
+  └── --report   (optional) the full comparison as JSON, histograms included
+
+Per table it reports:
+  • rows        – old → new count; added / removed / changed rows
+  • columns     – columns only in one run
+  • values      – numbers and dates: mean, quantiles, a common-bin histogram
+                  and the KS distance; categories: level rates and their
+                  total variation distance (TVD)
+  • references  – FK values missing from the referenced table, in each run
+
+Exact diffs use 64-bit row fingerprints. When the schema names the first
+column as the primary key, rows are matched by key (an edited row is
+"changed", not removed + added); otherwise the tables are compared as
+multisets of rows. Fingerprints are spilled to a temp file per table and
+run, partitioned into BUCKETS key ranges, and compared one bucket at a
+time. Distributions are kept as bottom-k samples (SAMPLE_SIZE values
+per column) and capped level counts. Memory therefore follows the bucket
+size and the referenced key sets, not the size of the files.
+
+Columns written as integer codes (--codes) are decoded through the run's
+lookup tables first, so a coded and a text run compare equal.
+
+Example
+  python scripts/diff_datasets.py --old runs/before/csv --new 2015/csv --report diff.json --strict
+"""
+
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from check_schema_coverage import open_frames, table_files
+from schema_spec import DBML_FILE, comment_files, load_schema
+from transform_csvs import SCHEMA_SPECS, decode_columns
+
+BUCKETS      = 256                  # fingerprint partitions compared one at a time
+SAMPLE_SIZE  = 20_000               # bottom-k sample per numeric / date column
+MAX_LEVELS   = 200                  # more distinct values → no level rates for that column
+QUANTILES    = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+HIST_BINS    = 20
+KS_LIMIT     = 0.05                 # flag numeric / date shifts above this KS distance
+TVD_LIMIT    = 0.01                 # flag category shifts above this total variation distance
+
+_SHIFT = np.uint64(64 - int(np.log2(BUCKETS)))
+_FINGERPRINT = np.dtype([("key", "<u8"), ("row", "<u8")])
+
+
+# ── reading ───────────────────────────────────────────────────────────
+
+def _frames(path: Path, data_dir: Path, table: str):
+    """All-string chunks of a whole file, header cleaned and coded columns decoded."""
+    frames, _ = open_frames(path, 0, full=True)
+    for frame in frames:
+        frame.columns = [c.strip().lstrip("\ufeff") for c in frame.columns]
+        yield decode_columns(SCHEMA_SPECS.get(table, {}), frame, data_dir)
+
+
+def _peek(frames):
+    """(first chunk or None, iterator over every chunk)"""
+    first = next(frames, None)
+    return first, (frames if first is None else itertools.chain([first], frames))
+
+
+def _hash(values: pd.Series) -> np.ndarray:
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def column_kind(spec: dict | None, name: str, sample: pd.Series) -> str:
+    """numeric / date / category / key – from the schema, else inferred from the first chunk."""
+    col = (spec or {}).get("columns", {}).get(name)
+    if col is not None:
+        if col["key"]:
+            return "key"
+        if col["type"] in ("int", "float"):
+            return "numeric"
+        return "date" if col["type"] in ("date", "datetime") else "category"
+    values = sample[sample != ""]
+    if values.empty:
+        return "category"
+    if pd.to_numeric(values, errors="coerce").notna().all():
+        return "numeric"
+    return "date" if values.str.fullmatch(r"\d{4}-\d{2}-\d{2}").all() else "category"
+
+
+def primary_key(spec: dict | None, columns: list[str]) -> str | None:
+    """The first column, when the schema documents it as the table's primary key."""
+    col = (spec or {}).get("columns", {}).get(columns[0]) if columns else None
+    if col is not None and col["key"] and col["required"] and col["ref"] is None:
+        return columns[0]
+    return None
+
+
+# ── streaming summaries ───────────────────────────────────────────────
+
+class ColumnStats:
+    """One column of one run: moments + bottom-k sample, or capped level counts."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.count = self.blank = self.invalid = 0
+        self.total = self.total_sq = 0.0
+        self.low, self.high = np.inf, -np.inf
+        self.sample = np.empty(0)
+        self._priority = np.empty(0)
+        self._rng = np.random.default_rng(0)        # same seed in both runs: equal data → equal sample
+        self.levels: pd.Series | None = pd.Series(dtype=np.int64)
+
+    def update(self, values: pd.Series):
+        present = values != ""
+        self.count += len(values)
+        self.blank += int((~present).sum())
+        values = values[present]
+        if self.kind == "category":
+            if self.levels is not None:
+                self.levels = self.levels.add(values.value_counts(), fill_value=0)
+                if len(self.levels) > MAX_LEVELS:
+                    self.levels = None
+            return
+
+        if self.kind == "date":
+            x = pd.to_datetime(values, errors="coerce", format="ISO8601")
+            x = ((x - pd.Timestamp("1970-01-01")) / pd.Timedelta(days=1)).to_numpy(dtype=float, na_value=np.nan)
+        else:
+            x = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        ok = ~np.isnan(x)
+        self.invalid += int((~ok).sum())
+        x = x[ok]
+        if not len(x):
+            return
+        self.total += float(x.sum())
+        self.total_sq += float((x * x).sum())
+        self.low, self.high = min(self.low, float(x.min())), max(self.high, float(x.max()))
+
+        # bottom-k sampling: every value gets a random priority, the k smallest survive
+        sample = np.concatenate([self.sample, x])
+        priority = np.concatenate([self._priority, self._rng.random(len(x))])
+        if len(sample) > SAMPLE_SIZE:
+            keep = np.argpartition(priority, SAMPLE_SIZE)[:SAMPLE_SIZE]
+            sample, priority = sample[keep], priority[keep]
+        self.sample, self._priority = sample, priority
+
+    @property
+    def n(self) -> int:
+        return self.count - self.blank - self.invalid
+
+    def summary(self) -> dict:
+        out = {"kind": self.kind, "rows": self.count, "blank": self.blank}
+        if self.kind == "category":
+            if self.levels is None:
+                out["levels"] = f"> {MAX_LEVELS}"
+            else:
+                total = max(self.levels.sum(), 1)
+                out["rates"] = {str(k): round(float(v) / total, 6)
+                                for k, v in self.levels.sort_values(ascending=False).items()}
+            return out
+        out["invalid"] = self.invalid
+        if self.n:
+            mean = self.total / self.n
+            q = np.quantile(self.sample, QUANTILES)
+            out.update(mean=mean, std=float(np.sqrt(max(self.total_sq / self.n - mean * mean, 0.0))),
+                       min=self.low, max=self.high,
+                       quantiles={f"p{round(p * 100)}": float(v) for p, v in zip(QUANTILES, q)})
+            if self.kind == "date":
+                for key in ("mean", "min", "max"):
+                    out[key] = _as_date(out[key])
+                out["quantiles"] = {k: _as_date(v) for k, v in out["quantiles"].items()}
+        return out
+
+
+def _as_date(days: float) -> str:
+    return str(np.datetime64(int(round(days * 86400)), "s").astype("datetime64[D]"))
+
+
+def ks_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Two-sample Kolmogorov–Smirnov distance."""
+    if not len(a) or not len(b):
+        return float(len(a) != len(b))
+    a, b = np.sort(a), np.sort(b)
+    grid = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, grid, side="right") / len(a)
+    cdf_b = np.searchsorted(b, grid, side="right") / len(b)
+    return float(np.abs(cdf_a - cdf_b).max())
+
+
+def compare_values(old: ColumnStats, new: ColumnStats) -> dict:
+    """Summaries of both runs plus a shift measure; "flagged" when it passes the limit."""
+    out = {"old": old.summary(), "new": new.summary()}
+    if old.kind != new.kind:
+        out["flagged"] = True
+        return out
+    if old.kind == "category":
+        if old.levels is None or new.levels is None:
+            out["flagged"] = False
+            return out
+        a = old.levels / max(old.levels.sum(), 1)
+        b = new.levels / max(new.levels.sum(), 1)
+        diff = b.sub(a, fill_value=0)
+        out["tvd"] = float(diff.abs().sum() / 2)
+        out["flagged"] = out["tvd"] > TVD_LIMIT
+        return out
+
+    out["ks"] = ks_distance(old.sample, new.sample)
+    pooled = np.concatenate([old.sample, new.sample])
+    if len(pooled):
+        edges = np.histogram_bin_edges(pooled, bins=HIST_BINS)
+        out["histogram"] = {"edges": edges.tolist(),
+                            "old": np.histogram(old.sample, edges)[0].tolist(),
+                            "new": np.histogram(new.sample, edges)[0].tolist()}
+    out["flagged"] = out["ks"] > KS_LIMIT
+    return out
+
+
+# ── exact diff ────────────────────────────────────────────────────────
+
+class Fingerprints:
+    """(key hash, row hash) per row of one table and run, spilled to disk by key range."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.rows = 0
+        self.digest = 0                             # order-independent sum of row hashes
+        self._runs: list[np.ndarray] = []           # per chunk: record offset of each bucket
+        self._file = open(path, "wb")
+        self._records = None
+
+    def add(self, keys: np.ndarray, rows: np.ndarray):
+        bucket = (keys >> _SHIFT).astype(np.intp)
+        order = np.argsort(bucket, kind="stable")
+        records = np.empty(len(keys), _FINGERPRINT)
+        records["key"], records["row"] = keys[order], rows[order]
+        self._file.write(records.tobytes())
+        self._runs.append(self.rows + np.searchsorted(bucket[order], np.arange(BUCKETS + 1)))
+        self.rows += len(records)
+        self.digest = (self.digest + int(rows.sum(dtype=np.uint64))) % (1 << 64)
+
+    def close(self):
+        self._file.close()
+        self._records = np.memmap(self.path, _FINGERPRINT, "r") if self.rows else np.empty(0, _FINGERPRINT)
+
+    def bucket(self, i: int) -> np.ndarray:
+        parts = [self._records[run[i]:run[i + 1]] for run in self._runs if run[i + 1] > run[i]]
+        return np.concatenate(parts) if parts else np.empty(0, _FINGERPRINT)
+
+
+def compare_rows(old: Fingerprints, new: Fingerprints, keyed: bool) -> dict:
+    """added / removed / changed rows (changed only when rows are matched by key)."""
+    out = {"added": 0, "removed": 0, "changed": 0}
+    if keyed:
+        out["duplicate_keys"] = {"old": 0, "new": 0}
+    if old.rows == new.rows and old.digest == new.digest:
+        return out
+    for i in range(BUCKETS):
+        a, b = old.bucket(i), new.bucket(i)
+        if keyed:
+            key_a, first_a = np.unique(a["key"], return_index=True)
+            key_b, first_b = np.unique(b["key"], return_index=True)
+            out["duplicate_keys"]["old"] += len(a) - len(key_a)
+            out["duplicate_keys"]["new"] += len(b) - len(key_b)
+            common, ia, ib = np.intersect1d(key_a, key_b, assume_unique=True, return_indices=True)
+            out["removed"] += len(key_a) - len(common)
+            out["added"] += len(key_b) - len(common)
+            out["changed"] += int((a["row"][first_a[ia]] != b["row"][first_b[ib]]).sum())
+        else:
+            row_a, count_a = np.unique(a["row"], return_counts=True)
+            row_b, count_b = np.unique(b["row"], return_counts=True)
+            _, ia, ib = np.intersect1d(row_a, row_b, assume_unique=True, return_indices=True)
+            same = int(np.minimum(count_a[ia], count_b[ib]).sum())
+            out["removed"] += len(a) - same
+            out["added"] += len(b) - same
+    return out
+
+
+# ── references ────────────────────────────────────────────────────────
+
+def reference_targets(schema: dict) -> dict[str, dict[str, str]]:
+    """table → {column: "target_table.target_column"} for documented FK columns."""
+    return {table: {name: col["ref"] for name, col in spec["columns"].items() if col["ref"]}
+            for table, spec in schema.items()}
+
+
+def key_sets(data_dir: Path, files: dict[str, Path], targets: set[str]) -> dict[str, np.ndarray]:
+    """"table.column" → sorted unique value hashes, for the targets present in this run."""
+    by_table: dict[str, list[str]] = {}
+    for target in targets:
+        table, _, column = target.partition(".")
+        if table in files:
+            by_table.setdefault(table, []).append(column)
+    out = {}
+    for table, columns in by_table.items():
+        parts: dict[str, list[np.ndarray]] = {c: [] for c in columns}
+        for frame in _frames(files[table], data_dir, table):
+            for column in columns:
+                if column in frame:
+                    parts[column].append(np.unique(_hash(frame[column])))
+        for column, hashes in parts.items():
+            if hashes:
+                out[f"{table}.{column}"] = np.unique(np.concatenate(hashes))
+    return out
+
+
+def _missing(values: pd.Series, keys: np.ndarray) -> int:
+    values = values[values != ""]
+    hashes = _hash(values)
+    pos = np.minimum(np.searchsorted(keys, hashes), max(len(keys) - 1, 0))
+    return int(len(hashes)) if not len(keys) else int((keys[pos] != hashes).sum())
+
+
+# ── per table ─────────────────────────────────────────────────────────
+
+def scan(frames, columns: list[str], kinds: dict[str, str], key: str | None,
+         refs: dict[str, str], keys: dict[str, np.ndarray], spill: Path):
+    """One pass over a run's table → (Fingerprints, {column: ColumnStats}, {column: missing refs})."""
+    prints = Fingerprints(spill)
+    stats = {c: ColumnStats(kinds[c]) for c in columns if kinds[c] != "key"}
+    missing = {c: 0 for c, target in refs.items() if target in keys}
+    try:
+        for frame in frames:
+            rows = pd.util.hash_pandas_object(frame[columns], index=False).to_numpy()
+            prints.add(_hash(frame[key]) if key else rows, rows)
+            for name, s in stats.items():
+                s.update(frame[name])
+            for name in missing:
+                missing[name] += _missing(frame[name], keys[refs[name]])
+    finally:
+        prints.close()
+    return prints, stats, missing
+
+
+def diff_table(table: str, spec: dict | None, old: tuple, new: tuple, tmp: Path, refs: dict[str, str]) -> dict:
+    """old / new = (data_dir, file, key sets) of the two runs."""
+    (old_dir, old_file, old_keys), (new_dir, new_file, new_keys) = old, new
+    first_old, frames_old = _peek(_frames(old_file, old_dir, table))
+    first_new, frames_new = _peek(_frames(new_file, new_dir, table))
+    cols_old = list(first_old.columns) if first_old is not None else []
+    cols_new = list(first_new.columns) if first_new is not None else []
+    columns = [c for c in cols_old if c in cols_new]
+    sample = first_new if first_new is not None else first_old
+    kinds = {c: column_kind(spec, c, sample[c]) for c in columns}
+    key = primary_key(spec, columns)
+    refs = {c: t for c, t in refs.items() if c in columns}
+
+    a = scan(frames_old, columns, kinds, key, refs, old_keys, tmp / f"{table}.old")
+    b = scan(frames_new, columns, kinds, key, refs, new_keys, tmp / f"{table}.new")
+    try:
+        rows = compare_rows(a[0], b[0], key is not None)
+    finally:
+        for prints in (a[0], b[0]):
+            prints._records = None
+            prints.path.unlink(missing_ok=True)
+
+    values = {c: compare_values(a[1][c], b[1][c]) for c in a[1]}
+    references = {c: {"target": refs[c], "old": a[2].get(c), "new": b[2].get(c)}
+                  for c in refs if c in a[2] or c in b[2]}
+    return {
+        "rows": {"old": a[0].rows, "new": b[0].rows, **rows},
+        "matched_by": key or "whole row",
+        "columns": {"only_old": [c for c in cols_old if c not in cols_new],
+                    "only_new": [c for c in cols_new if c not in cols_old]},
+        "values": values,
+        "references": references,
+    }
+
+
+def is_different(result: dict) -> bool:
+    rows = result["rows"]
+    return bool(rows["added"] or rows["removed"] or rows["changed"]
+                or result["columns"]["only_old"] or result["columns"]["only_new"])
+
+
+def new_violations(result: dict) -> dict[str, int]:
+    """FK columns with more missing references in the new run than in the old one."""
+    return {c: (r["new"] or 0) - (r["old"] or 0) for c, r in result["references"].items()
+            if r["new"] is not None and (r["new"] or 0) > (r["old"] or 0)}
+
+
+# ── main ──────────────────────────────────────────────────────────────
+
+def _print_table(table: str, result: dict):
+    rows = result["rows"]
+    flagged = {c: v for c, v in result["values"].items() if v["flagged"]}
+    bad_refs = new_violations(result)
+    mark = "❌" if bad_refs else "⚠️ " if is_different(result) or flagged else "✅"
+    change = "identical" if not is_different(result) else \
+        f"+{rows['added']:,} −{rows['removed']:,} ~{rows['changed']:,}"
+    print(f"  {mark} {table:<25} {rows['old']:>12,} → {rows['new']:<12,} {change}")
+    for side in ("only_old", "only_new"):
+        if result["columns"][side]:
+            print(f"       {side.replace('_', ' ')} columns: {', '.join(result['columns'][side])}")
+    dups = rows.get("duplicate_keys", {}).get("new", 0)
+    if dups:
+        print(f"       ! {dups:,} duplicate {result['matched_by']} value(s) in the new run")
+    for name, v in flagged.items():
+        old, new = v["old"], v["new"]
+        if "tvd" in v:
+            shifts = sorted(set(old.get("rates", {})) | set(new.get("rates", {})),
+                            key=lambda k: -abs(new["rates"].get(k, 0) - old["rates"].get(k, 0)))[:3]
+            detail = ", ".join(f"{k} {old['rates'].get(k, 0):.1%} → {new['rates'].get(k, 0):.1%}" for k in shifts)
+            print(f"       ~ {name}: TVD {v['tvd']:.3f} ({detail})")
+        elif "ks" in v:
+            print(f"       ~ {name}: KS {v['ks']:.3f}, mean {_fmt(old.get('mean'))} → {_fmt(new.get('mean'))}, "
+                  f"median {_fmt(old.get('quantiles', {}).get('p50'))} → {_fmt(new.get('quantiles', {}).get('p50'))}")
+        else:
+            print(f"       ~ {name}: {old['kind']} → {new['kind']}")
+    for name, r in result["references"].items():
+        if r["old"] or r["new"]:
+            mark = "✗" if name in bad_refs else "·"
+            print(f"       {mark} {name} → {r['target']}: {_fmt(r['old'])} → {_fmt(r['new'])} missing")
+
+
+def _fmt(value) -> str:
+    if value is None:
+        return "–"
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return f"{value:,}" if isinstance(value, int) else str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two dataset folders table by table.")
+    parser.add_argument("--old", required=True, type=Path, help="baseline run")
+    parser.add_argument("--new", required=True, type=Path, help="run to compare against it")
+    parser.add_argument("--tables", nargs="+", default=None, help="only these tables")
+    parser.add_argument("--report", type=Path, default=None, help="write the full comparison as JSON")
+    parser.add_argument("--tmp_dir", type=Path, default=None, help="where fingerprints are spilled")
+    parser.add_argument("--dbml", type=Path, default=DBML_FILE)
+    parser.add_argument("--strict", action="store_true",
+                        help="exit 1 when any table differs or gains FK violations")
+    args = parser.parse_args()
+    for folder in (args.old, args.new):
+        if not folder.is_dir():
+            parser.error(f"no such directory: {folder}")
+
+    print("[1/4] Loading schema …")
+    schema = load_schema(args.dbml, comment_files())
+    files_old, files_new = table_files(args.old), table_files(args.new)
+    tables = [t for t in schema if t in files_old or t in files_new]
+    tables += sorted((set(files_old) | set(files_new)) - set(schema))
+    if args.tables:
+        tables = [t for t in tables if t in args.tables]
+    refs = reference_targets(schema)
+    targets = {t for table in tables for t in refs.get(table, {}).values()}
+
+    print(f"[2/4] Collecting keys for {len(targets)} referenced column(s) …")
+    keys_old = key_sets(args.old, files_old, targets)
+    keys_new = key_sets(args.new, files_new, targets)
+
+    print(f"[3/4] Comparing {len(tables)} table(s) …")
+    results, only = {}, {"old": [], "new": []}
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir, prefix="diff_datasets_") as tmp:
+        for table in tables:
+            if table not in files_new:
+                only["old"].append(table)
+                continue
+            if table not in files_old:
+                only["new"].append(table)
+                continue
+            results[table] = diff_table(table, schema.get(table),
+                                        (args.old, files_old[table], keys_old),
+                                        (args.new, files_new[table], keys_new),
+                                        Path(tmp), refs.get(table, {}))
+            _print_table(table, results[table])
+
+    for side, names in only.items():
+        if names:
+            print(f"\n📦 Only in the {side} run: {', '.join(names)}")
+
+    changed = [t for t, r in results.items() if is_different(r)]
+    regressions = {t: v for t, r in results.items() if (v := new_violations(r))}
+    if args.report:
+        args.report.write_text(json.dumps({"old": str(args.old), "new": str(args.new),
+                                           "only_old": only["old"], "only_new": only["new"],
+                                           "tables": results}, indent=2, default=float) + "\n")
+        print(f"\n      → report in {args.report}")
+    print(f"\n[4/4] Done! {len(changed)} table(s) differ, {len(only['old']) + len(only['new'])} only in one run, "
+          f"{len(regressions)} with new FK violations")
+    if args.strict and (changed or regressions or only["old"] or only["new"]):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+estimate_run.py
+---------------
+Dry-run planner: expected rows, CSV bytes, runtime and peak memory of a
+full pipeline run, computed analytically from the active profile – no
+data is generated.
+
+  rows      attendance  = students × school days
+            assignments = classes × school weeks × mean assignments/week
+            grades      = Σ roster sizes × assignments per class
+            …           (see expected_rows)
+  bytes     rows × bytes/row
+  runtime   rows ÷ rows/s of the step that writes them
+  memory    largest in-memory frame of any step (streamed tables: one chunk)
+
+bytes/row, in-memory bytes/row and rows/s come from profiles/calibration.json,
+measured on a real run with `--calibrate`:
+
+INPUT  (with --calibrate, in --data_dir)
+  ├── *.csv            # a finished pipeline run
+  └── run_stats.json   # per-step seconds, written by `luminosity.py pipeline`
+
+OUTPUT
+  └── profiles/calibration.json
+
+Examples
+  python scripts/luminosity.py --profile district estimate --out_dir 2015/csv
+  python scripts/luminosity.py --profile state pipeline --dry_run
+  python scripts/luminosity.py estimate --calibrate 2015/csv
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import shutil
+from pathlib import Path
+
+from generate_classes import get_subjects
+from generate_discipline_reports import GRADE_BAND_RATES
+from generate_fees_and_payments import INSTALLMENTS, generate_fee_types
+from generate_standardized_tests import SUBJECTS as TEST_SUBJECTS, TEST_DEFINITIONS
+from generate_users_and_announcements import CHUNK_CLASSES, CHUNK_ROWS as CHUNK_USERS
+from generate_attendance import CHUNK_STUDENTS
+from generate_assignments_and_grades import MEMORY_BUDGET, chunk_rows_for
+from profiles import PROFILE_DIR, active_profile, scaled
+from school_calendar import SchoolCalendar
+from staging import write_text
+
+CALIBRATION_FILE = PROFILE_DIR / "calibration.json"
+RUN_STATS_FILE   = "run_stats.json"
+
+# pipeline step → tables it writes (rows/s is measured per step)
+STEP_TABLES = {
+    "reference":   ["school_calendar", "school_years", "terms"],
+    "teachers":    ["teachers", "classrooms", "teacher_subjects"],
+    "students":    ["students", "student_grade_history"],
+    "guardians":   ["guardians", "student_guardians"],
+    "classes":     ["classes"],
+    "enrollments": ["enrollments"],
+    "assignments": ["assignments", "grades"],
+    "attendance":  ["attendance"],
+    "discipline":  ["discipline_reports"],
+    "tests":       ["standardized_tests"],
+    "fees":        ["payments"],
+    "portal":      ["users", "announcements"],
+}
+
+# tables generated in chunks (rows held in memory at once → see chunk_rows)
+STREAMED = {"attendance", "assignments", "grades", "users", "announcements"}
+
+# measured per student on the "school" profile (guardian structure is random)
+GUARDIANS_PER_STUDENT      = 1.82
+GUARDIAN_LINKS_PER_STUDENT = 1.82
+
+# mean enrolled classes per student (generate_enrollments: homeroom + 2–4 specials / 5–7 classes)
+ELEMENTARY_CLASSES, SECONDARY_CLASSES = 1 + 3, 6
+
+# compressed / raw CSV size, for tables that support --compression
+COMPRESSIBLE = {"attendance", "grades", "users", "announcements"}
+COMPRESSION_RATIO = {"gzip": 0.22, "zstd": 0.18, "lz4": 0.35}
+
+# Python-side overhead on top of the largest frame (interpreter, pandas, index copies)
+BASE_MEMORY = 250 << 20
+MEMORY_HEADROOM = 2.0
+
+
+# ── rows ──────────────────────────────────────────────────────────────
+
+def _school_weeks(school_days) -> int:
+    mondays = school_days.astype("int64") - (school_days.astype("int64") + 3) % 7
+    return len(set(mondays.tolist()))
+
+
+def expected_rows(profile: dict) -> dict[str, float]:
+    """Expected row count of every generated table under `profile`."""
+    s, staff, cal, prog = profile["students"], profile["staffing"], profile["calendar"], profile["progression"]
+    n = s["count"]
+    total_w = sum(s["grade_weights"].values())
+    per_grade = {int(g): n * w / total_w for g, w in s["grade_weights"].items()}
+
+    calendar = SchoolCalendar.for_years(cal["first_year"], cal["years"])
+    school_days = calendar.school_days()
+    lo, hi = profile["assignments"]["per_week_range"]
+    per_class = _school_weeks(school_days) * (lo + hi) / 2
+
+    max_size = profile["classes"]["max_class_size"]
+    classes = enrollments = 0.0
+    for grade, pupils in per_grade.items():
+        subjects = get_subjects(grade)
+        sections = math.ceil(pupils / max_size) if pupils else 0
+        classes += sections * len(subjects)
+        taking = ELEMENTARY_CLASSES if grade <= 5 else SECONDARY_CLASSES
+        enrollments += pupils * min(taking, sections * len(subjects))
+
+    band_rate = lambda g: next((r for lo_g, hi_g, r in GRADE_BAND_RATES if lo_g <= g <= hi_g), 0.0)
+    tests = sum(per_grade.get(g, 0) * len(TEST_SUBJECTS[t]) for g, (t, _) in TEST_DEFINITIONS.items())
+    installments = generate_fee_types()["recurring"].map(INSTALLMENTS).fillna(1).sum()
+    plan = {k: scaled(staff[f"{k}_per_1000"], n)
+            for k in ("classrooms", "homeroom", "core", "specials", "support", "floaters")}
+    teachers = sum(v for k, v in plan.items() if k != "classrooms")
+    portal = profile["portal"]
+    weeks = _school_weeks(school_days)
+    account_students = sum(p for g, p in per_grade.items() if g >= portal["student_account_min_grade"])
+
+    return {
+        "school_calendar":       len(calendar.dates),
+        "school_years":          cal["years"],
+        "terms":                 4 * cal["years"],
+        "teachers":              teachers,
+        "classrooms":            plan["classrooms"],
+        "teacher_subjects":      teachers,
+        "students":              n + (cal["years"] - 1) * (n * prog["withdrawal_rate"] + per_grade.get(12, 0)),
+        "student_grade_history": n * cal["years"],
+        "guardians":             n * GUARDIANS_PER_STUDENT,
+        "student_guardians":     n * GUARDIAN_LINKS_PER_STUDENT,
+        "classes":               classes,
+        "enrollments":           enrollments,
+        "assignments":           classes * per_class,
+        "grades":                enrollments * per_class,
+        "attendance":            n * len(school_days),
+        "discipline_reports":    sum(p * band_rate(g) for g, p in per_grade.items()),
+        "standardized_tests":    tests * cal["years"],
+        "payments":              n * installments * cal["years"],
+        "users":                 (scaled(portal["admins_per_1000"], n) + teachers + account_students
+                                  + n * GUARDIANS_PER_STUDENT * portal["guardian_account_rate"]),
+        "announcements":         weeks * (classes * portal["class_announcements_per_week"]
+                                          + portal["school_announcements_per_week"]),
+    }
+
+
+def chunk_rows(table: str, rows: dict[str, float], profile: dict) -> float:
+    """Rows of `table` held in memory at once."""
+    if table == "attendance":
+        return min(rows["attendance"], CHUNK_STUDENTS * rows["attendance"] / max(profile["students"]["count"], 1))
+    if table == "users":
+        return min(rows["users"], CHUNK_USERS)
+    if table == "announcements":
+        return min(rows["announcements"], CHUNK_CLASSES * rows["announcements"] / max(rows["classes"], 1))
+    grade_rows = min(rows["grades"], chunk_rows_for(MEMORY_BUDGET))
+    if table == "grades":
+        return grade_rows
+    if table == "assignments":                    # one class shard alongside its grade chunks
+        return rows["assignments"] * grade_rows / max(rows["grades"], 1)
+    return rows[table]
+
+
+# ── calibration ───────────────────────────────────────────────────────
+
+def load_calibration(path: Path = CALIBRATION_FILE) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def calibrate(data_dir: Path, path: Path = CALIBRATION_FILE) -> dict:
+    """Measure bytes/row, memory/row and rows/s from a finished run in `data_dir`."""
+    import pandas as pd
+
+    calib = load_calibration(path) if path.exists() else {"tables": {}, "steps": {}}
+    stats_path = data_dir / RUN_STATS_FILE
+    seconds = json.loads(stats_path.read_text()) if stats_path.exists() else {}
+
+    rows_of = {}
+    for tables in STEP_TABLES.values():
+        for table in tables:
+            csv_path = data_dir / f"{table}.csv"
+            if not csv_path.exists():
+                continue
+            size = csv_path.stat().st_size
+            with open(csv_path, "rb") as f:
+                rows = sum(buf.count(b"\n") for buf in iter(lambda: f.read(1 << 20), b"")) - 1
+            if rows <= 0:
+                continue
+            sample = pd.read_csv(csv_path, nrows=100_000)
+            calib["tables"][table] = {
+                "bytes_per_row": round(size / rows, 1),
+                "mem_bytes_per_row": round(sample.memory_usage(deep=True, index=False).sum() / len(sample), 1),
+            }
+            rows_of[table] = rows
+
+    for step, tables in STEP_TABLES.items():
+        produced = sum(rows_of.get(t, 0) for t in tables)
+        if seconds.get(step) and produced:
+            calib["steps"][step] = {"rows_per_sec": round(produced / seconds[step])}
+
+    write_text(path, json.dumps(calib, indent=2) + "\n")
+    return calib
+
+
+# ── plan ──────────────────────────────────────────────────────────────
+
+def estimate(profile: dict, calib: dict, compression: str | None = None) -> list[dict]:
+    """One dict per table: rows, bytes, seconds (of its step, split by rows), peak_bytes."""
+    rows = expected_rows(profile)
+    plan = []
+    for step, tables in STEP_TABLES.items():
+        step_rows = sum(rows[t] for t in tables)
+        rate = calib["steps"].get(step, {}).get("rows_per_sec")
+        for table in tables:
+            t = calib["tables"].get(table, {})
+            size = rows[table] * t.get("bytes_per_row", 0)
+            if compression and table in COMPRESSIBLE:
+                size *= COMPRESSION_RATIO.get(compression, 1.0)
+            plan.append({
+                "table": table,
+                "step": step,
+                "rows": rows[table],
+                "bytes": size,
+                "seconds": rows[table] / rate if rate and step_rows else 0.0,
+                "peak_bytes": chunk_rows(table, rows, profile) * t.get("mem_bytes_per_row", 0),
+            })
+    return plan
+
+
+def peak_memory(plan: list[dict]) -> float:
+    """Largest per-step working set (sum of the step's in-memory frames) plus overhead."""
+    by_step: dict[str, float] = {}
+    for p in plan:
+        by_step[p["step"]] = by_step.get(p["step"], 0.0) + p["peak_bytes"]
+    return BASE_MEMORY + MEMORY_HEADROOM * max(by_step.values(), default=0.0)
+
+
+def total_memory() -> int | None:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def free_disk(out_dir: Path) -> int:
+    path = Path(out_dir).resolve()
+    while not path.exists():
+        path = path.parent
+    return shutil.disk_usage(path).free
+
+
+def _human(n: float, unit: str = "B") -> str:
+    for prefix in ("", "K", "M", "G", "T"):
+        if abs(n) < 1024 or prefix == "T":
+            return f"{n:,.1f} {prefix}{unit}" if prefix else f"{n:,.0f} {unit}"
+        n /= 1024
+
+
+def _duration(seconds: float) -> str:
+    m, s = divmod(int(round(seconds)), 60)
+    h, m = divmod(m, 60)
+    return f"{h}h{m:02d}m" if h else f"{m}m{s:02d}s" if m else f"{seconds:.1f}s"
+
+
+def report(profile: dict, plan: list[dict], out_dir: Path) -> list[str]:
+    """Print the plan; returns the warnings (RAM / disk / missing calibration)."""
+    print(f"Profile: {profile['name']} ({profile['students']['count']:,} students)\n")
+    print(f"  {'table':<22}{'rows':>15}{'size':>13}{'time':>10}")
+    for p in sorted(plan, key=lambda p: -p["bytes"]):
+        print(f"  {p['table']:<22}{p['rows']:>15,.0f}{_human(p['bytes']):>13}{_duration(p['seconds']):>10}")
+
+    total_bytes = sum(p["bytes"] for p in plan)
+    total_secs = sum(p["seconds"] for p in plan)
+    peak = peak_memory(plan)
+    print(f"\n  {'total':<22}{sum(p['rows'] for p in plan):>15,.0f}{_human(total_bytes):>13}{_duration(total_secs):>10}")
+    print(f"  peak memory ≈ {_human(peak)}")
+
+    warnings = []
+    missing = sorted({p["step"] for p in plan if p["rows"] and not p["seconds"]})
+    if missing:
+        warnings.append(f"no calibration for step(s) {', '.join(missing)} – run with --calibrate after a pipeline run")
+    ram = total_memory()
+    if ram and peak > ram:
+        warnings.append(f"peak memory {_human(peak)} exceeds physical RAM {_human(ram)}")
+    free = free_disk(out_dir)
+    if total_bytes > free:
+        warnings.append(f"output {_human(total_bytes)} exceeds free disk {_human(free)} at {out_dir}")
+    for w in warnings:
+        print(f"⚠️  {w}")
+    return warnings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate rows, size, runtime and memory of a pipeline run.")
+    parser.add_argument("--out_dir", type=Path, default=Path("2015/csv"),
+                        help="where the run would write (for the free-disk check)")
+    parser.add_argument("--compression", choices=sorted(COMPRESSION_RATIO), default=None)
+    parser.add_argument("--calibrate", type=Path, metavar="DATA_DIR", default=None,
+                        help="measure calibration.json from a finished run in DATA_DIR")
+    args = parser.parse_args()
+
+    if args.calibrate:
+        print(f"[1/1] Calibrating from {args.calibrate} …")
+        calib = calibrate(args.calibrate)
+        print(f"      → {len(calib['tables'])} tables, {len(calib['steps'])} timed steps")
+        print(f"✅ Done! Saved to {CALIBRATION_FILE}")
+        return
+
+    profile = active_profile()
+    report(profile, estimate(profile, load_calibration(), args.compression), args.out_dir)
+
+
+if __name__ == "__main__":
+    main()
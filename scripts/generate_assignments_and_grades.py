@@ -6,29 +6,43 @@ generate_assignments_and_grades.py
 
 INPUT  (in --data_dir)
   ├── classes.csv      # class_id, subject, grade_level, teacher_id, ...
+  ├── school_calendar.csv  # calendar_date, is_school_day, ...  (due dates land on school days)
   ├── students.csv     # student_id, first_name, last_name, ...
-  └── enrollments.csv  # class_id, student_id  (one row per roster entry)
+  ├── enrollments.csv  # class_id, student_id  (one row per roster entry)
+  └── student_traits.npy  # shared latent traits (built on first use)
 
 OUTPUT (to --out_dir)
   ├── assignments.csv  # assignment_id, class_id, title, due_date, points_possible, category
   └── grades.csv       # grade_id, student_id, assignment_id, score, submitted_on
 
+A student gets grades only for assignments due while they were enrolled
+(enrollment_date … withdraw_date in students.csv, see
+school_calendar.EnrollmentWindows).
+
+Both files are produced out of core: classes are processed in shards,
+each shard's roster join is expanded from CSR arrays in chunks sized by
+--memory_budget, and chunks are streamed through background writer
+threads (grades optionally gzip/zstd/lz4 block-compressed, see
+--compression). Memory stays bounded whatever the dataset size.
+
 Run `python generate_assignments_and_grades.py -h` for options.
 """
 
 from __future__ import annotations
-import argparse, itertools, random, uuid
+import argparse
 from pathlib import Path
-from datetime import datetime, timedelta
 
 import numpy as np
 import pandas as pd
 
+from csv_writer import COMPRESSION_CHOICES, BackgroundCSVWriter
+from id_utils import IdSequence
+from profiles import active_profile
+from school_calendar import EnrollmentWindows, SchoolCalendar
+from student_traits import load_traits, traits_for
 
-# ── CONFIG ────────────────────────────────────────────────────────────
 
-SCHOOL_START = datetime(2015, 9, 1)
-SCHOOL_END   = datetime(2016, 6, 15)
+# ── CONFIG ────────────────────────────────────────────────────────────
 
 # Subject-specific weighting of assignment categories & point values
 SUBJECT_CATEGORIES: dict[str, list[tuple[str, int]]] = {
@@ -42,138 +56,306 @@ SUBJECT_CATEGORIES: dict[str, list[tuple[str, int]]] = {
     "_default":    [("Homework", 10), ("Quiz", 20), ("Test", 100)],
 }
 
+# defaults for library callers; main() takes them from the profile's "assignments" section
 ASSIGNMENTS_PER_WEEK_RANGE = (1, 2)      # inclusive
 LATE_SUBMISSION_PROB       = 0.05        # 5 % chance a submission is late
 PERFECT_SCORE_PROB         = 0.03        # 3 % chance of 100 %
 FAILING_SCORE_PROB         = 0.07        # 7 % chance below 60 %
 
-# ----------------------------------------------------------------------
+# profile key → keyword of generate_grades / generate_grades_chunks
+SCORE_SETTINGS = {
+    "late_submission_prob": "late_prob",
+    "perfect_score_prob":   "perfect_prob",
+    "failing_score_prob":   "failing_prob",
+}
 
+# out-of-core generation: grade rows per chunk follow from the memory budget
+MEMORY_BUDGET              = 2 << 30     # bytes for the chunks in flight (--memory_budget)
+GRADE_ROW_BYTES            = 600         # peak bytes per grade row while generating + serializing
+WRITER_PENDING             = 2           # BackgroundCSVWriter queue depth
+CHUNK_ROWS                 = 1_000_000   # default grade rows per chunk for library callers
 
-def next_uuid(prefix: str) -> str:
-    """Return a short unique ID like 'A_c1a2b3'."""
-    return f"{prefix}_{uuid.uuid4().hex[:6]}"
+# student_traits.ability (z-score) → expected score percentage
+ABILITY_MEAN, ABILITY_SD   = 80, 10
+
+# ----------------------------------------------------------------------
 
 
-def load_data(data_dir: Path) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+def load_data(data_dir: Path) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, np.ndarray]:
     classes = pd.read_csv(data_dir / "classes.csv")
     students = pd.read_csv(data_dir / "students.csv")
     enrollments = pd.read_csv(data_dir / "enrollments.csv")
-    return classes, students, enrollments
-
-
-def daterange_by_week(start: datetime, end: datetime):
-    cur = start
-    while cur <= end:
-        yield cur
-        cur += timedelta(days=7)
-
-
-def choose_category(subject: str) -> tuple[str, int]:
-    pool = SUBJECT_CATEGORIES.get(subject, SUBJECT_CATEGORIES["_default"])
-    return random.choice(pool)
-
-
-def generate_assignments(classes: pd.DataFrame) -> pd.DataFrame:
-    records = []
-    for _, row in classes.iterrows():
-        class_id = row["class_id"]
-        subject  = row.get("subject", "General")
-        weeks = list(daterange_by_week(SCHOOL_START, SCHOOL_END))
-
-        for week_start in weeks:
-            num_asn = random.randint(*ASSIGNMENTS_PER_WEEK_RANGE)
-            for _ in range(num_asn):
-                category, points = choose_category(subject)
-                due_date = week_start + timedelta(days=random.randint(0, 4))  # Mon-Fri
-                title    = f"{category}: {subject} Week {due_date.isocalendar().week}"
-                assignment_id = next_uuid("A")
-                records.append({
-                    "assignment_id": assignment_id,
-                    "class_id": class_id,
-                    "title": title,
-                    "due_date": due_date.strftime("%Y-%m-%d"),
-                    "points_possible": points,
-                    "category": category,
-                })
-    return pd.DataFrame.from_records(records)
+    school_days = SchoolCalendar.from_csv(data_dir / "school_calendar.csv").school_days()
+    return classes, students, enrollments, school_days
+
+
+def _category_pools(subjects: np.ndarray):
+    """Flatten SUBJECT_CATEGORIES; return (categories, points, pool_start, pool_size) per subject."""
+    names = [k for k in SUBJECT_CATEGORIES if k != "_default"] + ["_default"]
+    flat = [pair for name in names for pair in SUBJECT_CATEGORIES[name]]
+    sizes = np.array([len(SUBJECT_CATEGORIES[name]) for name in names])
+    starts = np.cumsum(sizes) - sizes
+    pool_of = pd.Series(subjects).map({name: i for i, name in enumerate(names)})
+    pool_of = pool_of.fillna(len(names) - 1).to_numpy(dtype=np.int64)
+    categories = np.array([c for c, _ in flat])
+    points = np.array([p for _, p in flat], dtype=np.int64)
+    return categories, points, starts[pool_of], sizes[pool_of]
+
+
+def _iso_week(dates: np.ndarray) -> np.ndarray:
+    """ISO-8601 week number of datetime64[D] values."""
+    days = dates.astype(np.int64)
+    thursday = days - (days + 3) % 7 + 3                 # Thursday of the same ISO week
+    year_start = thursday.astype("datetime64[D]").astype("datetime64[Y]").astype("datetime64[D]")
+    return (thursday - year_start.astype(np.int64)) // 7 + 1
+
+
+def generate_assignments(classes: pd.DataFrame, school_days: np.ndarray,
+                         rng: np.random.Generator | None = None,
+                         per_week: tuple[int, int] = ASSIGNMENTS_PER_WEEK_RANGE,
+                         ids: IdSequence | None = None) -> pd.DataFrame:
+    """Assignments for every class × school week, due on actual school days.
+
+    Pass a shared `ids` sequence when generating class shards separately."""
+    rng = rng or np.random.default_rng()
+    if "subject" not in classes:
+        classes = classes.assign(subject="General")
+
+    # weeks (Mon-based) spanning the calendar, and the school days inside each
+    first = school_days[0] - (school_days[0].astype(np.int64) + 3) % 7
+    week_starts = np.arange(first, school_days[-1] + 1, np.timedelta64(7, "D"))
+    day_lo = np.searchsorted(school_days, week_starts, side="left")
+    day_hi = np.searchsorted(school_days, week_starts + 7, side="left")
+
+    # per-class-per-week counts (weeks without school days get none)
+    lo, hi = per_week
+    counts = rng.integers(lo, hi + 1, size=(len(classes), len(week_starts)))
+    counts[:, day_hi == day_lo] = 0
+    counts = counts.ravel()
+    class_idx = np.repeat(np.repeat(np.arange(len(classes)), len(week_starts)), counts)
+    week_idx = np.repeat(np.tile(np.arange(len(week_starts)), len(classes)), counts)
+    n = len(class_idx)
+
+    # due date: a random school day within that week
+    span = (day_hi - day_lo)[week_idx]
+    due = school_days[day_lo[week_idx] + (rng.random(n) * span).astype(np.int64)]
+
+    # category / points from the subject's pool
+    subjects = classes["subject"].to_numpy().astype(str)
+    categories, points, pool_start, pool_size = _category_pools(subjects)
+    pick = pool_start[class_idx] + (rng.random(n) * pool_size[class_idx]).astype(np.int64)
+    category = categories[pick]
+
+    title = np.char.add(np.char.add(np.char.add(category, ": "), subjects[class_idx]),
+                        np.char.add(" Week ", _iso_week(due).astype(str)))
+
+    return pd.DataFrame({
+        "assignment_id": (ids or IdSequence("A", n, rng, table="assignments")).take(n),
+        "class_id": classes["class_id"].to_numpy()[class_idx],
+        "title": title,
+        "due_date": np.datetime_as_string(due, unit="D"),
+        "points_possible": points[pick],
+        "category": category,
+    })
+
+
+class Roster:
+    """enrollments as CSR arrays (class_id → its students) so chunks expand without a merge."""
+
+    def __init__(self, enrollments: pd.DataFrame):
+        class_ids = enrollments["class_id"].to_numpy()
+        order = np.argsort(class_ids, kind="stable")
+        self.student_ids = enrollments["student_id"].to_numpy()[order]
+        self.class_ids, starts = np.unique(class_ids[order], return_index=True)
+        self.offsets = np.append(starts, len(order))
+
+    def _lookup(self, class_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(first roster position, roster size) per class."""
+        if not len(self.class_ids):
+            return np.zeros(len(class_ids), np.int64), np.zeros(len(class_ids), np.int64)
+        pos = np.minimum(np.searchsorted(self.class_ids, class_ids), len(self.class_ids) - 1)
+        known = self.class_ids[pos] == class_ids
+        return self.offsets[pos], np.where(known, self.offsets[pos + 1] - self.offsets[pos], 0)
+
+    def sizes(self, class_ids) -> np.ndarray:
+        """Roster size of each class (0 for classes nobody is enrolled in)."""
+        return self._lookup(np.asarray(class_ids))[1]
+
+    def expand(self, class_ids) -> tuple[np.ndarray, np.ndarray]:
+        """(row index into class_ids, student_id) for every rostered student, in roster order."""
+        starts, sizes = self._lookup(np.asarray(class_ids))
+        row = np.repeat(np.arange(len(sizes)), sizes)
+        within = np.arange(len(row)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        return row, self.student_ids[starts[row] + within]
+
+
+def chunk_rows_for(memory_budget: int) -> int:
+    """Grade rows per chunk so every chunk in flight fits in `memory_budget` bytes."""
+    in_flight = WRITER_PENDING + 2            # queued + being written + being generated
+    return max(1_000, memory_budget // (GRADE_ROW_BYTES * in_flight))
+
+
+def parse_size(text: str) -> int:
+    """'16G', '512MB', '2e9' → bytes."""
+    text = text.strip().upper().removesuffix("B")
+    scale = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}.get(text[-1:], 1)
+    return int(float(text.rstrip("KMGT")) * scale)
 
 
 def generate_grades(assignments: pd.DataFrame,
                     enrollments: pd.DataFrame,
-                    students: pd.DataFrame) -> pd.DataFrame:
-    # Map students to per-student ability & trend
-    ability = {
-        sid: np.clip(np.random.normal(loc=80, scale=10), 50, 100)
-        for sid in students["student_id"]
-    }
-    trend = {
-        sid: np.random.choice([-0.1, 0, 0.1])  # -, flat, improving
-        for sid in students["student_id"]
-    }
-
-    grade_records = []
-    for _, asn in assignments.iterrows():
-        asn_id  = asn["assignment_id"]
-        class_id = asn["class_id"]
-        points_possible = asn["points_possible"]
-        due_date_dt = datetime.strptime(asn["due_date"], "%Y-%m-%d")
-
-        roster = enrollments.loc[enrollments["class_id"] == class_id, "student_id"]
-        for sid in roster:
-            # Base score from ability + trend (later assignments get trend added)
-            weeks_since_start = (due_date_dt - SCHOOL_START).days / 7
-            base = ability[sid] + trend[sid] * weeks_since_start
-            score_pct = np.clip(np.random.normal(base, 10), 0, 100)
-
-            # Inject perfect / failing scores
-            if random.random() < PERFECT_SCORE_PROB:
-                score_pct = 100
-            elif random.random() < FAILING_SCORE_PROB:
-                score_pct = np.random.uniform(0, 59)
-
-            score = round(points_possible * (score_pct / 100))
-
-            # Submission date
-            if random.random() < LATE_SUBMISSION_PROB:
-                submitted = due_date_dt + timedelta(days=random.randint(1, 5))
-            else:
-                submitted = due_date_dt - timedelta(days=random.randint(0, 1))
-
-            grade_records.append({
-                "grade_id": next_uuid("G"),
-                "student_id": sid,
-                "assignment_id": asn_id,
-                "score": score,
-                "submitted_on": submitted.strftime("%Y-%m-%d"),
-            })
-    return pd.DataFrame.from_records(grade_records)
+                    traits: np.ndarray,
+                    rng: np.random.Generator | None = None,
+                    school_start: np.datetime64 | None = None,
+                    **score_probs) -> pd.DataFrame:
+    chunks = list(generate_grades_chunks(assignments, enrollments, traits, rng=rng,
+                                         school_start=school_start, **score_probs))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+def generate_grades_chunks(assignments: pd.DataFrame,
+                           enrollments: pd.DataFrame | Roster,
+                           traits: np.ndarray,
+                           max_rows: int = CHUNK_ROWS,
+                           rng: np.random.Generator | None = None,
+                           school_start: np.datetime64 | None = None,
+                           ids: IdSequence | None = None,
+                           late_prob: float = LATE_SUBMISSION_PROB,
+                           perfect_prob: float = PERFECT_SCORE_PROB,
+                           failing_prob: float = FAILING_SCORE_PROB,
+                           windows: EnrollmentWindows | None = None):
+    """Yield grade DataFrames of at most `max_rows` rows (one assignment never splits,
+    so a single assignment with a larger roster is yielded on its own). With
+    `windows`, students only get grades for assignments due while enrolled."""
+    rng = rng or np.random.default_rng()
+    if school_start is None:
+        school_start = np.datetime64(assignments["due_date"].min(), "D")
+    roster = enrollments if isinstance(enrollments, Roster) else Roster(enrollments)
+    sizes = roster.sizes(assignments["class_id"].to_numpy())
+    ids = ids or IdSequence("G", int(sizes.sum()), rng, table="grades")
+
+    # cut where the running row count crosses a multiple of max_rows
+    ends = np.cumsum(sizes)
+    cuts = np.searchsorted(ends, np.arange(max_rows, ends[-1] if len(ends) else 0, max_rows), side="right")
+    bounds = np.unique(np.concatenate([[0], cuts, [len(assignments)]]))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        chunk = assignments.iloc[lo:hi]
+        yield _grades_for(chunk, roster, traits, ids, rng, school_start,
+                          late_prob, perfect_prob, failing_prob, windows)
+
+
+def generate_sharded(classes: pd.DataFrame, enrollments: pd.DataFrame, traits: np.ndarray,
+                     school_days: np.ndarray, rng: np.random.Generator | None = None,
+                     max_rows: int = CHUNK_ROWS,
+                     per_week: tuple[int, int] = ASSIGNMENTS_PER_WEEK_RANGE,
+                     windows: EnrollmentWindows | None = None,
+                     **score_probs):
+    """
+    Out-of-core assignments + grades: classes are processed in shards whose
+    grades fit in ~`max_rows` rows, so neither table is ever fully in memory.
+    Yields ("assignments", frame) and ("grades", frame) in writing order.
+    """
+    rng = rng or np.random.default_rng()
+    roster = Roster(enrollments)
+    n_weeks = len(np.unique(school_days.astype(np.int64) - (school_days.astype(np.int64) + 3) % 7))
+    most = n_weeks * per_week[1]                          # upper bound of assignments per class
+    class_sizes = roster.sizes(classes["class_id"].to_numpy())
+    assignment_ids = IdSequence("A", len(classes) * most, rng, table="assignments")
+    grade_ids = IdSequence("G", int(class_sizes.sum()) * most, rng, table="grades")
+
+    ends = np.cumsum(class_sizes * most)
+    cuts = np.searchsorted(ends, np.arange(max_rows, ends[-1] if len(ends) else 0, max_rows), side="right")
+    bounds = np.unique(np.concatenate([[0], cuts, [len(classes)]]))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        shard = generate_assignments(classes.iloc[lo:hi], school_days, rng, per_week, assignment_ids)
+        yield "assignments", shard
+        for grades in generate_grades_chunks(shard, roster, traits, max_rows, rng, school_days[0],
+                                             grade_ids, windows=windows, **score_probs):
+            yield "grades", grades
+
+
+def _grades_for(assignments: pd.DataFrame, roster: Roster,
+                traits: np.ndarray, ids: IdSequence, rng: np.random.Generator,
+                school_start: np.datetime64, late_prob: float,
+                perfect_prob: float, failing_prob: float,
+                windows: EnrollmentWindows | None = None) -> pd.DataFrame:
+    # one row per (assignment, rostered student) – enrolled on the due date
+    row, student_ids = roster.expand(assignments["class_id"].to_numpy())
+    due = pd.to_datetime(assignments["due_date"]).to_numpy().astype("datetime64[D]")[row]
+    if windows is not None:
+        enrolled = windows.contains(student_ids, due)
+        row, student_ids, due = row[enrolled], student_ids[enrolled], due[enrolled]
+    n = len(row)
+    points = assignments["points_possible"].to_numpy()[row]
+    student = traits_for(traits, student_ids)
+
+    # Base score from ability + trend (later assignments get trend added)
+    weeks_since_start = (due - school_start).astype(np.int64) / 7
+    ability = np.clip(ABILITY_MEAN + ABILITY_SD * student["ability"], 50, 100)
+    base = ability + student["trend"] * weeks_since_start
+    score_pct = np.clip(rng.normal(base, 10), 0, 100)
+
+    # Inject perfect / failing scores
+    perfect = rng.random(n) < perfect_prob
+    failing = ~perfect & (rng.random(n) < failing_prob)
+    score_pct[perfect] = 100
+    score_pct[failing] = rng.uniform(0, 59, size=failing.sum())
+
+    score = np.round(points * (score_pct / 100)).astype(np.int64)
+
+    # Submission date: late by 1–5 days, otherwise on the due date or the day before
+    late = rng.random(n) < late_prob
+    offset = np.where(late, rng.integers(1, 6, size=n), -rng.integers(0, 2, size=n))
+    submitted = due + offset.astype("timedelta64[D]")
+    if windows is not None:                                   # not before enrolling / after leaving
+        start, end = windows.window(student_ids)
+        submitted = np.minimum(np.maximum(submitted, start), end)
+
+    return pd.DataFrame({
+        "grade_id": ids.take(n),
+        "student_id": student_ids,
+        "assignment_id": assignments["assignment_id"].to_numpy()[row],
+        "score": score,
+        "submitted_on": submitted,                   # datetime64; the writer formats it
+    })
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate assignments and grades.")
     parser.add_argument("--data_dir", required=True, type=Path,
-                        help="Folder containing classes.csv, students.csv, enrollments.csv")
+                        help="Folder containing classes.csv, students.csv, enrollments.csv, school_calendar.csv")
     parser.add_argument("--out_dir", default=None, type=Path,
                         help="Where to write assignments.csv & grades.csv (defaults to data_dir)")
+    parser.add_argument("--compression", choices=COMPRESSION_CHOICES, default=None,
+                        help="Compress grades.csv (adds .gz / .zst / .lz4; auto = best installed)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--memory_budget", type=parse_size, default=MEMORY_BUDGET,
+                        help="memory for grade chunks in flight, e.g. 512M or 8G (default 2G)")
     args = parser.parse_args()
     out_dir = args.out_dir or args.data_dir
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    print("[1/4] Loading data …")
-    classes, students, enrollments = load_data(args.data_dir)
-
-    print("[2/4] Generating assignments …")
-    assignments = generate_assignments(classes)
-    assignments.to_csv(out_dir / "assignments.csv", index=False)
-    print(f"      → {len(assignments):,} assignments saved.")
-
-    print("[3/4] Generating grades …")
-    grades = generate_grades(assignments, enrollments, students)
-    grades.to_csv(out_dir / "grades.csv", index=False)
-    print(f"      → {len(grades):,} grades saved.")
-
-    print("[4/4] Done! 👍  Files written to", out_dir.resolve())
+    print("[1/3] Loading data …")
+    classes, students, enrollments, school_days = load_data(args.data_dir)
+    traits = load_traits(args.data_dir, students["student_id"], args.seed)
+    rng = np.random.default_rng(args.seed)
+    cfg = active_profile()["assignments"]
+    score_probs = {kw: cfg[key] for key, kw in SCORE_SETTINGS.items()}
+
+    max_rows = chunk_rows_for(args.memory_budget)
+
+    print(f"[2/3] Generating assignments + grades in class shards (≤ {max_rows:,} grade rows per chunk) …")
+    with BackgroundCSVWriter(out_dir / "assignments.csv", max_pending=WRITER_PENDING) as a_writer, \
+            BackgroundCSVWriter(out_dir / "grades.csv", args.compression, WRITER_PENDING) as g_writer:
+        writers = {"assignments": a_writer, "grades": g_writer}
+        for table, frame in generate_sharded(classes, enrollments, traits, school_days, rng, max_rows,
+                                             tuple(cfg["per_week_range"]), EnrollmentWindows(students),
+                                             **score_probs):
+            writers[table].write(frame)
+    print(f"      → {a_writer.rows:,} assignments saved.")
+    print(f"      → {g_writer.rows:,} grades saved.")
+
+    print("[3/3] Done! 👍  Files written to", out_dir.resolve())
 
 
 if __name__ == "__main__":
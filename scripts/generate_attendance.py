@@ -6,55 +6,196 @@ Creates daily attendance records for each student, based on school calendar.
 
 INPUT (in --data_dir)
   ├── students.csv
-  └── school_calendar.csv  # must include 'date' and 'is_school_day'
+  ├── school_calendar.csv  # school days via school_calendar.SchoolCalendar
+  ├── student_traits.npy   # shared latent traits (built on first use)
+  └── enrollments.csv, classes.csv, periods.csv   # --mode period only
 
 OUTPUT
-  └── attendance.csv
+  ├── --out_file   (optionally .csv.gz / .zst / .lz4, see --compression)
+  │     --mode daily  (default)  attendance_id, student_id, date, status
+  │     --mode period            attendance_id, student_id, date, period_id, class_id, status
+  └── attendance_statuses.csv   # --codes only: status is written as 0/1/2, see code_tables.py
+
+Students only get rows for the school days between their enrollment_date
+and withdraw_date (students.csv; blank = open, see
+school_calendar.EnrollmentWindows), so multi-year rosters stay consistent.
+
+Rows are produced in student chunks and handed to a background writer
+thread, so generation and disk I/O overlap. Status is drawn as int8 codes
+and dates stay datetime64; both are only turned into text by the writer.
+
+Period mode covers students from --min_grade up (middle / high school).
+Every class meets in one fixed period of a per-grade timetable (subject +
+section rotate through the day, `class_slots`), and generate_enrollments.py
+gives a student at most one class per period, so nobody sits in two rooms
+at once (enrollments from older runs that still clash keep the first class
+of the period). A day absence is absent in every
+period; on days present, single periods can still be tardy or skipped.
+That is ~6× the daily volume, so the schedule is kept as CSR arrays
+(int32 IDs, int8 periods), status is drawn as int8 codes, and chunks are
+cut on a row budget rather than a student count.
 """
 
+from __future__ import annotations
+import numpy as np
 import pandas as pd
-import random
-import uuid
 from pathlib import Path
 
+from code_tables import ATTENDANCE_STATUS
+from csv_writer import COMPRESSION_CHOICES, write_chunks
+from id_utils import IdSequence
+from school_calendar import EnrollmentWindows, SchoolCalendar
+from student_traits import load_traits, traits_for
 
-def next_id(prefix="A"):
-    return f"{prefix}_{uuid.uuid4().hex[:6]}"
+CHUNK_STUDENTS = 5_000     # students per chunk handed to the writer
+TARDY_PROB     = 0.03      # P(tardy) on top of each student's reliability
 
+# --mode period
+PERIOD_CHUNK_ROWS = 1_000_000   # rows per chunk handed to the writer
+PERIOD_MIN_GRADE  = 6
+PERIOD_TARDY_PROB = 0.02        # per period, on days the student is in school
+PERIOD_SKIP_PROB  = 0.01        # absent from a single period on a day present
 
-def load_data(data_dir: Path):
-    students = pd.read_csv(data_dir / "students.csv")
-    calendar = pd.read_csv(data_dir / "school_calendar.csv")
-    calendar = calendar[calendar["is_school_day"] == True]  # only school days
-    return students, calendar
-
-
-def generate_attendance(students: pd.DataFrame, calendar: pd.DataFrame) -> pd.DataFrame:
-    attendance = []
-
-    for _, student in students.iterrows():
-        student_id = student["student_id"]
-        # Assign a "reliability" score: 0.0 = always absent, 1.0 = always present
-        reliability = random.uniform(0.85, 0.99)
+PRESENT, TARDY, ABSENT = (ATTENDANCE_STATUS.code(label) for label in ("Present", "Tardy", "Absent"))
 
-        for _, day in calendar.iterrows():
-            date = day["calendar_date"]
-            r = random.random()
-            if r < reliability:
-                status = "Present"
-            elif r < reliability + 0.03:
-                status = "Tardy"
-            else:
-                status = "Absent"
 
-            attendance.append({
-                "attendance_id": next_id(),
-                "student_id": student_id,
-                "date": date,
-                "status": status
-            })
-
-    return pd.DataFrame(attendance)
+def load_data(data_dir: Path):
+    students = pd.read_csv(data_dir / "students.csv")
+    school_days = SchoolCalendar.from_csv(data_dir / "school_calendar.csv").school_days()
+    return students, school_days
+
+
+def generate_attendance_chunks(students: pd.DataFrame, school_days: np.ndarray, traits: np.ndarray,
+                               chunk_students: int = CHUNK_STUDENTS,
+                               rng: np.random.Generator | None = None, as_codes: bool = False):
+    """Yield attendance DataFrames covering `chunk_students` students each."""
+    rng = rng or np.random.default_rng()
+    ids = IdSequence("A", len(students) * len(school_days), rng, table="attendance")
+    for start in range(0, len(students), chunk_students):
+        chunk = students.iloc[start:start + chunk_students]
+        yield _attendance_for(chunk, school_days, traits, ids, rng, as_codes)
+
+
+def generate_attendance(students: pd.DataFrame, school_days: np.ndarray, traits: np.ndarray,
+                        rng: np.random.Generator | None = None, as_codes: bool = False) -> pd.DataFrame:
+    rng = rng or np.random.default_rng()
+    ids = IdSequence("A", len(students) * len(school_days), rng, table="attendance")
+    return _attendance_for(students, school_days, traits, ids, rng, as_codes)
+
+
+def _attendance_for(students: pd.DataFrame, school_days: np.ndarray, traits: np.ndarray,
+                    ids: IdSequence, rng: np.random.Generator, as_codes: bool = False) -> pd.DataFrame:
+    student_ids = students["student_id"].to_numpy()
+    # "reliability" from the shared trait table: P(present) on any school day
+    reliability = traits_for(traits, student_ids)["reliability"][:, None]
+
+    r = rng.random((len(student_ids), len(school_days)))
+    status = np.where(r < reliability, PRESENT, np.where(r < reliability + TARDY_PROB, TARDY, ABSENT))
+
+    # only the days each student was enrolled
+    lo, hi = EnrollmentWindows(students).day_range(student_ids, school_days)
+    day = np.arange(len(school_days))
+    enrolled = ((day >= lo[:, None]) & (day < hi[:, None])).ravel()
+
+    return pd.DataFrame({
+        "attendance_id": ids.take(int(enrolled.sum())),
+        "student_id": np.repeat(student_ids, len(school_days))[enrolled],
+        "date": np.tile(school_days, len(student_ids))[enrolled],
+        "status": ATTENDANCE_STATUS.column(status.ravel()[enrolled], as_codes),
+    })
+
+
+# ── per-period mode ───────────────────────────────────────────────────
+
+def class_slots(classes: pd.DataFrame, n_periods: int) -> np.ndarray:
+    """0-based period each class meets in: subject and section rotate through the day."""
+    subject = classes.groupby("grade_level", sort=False)["subject"].transform(lambda s: pd.factorize(s)[0])
+    section = classes.groupby(["grade_level", "subject"], sort=False).cumcount()
+    return ((subject + section) % n_periods).to_numpy(dtype=np.int8)
+
+
+class Schedule:
+    """Each student's classes and their (fixed) periods as CSR arrays (student → its rows), sorted by period."""
+
+    def __init__(self, enrollments: pd.DataFrame, classes: pd.DataFrame, n_periods: int,
+                 min_grade: int = PERIOD_MIN_GRADE):
+        info = pd.DataFrame({"class_id": classes["class_id"].to_numpy(),
+                             "slot": class_slots(classes, n_periods),
+                             "grade": pd.to_numeric(classes["grade_level"], errors="coerce").to_numpy()})
+        e = enrollments[["student_id", "class_id"]].merge(info, on="class_id", how="inner")
+        # a student's grade is the grade of the classes they are enrolled in
+        e = e[e.groupby("student_id")["grade"].transform("max") >= min_grade]
+        e = e.sort_values(["student_id", "slot", "class_id"], kind="stable", ignore_index=True)
+        # one class per period: a class never moves, a clashing enrollment is left out
+        e = e.drop_duplicates(["student_id", "slot"], ignore_index=True)
+
+        sid = e["student_id"].to_numpy()
+        self.period = e["slot"].to_numpy(np.int8)
+        self.class_ids = e["class_id"].to_numpy(np.int32)
+        self.student_ids, starts = np.unique(sid.astype(np.int32), return_index=True)
+        self.offsets = np.append(starts, len(sid))
+
+    def __len__(self) -> int:
+        return len(self.class_ids)
+
+
+def generate_period_attendance_chunks(schedule: Schedule, school_days: np.ndarray, traits: np.ndarray,
+                                      period_ids: np.ndarray, rng: np.random.Generator | None = None,
+                                      max_rows: int = PERIOD_CHUNK_ROWS, as_codes: bool = False,
+                                      windows: EnrollmentWindows | None = None):
+    """Yield per-period attendance DataFrames of about `max_rows` rows (whole students),
+    limited to each student's enrollment window when `windows` is given."""
+    rng = rng or np.random.default_rng()
+    n_days = len(school_days)
+    ids = IdSequence("PA", len(schedule) * n_days, rng, table="period_attendance")
+    sizes = np.diff(schedule.offsets)
+    # cut between students so that each chunk holds at most max_rows (or one student's rows)
+    ends = np.cumsum(sizes) * n_days
+    start = 0
+    while start < len(sizes):
+        base = ends[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(ends, base + max_rows, side="right")))
+        yield _period_attendance_for(schedule, start, stop, school_days, traits, period_ids, ids, rng,
+                                     as_codes, windows)
+        start = stop
+
+
+def _period_attendance_for(schedule: Schedule, start: int, stop: int, school_days: np.ndarray,
+                           traits: np.ndarray, period_ids: np.ndarray, ids: IdSequence,
+                           rng: np.random.Generator, as_codes: bool = False,
+                           windows: EnrollmentWindows | None = None) -> pd.DataFrame:
+    n_days = len(school_days)
+    student_ids = schedule.student_ids[start:stop]
+    first = schedule.offsets[start:stop]
+    m = schedule.offsets[start + 1:stop + 1] - first
+    per_student = m * n_days
+
+    # row t of a student's block → (day t // m, their class t % m): date-major, then period
+    local = np.repeat(np.arange(len(m)), per_student)
+    t = np.arange(per_student.sum()) - np.repeat(np.cumsum(per_student) - per_student, per_student)
+    day, k = np.divmod(t, m[local])
+    row = first[local] + k
+
+    reliability = traits_for(traits, student_ids)["reliability"]
+    absent_day = rng.random((len(m), n_days)) >= reliability[:, None]
+    r = rng.random(len(t))
+    status = np.where(r < PERIOD_TARDY_PROB, TARDY,
+                      np.where(r < PERIOD_TARDY_PROB + PERIOD_SKIP_PROB, ABSENT, PRESENT))
+    status[absent_day[local, day]] = ABSENT
+
+    if windows is not None:
+        lo, hi = windows.day_range(student_ids, school_days)
+        keep = (day >= lo[local]) & (day < hi[local])
+        local, day, row, status = local[keep], day[keep], row[keep], status[keep]
+
+    return pd.DataFrame({
+        "attendance_id": ids.take(len(local)),
+        "student_id": student_ids[local],
+        "date": school_days[day],
+        "period_id": period_ids[schedule.period[row]],
+        "class_id": schedule.class_ids[row],
+        "status": ATTENDANCE_STATUS.column(status, as_codes),
+    })
 
 
 def main():
@@ -63,18 +204,40 @@ def main():
     parser = argparse.ArgumentParser(description="Generate student attendance records.")
     parser.add_argument("--data_dir", required=True, type=Path)
     parser.add_argument("--out_file", required=True, type=Path)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--compression", choices=COMPRESSION_CHOICES, default=None,
+                        help="Compress the output (adds .gz / .zst / .lz4 to --out_file; auto = best installed)")
+    parser.add_argument("--mode", choices=["daily", "period"], default="daily",
+                        help="one row per student per day (default) or per class period")
+    parser.add_argument("--min_grade", type=int, default=PERIOD_MIN_GRADE,
+                        help="--mode period: lowest grade with per-period attendance (default %(default)s)")
+    parser.add_argument("--codes", action="store_true",
+                        help="write status as integer codes plus attendance_statuses.csv (see code_tables.py)")
     args = parser.parse_args()
 
-    print("[1/3] Loading students and school calendar …")
-    students, calendar = load_data(args.data_dir)
-
-    print(f"[2/3] Generating attendance for {len(students):,} students over {len(calendar):,} days …")
-    df = generate_attendance(students, calendar)
-    print(f"      → {len(df):,} records generated.")
-
-    print("[3/3] Saving to file …")
-    df.to_csv(args.out_file, index=False)
-    print(f"✅ Done! Saved to {args.out_file.resolve()}")
+    print("[1/2] Loading students and school calendar …")
+    students, school_days = load_data(args.data_dir)
+    traits = load_traits(args.data_dir, students["student_id"], args.seed)
+    rng = np.random.default_rng(args.seed)
+
+    if args.mode == "period":
+        periods = pd.read_csv(args.data_dir / "periods.csv").sort_values("start_time")
+        schedule = Schedule(pd.read_csv(args.data_dir / "enrollments.csv"),
+                            pd.read_csv(args.data_dir / "classes.csv"), len(periods), args.min_grade)
+        print(f"[2/2] Generating per-period attendance for {len(schedule.student_ids):,} students "
+              f"(grade {args.min_grade}+), {len(periods)} periods, {len(school_days):,} days (streaming to file) …")
+        chunks = generate_period_attendance_chunks(schedule, school_days, traits, periods["period_id"].to_numpy(),
+                                                   rng, as_codes=args.codes, windows=EnrollmentWindows(students))
+    else:
+        print(f"[2/2] Generating attendance for {len(students):,} students over {len(school_days):,} days "
+              "(streaming to file) …")
+        chunks = generate_attendance_chunks(students, school_days, traits, rng=rng, as_codes=args.codes)
+
+    out_file, rows = write_chunks(args.out_file, chunks, compression=args.compression)
+    print(f"      → {rows:,} records generated.")
+    if args.codes:
+        print(f"      → status codes in {ATTENDANCE_STATUS.write(out_file.parent)}")
+    print(f"✅ Done! Saved to {out_file.resolve()}")
 
 
 if __name__ == "__main__":
@@ -1,97 +1,112 @@
+import argparse
 import csv
 import random
 import math
 from collections import defaultdict
+from pathlib import Path
 
-# CONFIG
-MAX_CLASS_SIZE = 15
+from profiles import active_profile
+from staging import staged_text
+
+# CONFIG  (max class size comes from the active profile: classes.max_class_size)
 ELEMENTARY_SUBJECTS = ["Homeroom", "Math", "Reading", "Science", "Social Studies"]
 MIDDLE_SUBJECTS = ["Math", "ELA", "Science", "Social Studies", "Art", "PE", "Technology"]
 HIGH_SCHOOL_SUBJECTS = ["Algebra I", "Geometry", "Biology", "Chemistry", "English", "US History", "Civics", "Health", "Spanish"]
+DATA_DIR = Path("2015/csv")
 
 # Load students and teachers
 def load_csv(path):
     with open(path, newline='') as f:
         return list(csv.DictReader(f))
 
-students = load_csv("2015/csv/students.csv")
-teachers = load_csv("2015/csv/teachers.csv")
+# Determine subjects per grade level
+def get_subjects(grade):
+    if grade <= 5:
+        return ELEMENTARY_SUBJECTS
+    elif 6 <= grade <= 8:
+        return MIDDLE_SUBJECTS
+    else:
+        return HIGH_SCHOOL_SUBJECTS
 
 
-# Organize students by grade (from the 'grade' column)
-grade_counts = defaultdict(int)
-for s in students:
-    grade = int(s["grade"])
-    grade_counts[grade] += 1
+def main():
+    parser = argparse.ArgumentParser(description="Generate class sections from students.csv and teachers.csv.")
+    parser.add_argument("--data_dir", type=Path, default=DATA_DIR, help="folder with students.csv and teachers.csv")
+    parser.add_argument("--out_dir", type=Path, default=DATA_DIR)
+    args = parser.parse_args()
 
+    max_class_size = active_profile()["classes"]["max_class_size"]
+    students = load_csv(args.data_dir / "students.csv")
+    teachers = load_csv(args.data_dir / "teachers.csv")
 
-# Assign teachers to grade levels based on role_label
-teacher_pool = defaultdict(list)
+    # Organize students by grade (from the 'grade' column)
+    grade_counts = defaultdict(int)
+    for s in students:
+        grade = int(s["grade"])
+        grade_counts[grade] += 1
 
-for t in teachers:
-    role = t["role_label"].lower()
-    floater = str(t.get("is_floater", "")).lower() == "true"
 
-    if "elementary" in role or (floater and not role):
-        grade_range = range(0, 6)  # K–5
-    elif "middle" in role:
-        grade_range = range(6, 9)  # 6–8
-    elif "high" in role:
-        grade_range = range(9, 13)  # 9–12
-    elif floater:
-        grade_range = range(0, 13)  # All grades
-    else:
-        continue  # Unknown role — skip
+    # Assign teachers to grade levels based on role_label
+    teacher_pool = defaultdict(list)
 
-    for grade in grade_range:
-        teacher_pool[grade].append(t)
+    for t in teachers:
+        role = t["role_label"].lower()
+        floater = str(t.get("is_floater", "")).lower() == "true"
 
+        if "elementary" in role or (floater and not role):
+            grade_range = range(0, 6)  # K–5
+        elif "middle" in role:
+            grade_range = range(6, 9)  # 6–8
+        elif "high" in role:
+            grade_range = range(9, 13)  # 9–12
+        elif floater:
+            grade_range = range(0, 13)  # All grades
+        else:
+            continue  # Unknown role — skip
 
-# Determine subjects per grade level
-def get_subjects(grade):
-    if grade <= 5:
-        return ELEMENTARY_SUBJECTS
-    elif 6 <= grade <= 8:
-        return MIDDLE_SUBJECTS
-    else:
-        return HIGH_SCHOOL_SUBJECTS
+        for grade in grade_range:
+            teacher_pool[grade].append(t)
+
+
+    # Generate class sections
+    classes = []
+    class_id = 1
+    warnings = []
+
+    for grade in sorted(grade_counts):
+        student_total = grade_counts[grade]
+        subjects = get_subjects(grade)
+
+        for subject in subjects:
+            num_sections = math.ceil(student_total / max_class_size)
+            available_teachers = teacher_pool.get(grade, []).copy()
+
+            if len(available_teachers) < num_sections:
+                warnings.append(f"⚠️ Not enough teachers for Grade {grade} - {subject}. Needed: {num_sections}, Available: {len(available_teachers)}")
+
+            for section in range(1, num_sections + 1):
+                if available_teachers:
+                    teacher = available_teachers.pop()
+                else:
+                    teacher = {"teacher_id": "UNASSIGNED"}
+
+                classes.append({
+                    "class_id": class_id,
+                    "class_name": f"Grade {grade} - {subject} (Section {section})",
+                    "grade_level": grade,
+                    "subject": subject,
+                    "teacher_id": teacher["teacher_id"]
+                })
+                class_id += 1
+
+    # Write classes.csv
+    with staged_text(args.out_dir / "classes.csv") as f:
+        writer = csv.DictWriter(f, fieldnames=["class_id", "class_name", "grade_level", "subject", "teacher_id"])
+        writer.writeheader()
+        writer.writerows(classes)
+
+    print(f"✅ Generated {len(classes)} classes in classes.csv")
 
-# Generate class sections
-classes = []
-class_id = 1
-warnings = []
-
-for grade in sorted(grade_counts):
-    student_total = grade_counts[grade]
-    subjects = get_subjects(grade)
-
-    for subject in subjects:
-        num_sections = math.ceil(student_total / MAX_CLASS_SIZE)
-        available_teachers = teacher_pool.get(grade, []).copy()
-
-        if len(available_teachers) < num_sections:
-            warnings.append(f"⚠️ Not enough teachers for Grade {grade} - {subject}. Needed: {num_sections}, Available: {len(available_teachers)}")
-
-        for section in range(1, num_sections + 1):
-            if available_teachers:
-                teacher = available_teachers.pop()
-            else:
-                teacher = {"teacher_id": "UNASSIGNED"}
-
-            classes.append({
-                "class_id": class_id,
-                "class_name": f"Grade {grade} - {subject} (Section {section})",
-                "grade_level": grade,
-                "subject": subject,
-                "teacher_id": teacher["teacher_id"]
-            })
-            class_id += 1
-
-# Write classes.csv
-with open("2015/csv/classes.csv", "w", newline='') as f:
-    writer = csv.DictWriter(f, fieldnames=["class_id", "class_name", "grade_level", "subject", "teacher_id"])
-    writer.writeheader()
-    writer.writerows(classes)
-
-print(f"✅ Generated {len(classes)} classes in classes.csv")
 
+if __name__ == "__main__":
+    main()
@@ -6,20 +6,48 @@ Simulates student discipline incidents throughout the school year.
 
 INPUT
   ├── students.csv
-  └── school_calendar.csv  (must include is_school_day = True)
+  ├── school_calendar.csv  (school days via school_calendar.SchoolCalendar)
+  ├── student_traits.npy   (shared latent traits: behaviour_risk scales incident rates)
+  └── attendance.csv       (optional, --attendance_file: absent/tardy students get more incidents)
 
 OUTPUT
-  └── discipline_reports.csv
+  ├── discipline_reports.csv
+  └── incident_types.csv, severities.csv, disciplinary_actions.csv, incident_descriptions.csv
+                           (--codes only: those columns are written as integer codes, see code_tables.py)
+
+Incident counts are drawn for all students at once from a negative
+binomial (mean by grade band, scaled by the share of school days the
+student was enrolled), then types and dates – inside each student's
+enrollment window – are sampled as arrays.
+Type, severity, action and description are carried as int8 codes into
+the INCIDENTS table and only written out as text by the CSV writer.
 """
 
+from __future__ import annotations
+import numpy as np
 import pandas as pd
-import random
-import uuid
 from pathlib import Path
 
+from code_tables import ATTENDANCE_STATUS, CodeTable
+from csv_writer import write_frame
+from id_utils import short_ids
+from school_calendar import EnrollmentWindows, SchoolCalendar
+from student_traits import load_traits, traits_for
 
-def next_id():
-    return f"D_{uuid.uuid4().hex[:6]}"
+
+# (first grade, last grade, mean incidents per student per year)
+GRADE_BAND_RATES = [
+    (0, 5, 0.35),
+    (6, 8, 0.80),
+    (9, 12, 0.55),
+]
+DISPERSION                 = 0.5          # NB shape: lower → more students with 0 and a few repeat offenders
+MAX_INCIDENTS_PER_STUDENT  = 12
+SEVERITY_WEIGHTS           = {"Minor": 0.60, "Moderate": 0.30, "Severe": 0.10}
+
+# attendance correlation: multiplier = (missed-rate / mean missed-rate) ** elasticity
+ATTENDANCE_ELASTICITY      = 0.7
+ATTENDANCE_MULTIPLIER_RANGE = (0.3, 4.0)
 
 
 # Common discipline event types by severity
@@ -47,35 +75,74 @@ DESCRIPTIONS = {
     "Physical Aggression": "Pushed, hit, or physically harmed another student.",
 }
 
-
-def generate_reports(students: pd.DataFrame, calendar: pd.DataFrame) -> pd.DataFrame:
-    reports = []
-
-    school_days = list(calendar[calendar["is_school_day"] == True]["calendar_date"])
-
-    for _, student in students.iterrows():
-        student_id = student["student_id"]
-
-        # Random chance a student has discipline issues
-        if random.random() < 0.2:  # 20% of students
-            num_incidents = random.randint(1, 5)
-
-            for _ in range(num_incidents):
-                incident_type, severity, action = random.choice(INCIDENTS)
-                description = DESCRIPTIONS[incident_type]
-                date = random.choice(school_days)
-
-                reports.append({
-                    "report_id": next_id(),
-                    "student_id": student_id,
-                    "date": date,
-                    "type": incident_type,
-                    "severity": severity,
-                    "action_taken": action,
-                    "description": description
-                })
-
-    return pd.DataFrame(reports)
+# code tables for the text columns; a report's type code indexes INCIDENTS
+INCIDENT_TYPES        = CodeTable("incident_types", [name for name, _, _ in INCIDENTS])
+SEVERITIES            = CodeTable("severities", SEVERITY_WEIGHTS)
+ACTIONS               = CodeTable("disciplinary_actions", dict.fromkeys(action for _, _, action in INCIDENTS))
+INCIDENT_DESCRIPTIONS = CodeTable("incident_descriptions", [DESCRIPTIONS[name] for name, _, _ in INCIDENTS])
+CODE_TABLES           = [INCIDENT_TYPES, SEVERITIES, ACTIONS, INCIDENT_DESCRIPTIONS]
+
+
+def _incident_rates(students: pd.DataFrame) -> np.ndarray:
+    """Expected incidents per student for the year, from the grade band."""
+    grades = students["grade"].to_numpy() if "grade" in students else np.full(len(students), 7)
+    band_edges = np.array([band[1] for band in GRADE_BAND_RATES])      # upper grade of each band
+    band = np.minimum(np.searchsorted(band_edges, grades), len(GRADE_BAND_RATES) - 1)
+    return np.array([rate for _, _, rate in GRADE_BAND_RATES])[band]
+
+
+def attendance_risk(attendance: pd.DataFrame, student_ids: np.ndarray) -> np.ndarray:
+    """Rate multiplier per student: >1 for students absent/tardy more than average."""
+    present = ATTENDANCE_STATUS.encode(attendance["status"]) == ATTENDANCE_STATUS.code("Present")
+    missed = pd.Series(~present).groupby(attendance["student_id"].to_numpy()).mean()
+    missed = missed.reindex(student_ids).fillna(missed.mean()).to_numpy()
+    ratio = missed / max(missed.mean(), 1e-9)
+    return np.clip(ratio ** ATTENDANCE_ELASTICITY, *ATTENDANCE_MULTIPLIER_RANGE)
+
+
+def generate_reports(students: pd.DataFrame, school_days: np.ndarray,
+                     attendance: pd.DataFrame | None = None,
+                     rng: np.random.Generator | None = None,
+                     traits: np.ndarray | None = None,
+                     year_fraction: float = 1.0, as_codes: bool = False) -> pd.DataFrame:
+    """Incidents dated on `school_days`; `year_fraction` scales the yearly rates
+    when `school_days` covers only part of a year (incremental updates)."""
+    rng = rng or np.random.default_rng()
+    student_ids = students["student_id"].to_numpy()
+    lo, hi = EnrollmentWindows(students).day_range(student_ids, school_days)
+
+    # 1) incident counts for every student at once (negative binomial → overdispersed)
+    mu = _incident_rates(students) * year_fraction * (hi - lo) / max(len(school_days), 1)
+    if traits is not None:
+        mu = mu * traits_for(traits, student_ids)["behaviour_risk"]
+    if attendance is not None:
+        mu = mu * attendance_risk(attendance, student_ids)
+    counts = rng.negative_binomial(DISPERSION, DISPERSION / (DISPERSION + mu))
+    counts = np.minimum(counts, MAX_INCIDENTS_PER_STUDENT)
+
+    # 2) expand to one row per incident, then draw type & date as arrays
+    n = int(counts.sum())
+    incident_idx = rng.choice(len(INCIDENTS), size=n, p=_incident_weights()).astype(np.int8)
+    severities = np.array([SEVERITIES.code(sev) for _, sev, _ in INCIDENTS])
+    actions = np.array([ACTIONS.code(action) for _, _, action in INCIDENTS])
+
+    reports = pd.DataFrame({
+        "report_id": short_ids("D", n, rng, table="discipline_reports"),
+        "student_id": np.repeat(student_ids, counts),
+        "date": school_days[rng.integers(np.repeat(lo, counts), np.repeat(hi, counts))],
+        "type": INCIDENT_TYPES.column(incident_idx, as_codes),
+        "severity": SEVERITIES.column(severities[incident_idx], as_codes),
+        "action_taken": ACTIONS.column(actions[incident_idx], as_codes),
+        "description": INCIDENT_DESCRIPTIONS.column(incident_idx, as_codes),
+    })
+    return reports.sort_values(["student_id", "date"], kind="stable", ignore_index=True)
+
+
+def _incident_weights() -> np.ndarray:
+    """Per-incident probability: severity weight shared by the incidents of that severity."""
+    severities = [sev for _, sev, _ in INCIDENTS]
+    weights = np.array([SEVERITY_WEIGHTS[sev] / severities.count(sev) for sev in severities])
+    return weights / weights.sum()
 
 
 def main():
@@ -84,18 +151,32 @@ def main():
     parser = argparse.ArgumentParser(description="Generate student discipline reports.")
     parser.add_argument("--data_dir", required=True, type=Path)
     parser.add_argument("--out_file", required=True, type=Path)
+    parser.add_argument("--attendance_file", type=Path, default=None,
+                        help="attendance.csv to correlate incident rates with absences/tardies")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--codes", action="store_true",
+                        help="write type / severity / action / description as integer codes plus lookup CSVs")
     args = parser.parse_args()
 
     print("[1/3] Loading students and school calendar …")
     students = pd.read_csv(args.data_dir / "students.csv")
-    calendar = pd.read_csv(args.data_dir / "school_calendar.csv")
+    school_days = SchoolCalendar.from_csv(args.data_dir / "school_calendar.csv").school_days()
+    traits = load_traits(args.data_dir, students["student_id"], args.seed)
+    attendance = None
+    if args.attendance_file:
+        attendance = pd.read_csv(args.attendance_file, usecols=["student_id", "status"])
 
     print("[2/3] Generating reports …")
-    reports = generate_reports(students, calendar)
+    reports = generate_reports(students, school_days, attendance, np.random.default_rng(args.seed), traits,
+                               as_codes=args.codes)
     print(f"      → {len(reports):,} total reports generated.")
 
     print("[3/3] Saving to file …")
-    reports.to_csv(args.out_file, index=False)
+    write_frame(args.out_file, reports)
+    if args.codes:
+        for table in CODE_TABLES:
+            table.write(args.out_file.parent)
+        print(f"      → code tables: {', '.join(f'{t.name}.csv' for t in CODE_TABLES)}")
     print(f"✅ Saved to {args.out_file.resolve()}")
 
 
@@ -6,10 +6,20 @@ Assigns students to appropriate classes based on grade level and class subject.
 
 INPUT (in --data_dir)
   ├── students.csv      # student_id, grade_level, ...
-  └── classes.csv       # class_id, grade_level, subject, ...
+  ├── classes.csv       # class_id, grade_level, subject, ...
+  └── periods.csv       # optional: the number of periods in the timetable
 
 OUTPUT (to --out_file)
   └── enrollments.csv   # class_id, student_id
+
+Every class meets in one fixed period of the per-grade timetable
+(generate_attendance.class_slots); a student gets at most one class per
+period and one section per subject, so their schedule never clashes.
+
+With a multi-year calendar there is still one timetable: students are
+placed by their latest grade (students.csv `grade`) and the dated tables
+built on it (period attendance, grades) keep only the days inside each
+student's enrollment window.
 """
 
 import argparse
@@ -17,14 +27,35 @@ import pandas as pd
 import random
 from pathlib import Path
 
+from csv_writer import write_frame
+from generate_attendance import class_slots
+from reference_data import PERIODS
+
 
 def load_data(data_dir: Path):
     students = pd.read_csv(data_dir / "students.csv")
     classes = pd.read_csv(data_dir / "classes.csv")
-    return students, classes
-
-
-def assign_students_to_classes(students: pd.DataFrame, classes: pd.DataFrame) -> pd.DataFrame:
+    periods_path = data_dir / "periods.csv"
+    n_periods = len(pd.read_csv(periods_path)) if periods_path.exists() else len(PERIODS)
+    return students, classes, n_periods
+
+
+def _pick(candidates: pd.DataFrame, k: int, taken: set) -> list:
+    """Up to `k` random classes whose period and subject are not in `taken` (updated in place)."""
+    rows = list(candidates[["class_id", "slot", "subject"]].itertuples(index=False, name=None))
+    random.shuffle(rows)
+    picked = []
+    for class_id, slot, subject in rows:
+        if len(picked) == k:
+            break
+        if ("slot", slot) not in taken and ("subject", subject) not in taken:
+            taken |= {("slot", slot), ("subject", subject)}
+            picked.append(class_id)
+    return picked
+
+
+def assign_students_to_classes(students: pd.DataFrame, classes: pd.DataFrame, n_periods: int) -> pd.DataFrame:
+    classes = classes.assign(slot=class_slots(classes, n_periods))
     enrollments = []
 
     # Loop through each student
@@ -44,22 +75,14 @@ def assign_students_to_classes(students: pd.DataFrame, classes: pd.DataFrame) ->
             # Elementary: 1 homeroom + 2–4 specials
             homerooms = eligible_classes[eligible_classes["subject"] == "Homeroom"]
             specials  = eligible_classes[eligible_classes["subject"] != "Homeroom"]
-            assigned = []
-
-            if not homerooms.empty:
-                assigned += random.sample(list(homerooms["class_id"]), k=1)
+            taken = set()
 
-            num_specials = random.randint(2, 4)
-            if len(specials) >= num_specials:
-                assigned += random.sample(list(specials["class_id"]), k=num_specials)
-            else:
-                assigned += list(specials["class_id"])
+            assigned = _pick(homerooms, 1, taken)
+            assigned += _pick(specials, random.randint(2, 4), taken)
 
         else:
             # Middle/High: 5–7 classes
-            num_classes = random.randint(5, 7)
-            available_ids = list(eligible_classes["class_id"])
-            assigned = random.sample(available_ids, k=min(num_classes, len(available_ids)))
+            assigned = _pick(eligible_classes, random.randint(5, 7), set())
 
         for class_id in assigned:
             enrollments.append({"class_id": class_id, "student_id": student_id})
@@ -76,14 +99,14 @@ def main():
     args = parser.parse_args()
 
     print("[1/3] Loading data …")
-    students, classes = load_data(args.data_dir)
+    students, classes, n_periods = load_data(args.data_dir)
 
     print("[2/3] Assigning students to classes …")
-    enrollments = assign_students_to_classes(students, classes)
+    enrollments = assign_students_to_classes(students, classes, n_periods)
     print(f"      → {len(enrollments):,} enrollments generated.")
 
     print("[3/3] Saving to file …")
-    enrollments.to_csv(args.out_file, index=False)
+    write_frame(args.out_file, enrollments)
     print(f"      ✅ Done! Saved to {args.out_file.resolve()}")
 
 
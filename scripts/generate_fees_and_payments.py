@@ -5,22 +5,41 @@ generate_fees_and_payments.py
 Creates fee_types.csv and payments.csv for school data.
 
 INPUT
-  └── students.csv
+  ├── students.csv
+  └── student_grade_history.csv   # optional: school years attended (default: year 1 only)
 
 OUTPUT
   ├── fee_types.csv
-  └── payments.csv
+  ├── payments.csv
+  └── fee_balances.csv   (only with --balances)
+
+Recurring fees are expanded into installments ("Monthly" → 10 payments,
+Sep–Jun), repeated for every school year of the calendar, and payments
+are drawn for the whole student × installment grid at once: on time,
+late, partial or missed. A student is billed for the years in their
+grade history, and only for installments due between enrollment_date
+and withdraw_date.
 """
 
+import numpy as np
 import pandas as pd
-import random
-import uuid
-from datetime import datetime, timedelta
 from pathlib import Path
 
+from csv_writer import write_frame
+from id_utils import short_ids
+from profiles import active_profile
+from school_calendar import EnrollmentWindows, shift_years
 
-def next_id(prefix="FEE"):
-    return f"{prefix}_{uuid.uuid4().hex[:6]}"
+
+# installments per school year for each `recurring` value; the fee amount is
+# the yearly total and is split evenly across them
+INSTALLMENTS = {"Annual": 1, "One-Time": 1, "Monthly": 10}
+
+# outcome → probability, per installment
+PAYMENT_OUTCOMES = {"on_time": 0.80, "late": 0.08, "partial": 0.05, "missed": 0.07}
+LATE_DAYS_MAX        = 45
+PARTIAL_SHARE_RANGE  = (0.25, 0.75)
+BASE_YEAR            = 2015          # school year the due_by dates below are written for
 
 
 def generate_fee_types():
@@ -33,37 +52,117 @@ def generate_fee_types():
     ])
 
 
-def generate_payments(students: pd.DataFrame, fee_types: pd.DataFrame):
-    payments = []
-
-    for _, student in students.iterrows():
-        student_id = student["student_id"]
-
-        for _, fee in fee_types.iterrows():
-            fee_id = fee["fee_type_id"]
-            amount_due = fee["amount"]
-            due_by = datetime.strptime(fee["due_by"], "%Y-%m-%d")
-
-            # Decide if the student pays (90% chance)
-            paid = random.random() < 0.9
-
-            if paid:
-                amount_paid = amount_due
-                pay_date = due_by - timedelta(days=random.randint(-5, 10))
-                date_paid = pay_date.strftime("%Y-%m-%d")
-            else:
-                amount_paid = 0
-                date_paid = ""
-
-            payments.append({
-                "payment_id": f"P_{uuid.uuid4().hex[:6]}",
-                "student_id": student_id,
-                "fee_type_id": fee_id,
-                "amount_paid": amount_paid,
-                "date_paid": date_paid
-            })
-
-    return pd.DataFrame(payments)
+def expand_installments(fee_types: pd.DataFrame, first_year: int = BASE_YEAR, years: int = 1) -> pd.DataFrame:
+    """One row per billable installment and school year: recurring fees are split across
+    the year, due dates move with it (academic_year_id 1 = the year starting in `first_year`)."""
+    counts = fee_types["recurring"].map(INSTALLMENTS).fillna(1).astype(int).to_numpy()
+    fee_idx = np.repeat(np.arange(len(fee_types)), counts)
+    k = np.arange(len(fee_idx)) - np.repeat(np.cumsum(counts) - counts, counts)   # 0..n-1 per fee
+
+    first_due = pd.to_datetime(fee_types["due_by"]).to_numpy().astype("datetime64[D]")[fee_idx]
+    month = first_due.astype("datetime64[M]") + k
+    day_offset = first_due - first_due.astype("datetime64[M]").astype("datetime64[D]")
+    month_end = (month + 1).astype("datetime64[D]") - 1
+    due = np.minimum(month.astype("datetime64[D]") + day_offset, month_end)
+
+    # split the fee total evenly; the last installment absorbs the rounding
+    total = fee_types["amount"].to_numpy(dtype=float)[fee_idx]
+    amount = np.round(total / counts[fee_idx], 2)
+    last = k == counts[fee_idx] - 1
+    amount[last] = np.round(total[last] - amount[last] * (counts[fee_idx][last] - 1), 2)
+
+    return pd.DataFrame({
+        "academic_year_id": np.repeat(np.arange(1, years + 1), len(fee_idx)),
+        "fee_type_id": np.tile(fee_types["fee_type_id"].to_numpy()[fee_idx], years),
+        "installment": np.tile(k + 1, years),
+        "due_date": shift_years(np.tile(due, years), np.repeat(np.arange(years), len(fee_idx)) + first_year - BASE_YEAR),
+        "amount_due": np.tile(amount, years),
+    })
+
+
+def generate_ledger(students: pd.DataFrame, installments: pd.DataFrame,
+                    rng: np.random.Generator | None = None, history: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Student × installment grid with amount_paid / date_paid drawn as arrays.
+
+    Each row of `history` (student_grade_history: student_id, academic_year_id;
+    default every student in year 1) gets that year's installments, kept only
+    when due inside the student's enrollment window.
+    """
+    rng = rng or np.random.default_rng()
+    if history is None:
+        history = pd.DataFrame({"student_id": students["student_id"], "academic_year_id": 1})
+    installments = installments.sort_values("academic_year_id", kind="stable", ignore_index=True)
+
+    # (history row, installment of its year) pairs
+    inst_year = installments["academic_year_id"].to_numpy(dtype=np.int64)
+    hist_year = history["academic_year_id"].to_numpy(dtype=np.int64)
+    per_year = np.bincount(inst_year, minlength=max(hist_year.max(initial=0), inst_year.max(initial=0)) + 1)
+    counts = per_year[hist_year]
+    hist_idx = np.repeat(np.arange(len(history)), counts)
+    inst_idx = (np.repeat((np.cumsum(per_year) - per_year)[hist_year], counts)
+                + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+    student_ids = history["student_id"].to_numpy()[hist_idx]
+    due = installments["due_date"].to_numpy().astype("datetime64[D]")[inst_idx]
+
+    windows = EnrollmentWindows(students)
+    enrolled = windows.contains(student_ids, due)
+    student_ids, inst_idx, due = student_ids[enrolled], inst_idx[enrolled], due[enrolled]
+    n = len(inst_idx)
+    amount_due = installments["amount_due"].to_numpy()[inst_idx]
+
+    outcome = rng.choice(len(PAYMENT_OUTCOMES), size=n, p=list(PAYMENT_OUTCOMES.values()))
+    on_time, late, partial, missed = (outcome == i for i in range(len(PAYMENT_OUTCOMES)))
+
+    offset = np.zeros(n, dtype=np.int64)
+    offset[on_time] = rng.integers(-10, 1, size=on_time.sum())          # up to 10 days early
+    offset[partial] = rng.integers(-10, 1, size=partial.sum())
+    offset[late] = rng.integers(1, LATE_DAYS_MAX + 1, size=late.sum())
+    date_paid = due + offset.astype("timedelta64[D]")
+    date_paid[missed] = np.datetime64("NaT")
+    start, end = windows.window(student_ids)                            # paid while enrolled
+    date_paid = np.minimum(np.maximum(date_paid, start), end)
+
+    paid_share = np.ones(n)
+    paid_share[partial] = rng.uniform(*PARTIAL_SHARE_RANGE, size=partial.sum())
+    paid_share[missed] = 0.0
+    amount_paid = np.round(amount_due * paid_share, 2)
+
+    return pd.DataFrame({
+        "payment_id": short_ids("P", n, rng, table="payments"),
+        "student_id": student_ids,
+        "academic_year_id": inst_year[inst_idx],
+        "fee_type_id": installments["fee_type_id"].to_numpy()[inst_idx],
+        "installment": installments["installment"].to_numpy()[inst_idx],
+        "due_date": due,
+        "amount_due": amount_due,
+        "amount_paid": amount_paid,
+        "date_paid": date_paid,
+    })
+
+
+def outstanding_balances(ledger: pd.DataFrame) -> pd.DataFrame:
+    """Per-student totals: amount due, amount paid and what is still owed."""
+    balances = ledger.groupby("student_id", sort=True)[["amount_due", "amount_paid"]].sum()
+    balances["balance"] = (balances["amount_due"] - balances["amount_paid"]).round(2)
+    return balances.round(2).reset_index()
+
+
+def generate_payments(students: pd.DataFrame, fee_types: pd.DataFrame,
+                      rng: np.random.Generator | None = None) -> pd.DataFrame:
+    """payments.csv rows (one per student × installment; missed = 0 / blank date)."""
+    ledger = generate_ledger(students, expand_installments(fee_types), rng)
+    return payments_from_ledger(ledger)
+
+
+def payments_from_ledger(ledger: pd.DataFrame) -> pd.DataFrame:
+    date_paid = np.datetime_as_string(ledger["date_paid"].to_numpy().astype("datetime64[D]"), unit="D")
+    return pd.DataFrame({
+        "payment_id": ledger["payment_id"],
+        "student_id": ledger["student_id"],
+        "fee_type_id": ledger["fee_type_id"],
+        "amount_paid": ledger["amount_paid"],
+        "date_paid": np.where(date_paid == "NaT", "", date_paid),
+    })
 
 
 def main():
@@ -72,20 +171,33 @@ def main():
     parser = argparse.ArgumentParser(description="Generate school fees and student payments.")
     parser.add_argument("--data_dir", required=True, type=Path)
     parser.add_argument("--out_dir", required=True, type=Path)
+    parser.add_argument("--balances", action="store_true",
+                        help="Also write fee_balances.csv (outstanding balance per student)")
+    parser.add_argument("--seed", type=int, default=None)
     args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
 
     print("[1/4] Loading students …")
     students = pd.read_csv(args.data_dir / "students.csv")
+    history_path = args.data_dir / "student_grade_history.csv"
+    history = pd.read_csv(history_path) if history_path.exists() else None
+    years = int(history["academic_year_id"].max()) if history is not None else 1
 
     print("[2/4] Creating fee types …")
     fee_types = generate_fee_types()
-    fee_types.to_csv(args.out_dir / "fee_types.csv", index=False)
+    write_frame(args.out_dir / "fee_types.csv", fee_types)
     print("      → fee_types.csv created")
 
     print("[3/4] Creating payments …")
-    payments = generate_payments(students, fee_types)
-    payments.to_csv(args.out_dir / "payments.csv", index=False)
-    print(f"      → {len(payments):,} payment records saved")
+    installments = expand_installments(fee_types, active_profile()["calendar"]["first_year"], years)
+    ledger = generate_ledger(students, installments, rng, history)
+    write_frame(args.out_dir / "payments.csv", payments_from_ledger(ledger))
+    print(f"      → {len(ledger):,} payment records saved")
+    if args.balances:
+        balances = outstanding_balances(ledger)
+        write_frame(args.out_dir / "fee_balances.csv", balances)
+        print(f"      → fee_balances.csv: ${balances['balance'].sum():,.2f} outstanding "
+              f"across {(balances['balance'] > 0).sum():,} students")
 
     print("[4/4] Done! Files saved to", args.out_dir.resolve())
 
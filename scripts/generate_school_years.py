@@ -1,22 +1,18 @@
-import pandas as pd
-import os
+"""
+generate_school_years.py
+Writes the school years (one row per year of the profile's calendar) to 2015/csv.
+The rows are defined in reference_data.py; `luminosity.py reference` writes
+the whole reference layer in one step.
+"""
 
-# Define output directory
-output_dir = os.path.join("2015", "csv")
-os.makedirs(output_dir, exist_ok=True)
+from reference_data import write_reference
 
-# School year entry
-school_years = [
-    {
-        "school_year_id": 1,
-        "year_label": "2015–2016",
-        "start_date": "2015-08-24",
-        "end_date": "2016-06-09"
-    }
-]
 
-# Save as CSV
-df = pd.DataFrame(school_years)
-df.to_csv(os.path.join(output_dir, "school_years.csv"), index=False)
+def main():
+    write_reference(names=["school_years"])
 
-print("✅ school_years.csv generated in '2015/csv/'")
+    print("✅ school_years.csv generated in '2015/csv/'")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,21 +5,31 @@ generate_standardized_tests.py
 Generates standardized test results for high school students.
 
 INPUT
-  └── students.csv
+  ├── students.csv
+  ├── student_grade_history.csv   # optional: grade per school year (default: `grade`, year 1)
+  └── student_traits.npy          # shared latent traits (built on first use)
 
 OUTPUT
   └── standardized_tests.csv
+
+Every school year a student attended (grade history) in grades 9-12 sits
+that grade's test, dated in that year and kept only inside the student's
+enrollment window. Eligible rows are expanded to student × subject with NumPy; section
+scores come from per-test scale models (PSAT/SAT 200–800, ACT 1–36)
+correlated with student ability, and percentiles are ranks within each
+test/subject/date score distribution.
 """
 
+from __future__ import annotations
+import numpy as np
 import pandas as pd
-import random
-import uuid
-from datetime import datetime
 from pathlib import Path
 
-
-def next_id():
-    return f"T_{uuid.uuid4().hex[:6]}"
+from csv_writer import write_frame
+from id_utils import short_ids
+from profiles import active_profile
+from school_calendar import EnrollmentWindows, shift_years
+from student_traits import load_traits, traits_for
 
 
 TEST_DEFINITIONS = {
@@ -35,37 +45,79 @@ SUBJECTS = {
     "ACT": ["Math", "Reading", "Science", "English"]
 }
 
-
-def generate_tests(students: pd.DataFrame) -> pd.DataFrame:
-    test_records = []
-
-    for _, student in students.iterrows():
-        grade = student["grade"]
-        student_id = student["student_id"]
-
-        if grade in TEST_DEFINITIONS:
-            test_name, test_date = TEST_DEFINITIONS[grade]
-
-            for subject in SUBJECTS[test_name]:
-                # Simulate a test score (out of 800 for SAT/PSAT, 36 for ACT)
-                if test_name == "ACT":
-                    score = random.randint(14, 35)
-                else:
-                    score = random.randint(300, 750)
-
-                percentile = min(99, max(1, int(random.normalvariate(50, 20))))
-
-                test_records.append({
-                    "test_id": next_id(),
-                    "student_id": student_id,
-                    "test_name": test_name,
-                    "test_date": test_date,
-                    "subject": subject,
-                    "score": score,
-                    "percentile": percentile
-                })
-
-    return pd.DataFrame(test_records)
+# per-test section scale: (min, max, mean, sd, step)
+SCALE_MODELS = {
+    "PSAT": (200, 800, 470, 100, 10),
+    "SAT":  (200, 800, 510, 105, 10),
+    "ACT":  (1, 36, 21, 5, 1),
+}
+ABILITY_CORRELATION = 0.75      # corr(section z-score, student ability)
+BASE_YEAR = 2015                # school year the test dates above are written for
+
+
+def generate_tests(students: pd.DataFrame, ability: np.ndarray | None = None,
+                   rng: np.random.Generator | None = None, history: pd.DataFrame | None = None,
+                   first_year: int = BASE_YEAR) -> pd.DataFrame:
+    """
+    One row per eligible student-year × subject. `ability` is a per-student
+    z-score aligned with `students` (drawn here when not supplied); `history`
+    holds student_grade_history rows (default: each student's `grade` in
+    year 1, the school year starting in `first_year`).
+    """
+    rng = rng or np.random.default_rng()
+    if ability is None:
+        ability = rng.standard_normal(len(students))
+    if history is None:
+        history = pd.DataFrame({"student_id": students["student_id"], "academic_year_id": 1,
+                                "grade_level_id": students["grade"]})
+
+    # 1) eligible student-years by grade mask, enrolled on their test date
+    grades = history["grade_level_id"].to_numpy()
+    hist_idx = np.flatnonzero(np.isin(grades, list(TEST_DEFINITIONS)))
+    year_shift = history["academic_year_id"].to_numpy()[hist_idx] - 1 + first_year - BASE_YEAR
+    dates = pd.Series(grades[hist_idx]).map({g: d for g, (_, d) in TEST_DEFINITIONS.items()})
+    dates = shift_years(dates.to_numpy(dtype=str), year_shift)
+    student_ids = history["student_id"].to_numpy()[hist_idx]
+    enrolled = EnrollmentWindows(students).contains(student_ids, dates)
+    hist_idx, dates = hist_idx[enrolled], dates[enrolled]
+    stu_idx = pd.Index(students["student_id"]).get_indexer(student_ids[enrolled])
+    test_of_student = pd.Series(grades[hist_idx]).map({g: t for g, (t, _) in TEST_DEFINITIONS.items()})
+    test_of_student = test_of_student.to_numpy(dtype=object)
+
+    # 2) expand to student × subject
+    subjects_per = pd.Series(test_of_student).map({t: len(s) for t, s in SUBJECTS.items()})
+    subjects_per = subjects_per.to_numpy(dtype=np.int64)
+    row_stu = np.repeat(stu_idx, subjects_per)
+    test_name = np.repeat(test_of_student, subjects_per)
+    test_date = np.datetime_as_string(np.repeat(dates, subjects_per), unit="D")
+    subject_pos = np.arange(len(row_stu)) - np.repeat(np.cumsum(subjects_per) - subjects_per, subjects_per)
+    subject = np.empty(len(row_stu), dtype=object)
+    for name, subjects in SUBJECTS.items():
+        mask = test_name == name
+        subject[mask] = np.array(subjects, dtype=object)[subject_pos[mask]]
+
+    # 3) scores: ability-correlated z on each test's scale
+    z = ABILITY_CORRELATION * ability[row_stu] \
+        + np.sqrt(1 - ABILITY_CORRELATION ** 2) * rng.standard_normal(len(row_stu))
+    score = np.zeros(len(row_stu), dtype=np.int64)
+    for name, (lo, hi, mean, sd, step) in SCALE_MODELS.items():
+        mask = test_name == name
+        raw = mean + sd * z[mask]
+        score[mask] = np.clip(np.round(raw / step) * step, lo, hi).astype(np.int64)
+
+    tests = pd.DataFrame({
+        "test_id": short_ids("T", len(row_stu), rng, table="standardized_tests"),
+        "student_id": students["student_id"].to_numpy()[row_stu],
+        "test_name": test_name,
+        "test_date": test_date.astype(object),
+        "subject": subject,
+        "score": score,
+    })
+
+    # 4) percentile = rank within the (test, subject, sitting) score distribution
+    pct = tests.groupby(["test_name", "subject", "test_date"])["score"].rank(method="average", pct=True)
+    tests["percentile"] = np.clip(np.floor(pct.to_numpy() * 100), 1, 99).astype(np.int64)
+    return tests
 
 
 def main():
@@ -74,17 +126,23 @@ def main():
     parser = argparse.ArgumentParser(description="Generate standardized test data.")
     parser.add_argument("--data_dir", required=True, type=Path)
     parser.add_argument("--out_file", required=True, type=Path)
+    parser.add_argument("--seed", type=int, default=None)
     args = parser.parse_args()
 
     print("[1/3] Loading students …")
     students = pd.read_csv(args.data_dir / "students.csv")
+    history_path = args.data_dir / "student_grade_history.csv"
+    history = pd.read_csv(history_path) if history_path.exists() else None
+    traits = load_traits(args.data_dir, students["student_id"], args.seed)
 
     print("[2/3] Generating test scores …")
-    test_data = generate_tests(students)
+    ability = traits_for(traits, students["student_id"])["ability"]
+    test_data = generate_tests(students, ability, np.random.default_rng(args.seed), history,
+                               active_profile()["calendar"]["first_year"])
     print(f"      → {len(test_data):,} test records created.")
 
     print("[3/3] Saving to file …")
-    test_data.to_csv(args.out_file, index=False)
+    write_frame(args.out_file, test_data)
     print(f"✅ Saved to {args.out_file.resolve()}")
 
 
@@ -1,142 +1,239 @@
 """
 generate_students.py
-Creates ~500 logically-consistent student records for 2015-2016.
+Creates logically-consistent student records for the school years of the
+calendar (count + mix from the active profile; "school" = 500 students, 2015-16).
 
-• 70 % only-children, 30 % siblings
-  – 37 pairs, 14 trios, 6 quads, 2 quints
-  – 4 twin sets, 2 triplet sets
+OUTPUT (to --out_dir, default 2015/csv)
+  ├── students.csv               # student_id, first_name, last_name, birthdate, gender, grade,
+  │                              # enrollment_date, withdraw_date
+  └── student_grade_history.csv  # history_id, student_id, academic_year_id, grade_level_id
+
+• family sizes in proportion to the profile's family_mix for any count
+  ("school": 70 % only-children – 350, 37 pairs, 14 trios, 6 quads, 2 quints)
+• twin / triplet sets per 1000 students share a birthdate and a grade
 • ~50 / 50 gender mix
-• 80 % grades 1-7
-• Unique family surnames from a 1 000-name US list
+• eldest child's grade from the profile's grade_weights (80 % grades 1-7),
+  younger siblings within one grade of the previous one
+• unique family surnames from the bundled 1 000-name US list, then
+  frequency-weighted repeats (see name_data.py – no network access)
+
+With calendar.years > 1 the first-year roster is advanced one summer at
+a time (profile "progression"): students withdraw, repeat their grade or
+are promoted, 12th graders graduate, and as many new students join –
+transfers into grades 2-12, the rest a new 1st-grade cohort – so the
+enrolled roster keeps its first-year size. students.csv then lists everyone who was
+enrolled in any year – `grade` is the last grade they attended,
+withdraw_date the last day of their last year (blank while enrolled) –
+and student_grade_history has one row per student and year attended.
+classes / enrollments are one timetable built from that last grade; the
+dated generators (attendance, discipline, grades) keep each student to
+the days between enrollment_date and withdraw_date.
+
+Everything is drawn as numpy arrays over all families / students at once
+(the progression loops over years only), so millions of students and
+ten-year histories take seconds; --seed makes a run reproducible.
 """
 
-import os, csv, random
+from __future__ import annotations
+import argparse
 from pathlib import Path
-from datetime import date
-from faker import Faker
+
+import numpy as np
+import pandas as pd
+
+from csv_writer import write_frame
+from name_data import load_names
+from profiles import active_profile
+from reference_data import school_year_bounds
 
 # ---------- CONFIG ----------
-YEAR              = 2015
 OUTPUT_DIR        = Path("2015/csv")
-SURNAME_FILE      = Path("utils/surnames.txt")
-NUM_STUDENTS      = 500
-
-# sibling structure
-ONLY_CHILDREN = 350
-PAIRS, TRIOS, QUADS, QUINTS = 37, 14, 6, 2
-TWIN_SETS, TRIPLET_SETS     = 4, 2
-
-# grade distribution weights
-GRADE_WEIGHTS = {
-    1:0.12, 2:0.12, 3:0.11, 4:0.10, 5:0.10, 6:0.10, 7:0.15,
-    8:0.06, 9:0.05, 10:0.04, 11:0.03, 12:0.02
-}
-
-fake = Faker()
-random.seed(42)
-Faker.seed(42)
-
-# ---------- LOAD SURNAME POOL ----------
-if not SURNAME_FILE.exists():
-    # auto-download 1000 surnames
-    import urllib.request, ssl
-    url = ("https://gist.githubusercontent.com/craigh411/"
-           "19a4479b289ae6c3f6edb95152214efc/raw/"
-           "d25a1afd3de42f10abdea7740ed098d41de3c330/"
-           "List%20of%20the%201,000%20Most%20Common%20Last%20Names%20(USA)")
-    ssl._create_default_https_context = ssl._create_unverified_context
-    text = urllib.request.urlopen(url).read().decode()
-    SURNAME_FILE.parent.mkdir(parents=True, exist_ok=True)
-    SURNAME_FILE.write_text(text)
-
-surname_pool = [n.strip().strip(",") for n in SURNAME_FILE.read_text().splitlines() if n.strip()]
-random.shuffle(surname_pool)
-
-# ---------- HELPERS ----------
-def weighted_grade():
-    return random.choices(list(GRADE_WEIGHTS), weights=GRADE_WEIGHTS.values())[0]
-
-def dob_for_grade(grade:int) -> str:
-    """Return ISO DOB so age on 1 Sep 2015 fits grade."""
-    ref = date(2015,9,1)
-    age  = random.choice([5+grade, 6+grade])  # 6-7 for 1st, etc.
-    y    = ref.year - age
-    m    = random.randint(1, 12)
-    d    = min(random.randint(1, 28), 28)     # keep safe day
-    try:
-        return date(y, m, d).isoformat()
-    except ValueError:                         # Feb 29 fallback
-        return date(y, m, 28).isoformat()
-
-# ---------- BUILD FAMILIES ----------
-families = (
-      [{"size":1} for _ in range(ONLY_CHILDREN)]
-    + [{"size":2} for _ in range(PAIRS)]
-    + [{"size":3} for _ in range(TRIOS)]
-    + [{"size":4} for _ in range(QUADS)]
-    + [{"size":5} for _ in range(QUINTS)]
-)
-random.shuffle(families)
-
-# assign unique surnames
-for fam in families:
-    fam["surname"] = surname_pool.pop()
-
-# mark twins / triplets
-tw, tri = 0, 0
-for fam in families:
-    if fam["size"]>=2 and tw< TWIN_SETS:
-        fam["twin_idx"]=[0,1]; tw+=1
-    if fam["size"]>=3 and tri<TRIPLET_SETS:
-        fam["trip_idx"]=[0,1,2]; tri+=1
-    if tw>=TWIN_SETS and tri>=TRIPLET_SETS: break
-
-# ---------- GENERATE STUDENTS ----------
-students, grades = [], []
-student_id = 1
-for fam in families:
-    base_grade = weighted_grade()
-    for i in range(fam["size"]):
-        gender = "M" if student_id%2==0 else "F"
-        first  = fake.first_name_male() if gender=="M" else fake.first_name_female()
-        last   = fam["surname"]
-
-        # share DOBs for twins/triplets
-        if "twin_idx" in fam and i in fam["twin_idx"]:
-            fam.setdefault("twin_dob", dob_for_grade(base_grade))
-            dob = fam["twin_dob"]
-        elif "trip_idx" in fam and i in fam["trip_idx"]:
-            fam.setdefault("trip_dob", dob_for_grade(base_grade))
-            dob = fam["trip_dob"]
+MIN_GRADE, MAX_GRADE = 1, 12
+MALE_SHARE        = 0.5
+
+
+# ---------- FAMILIES ----------
+def family_counts(num_students: int, family_mix: dict[int, float]) -> dict[int, int]:
+    """Families per size so the sizes add up to exactly `num_students`."""
+    total = sum(family_mix.values())
+    counts = {size: round(num_students * share / total) // size
+              for size, share in family_mix.items() if size > 1}
+    counts[1] = num_students - sum(size * n for size, n in counts.items())
+    return counts
+
+
+def family_sizes(num_students: int, family_mix: dict[int, float], rng: np.random.Generator) -> np.ndarray:
+    """Size of every family, shuffled."""
+    counts = family_counts(num_students, family_mix)
+    sizes = np.repeat(np.array(list(counts), dtype=np.int64), list(counts.values()))
+    rng.shuffle(sizes)
+    return sizes
+
+
+def multiple_births(sizes: np.ndarray, twin_sets: int, triplet_sets: int) -> np.ndarray:
+    """Per family: how many of its eldest children are twins / triplets (0, 2 or 3)."""
+    births = np.zeros(len(sizes), dtype=np.int64)
+    triplets = sizes >= 3
+    triplets &= np.cumsum(triplets) <= triplet_sets
+    births[triplets] = 3
+    twins = (sizes >= 2) & ~triplets
+    twins &= np.cumsum(twins) <= twin_sets
+    births[twins] = 2
+    return births
+
+
+# ---------- STUDENTS ----------
+def birthdates(grades: np.ndarray, first_year: int, rng: np.random.Generator) -> np.ndarray:
+    """datetime64[D] birthdates so the age on 1 Sep `first_year` fits each grade (6-7 for 1st, …)."""
+    n = len(grades)
+    age = 5 + grades + rng.integers(0, 2, n)
+    months = (first_year - age - 1970) * 12 + rng.integers(0, 12, n)
+    return months.astype("datetime64[M]").astype("datetime64[D]") + rng.integers(0, 28, n)
+
+
+def build_population(num_students: int, cfg: dict, first_year: int, rng: np.random.Generator,
+                     names: dict | None = None) -> pd.DataFrame:
+    """students.csv frame (plus its grade) for `num_students`, following the profile's students section."""
+    names = load_names() if names is None else names
+    sizes = family_sizes(num_students, {int(k): v for k, v in cfg["family_mix"].items()}, rng)
+    births = multiple_births(sizes,
+                             round(cfg["twin_sets_per_1000"] * num_students / 1000),
+                             round(cfg["triplet_sets_per_1000"] * num_students / 1000))
+
+    # student → family, position among its siblings (0 = eldest)
+    family = np.repeat(np.arange(len(sizes)), sizes)
+    first = np.cumsum(sizes) - sizes
+    pos = np.arange(num_students) - first[family]
+    multiple = pos < births[family]                   # eldest 2 / 3 born together
+
+    # grades: eldest from the weights, each later sibling ±1 of the previous (not within a multiple birth)
+    grade_weights = {int(g): w for g, w in cfg["grade_weights"].items()}
+    weights = np.array(list(grade_weights.values()), dtype=np.float64)
+    base = rng.choice(np.array(list(grade_weights)), size=len(sizes), p=weights / weights.sum())
+    step = rng.integers(-1, 2, num_students)
+    step[(pos == 0) | multiple] = 0
+    walk = np.cumsum(step)
+    grades = np.clip(base[family] + walk - walk[first][family], MIN_GRADE, MAX_GRADE)
+
+    # birthdates: one per student, shared by the members of a multiple birth
+    dob = birthdates(grades, first_year, rng)
+    dob[multiple] = dob[first[family[multiple]]]
+
+    male = rng.random(num_students) < MALE_SHARE
+    first_names = np.empty(num_students, dtype=object)
+    for flag, list_name in ((True, "first_names_male"), (False, "first_names_female")):
+        pick = male == flag
+        first_names[pick] = names[list_name].names_at(names[list_name].draw(rng, int(pick.sum())))
+
+    # surnames – unique per family while the bundled list lasts, then weighted repeats
+    surnames = names["surnames"]
+    unique = min(len(sizes), len(surnames))
+    family_names = np.concatenate([surnames.draw_unique(rng, unique), surnames.draw(rng, len(sizes) - unique)])
+
+    return pd.DataFrame({
+        "student_id": np.arange(1, num_students + 1),
+        "first_name": first_names,
+        "last_name":  surnames.names_at(family_names)[family],
+        "birthdate":  dob,
+        "gender":     np.where(male, "M", "F"),
+        "grade":      grades,
+    })
+
+
+# ---------- PROGRESSION ----------
+def progress_cohorts(students: pd.DataFrame, cfg: dict, progression: dict, first_year: int, years: int,
+                     rng: np.random.Generator, names: dict | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Advance the first-year roster through `years` school years → (students, grade history).
+
+    Per student the arrays keep the year index it entered, the one it left
+    after (-1 while enrolled) and its latest grade; every summer is one
+    vectorized transition over the enrolled students. The summer's leavers
+    (withdrawals + graduates) are replaced one for one: transfers drawn at
+    transfer_in_rate (capped at the leavers), the rest 1st graders.
+    """
+    names = load_names() if names is None else names
+    weights = {int(g): w for g, w in cfg["grade_weights"].items()}
+    total = sum(weights.values())
+    upper = {g: w for g, w in weights.items() if g > MIN_GRADE and w > 0}
+
+    frames = [students]
+    entered = np.zeros(len(students), dtype=np.int64)
+    left = np.full(len(students), -1, dtype=np.int64)
+    grade = students["grade"].to_numpy(dtype=np.int64).copy()
+    history = [(students["student_id"].to_numpy(), np.zeros(len(students), dtype=np.int64), grade.copy())]
+
+    for year in range(1, years):
+        enrolled = np.flatnonzero(left < 0)
+        u = rng.random(len(enrolled))
+        withdraw = u < progression["withdrawal_rate"]
+        repeat = ~withdraw & (u < progression["withdrawal_rate"] + progression["retention_rate"])
+        next_grade = grade[enrolled] + ~repeat
+        graduate = ~withdraw & (next_grade > MAX_GRADE)
+        left[enrolled[withdraw | graduate]] = year - 1
+        stay = ~withdraw & ~graduate
+        grade[enrolled[stay]] = next_grade[stay]
+
+        intake = int((withdraw | graduate).sum())
+        if not weights.get(MIN_GRADE, 0) / total:
+            transfers = intake if upper else 0
         else:
-            dob = dob_for_grade(base_grade)
-
-        students.append({
-            "student_id": student_id,
-            "first_name": first,
-            "last_name":  last,
-            "birthdate":  dob,
-            "gender":     gender
-        })
-
-        grades.append({
-            "student_id": student_id,
-            "academic_year_id": 1,
-            "grade_level_id":   base_grade
-        })
-
-        # next sibling +/- one grade (except twins/triplets)
-        if i==0: next_grade = base_grade
-        else:    next_grade = max(1, min(12, base_grade + random.choice([-1,0,1])))
-        base_grade = next_grade
-        student_id +=1
-
-# ---------- SAVE CSVs ----------
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-with open(OUTPUT_DIR/"students.csv","w",newline="") as f:
-    csv.DictWriter(f,fieldnames=students[0]).writeheader(); csv.writer(f).writerows([s.values() for s in students])
-
-with open(OUTPUT_DIR/"student_grade_history.csv","w",newline="") as f:
-    csv.DictWriter(f,fieldnames=grades[0]).writeheader(); csv.writer(f).writerows([g.values() for g in grades])
-
-print(f"✅ Generated {len(students)} students (M/F ~50 / 50)")
+            transfers = min(rng.binomial(int(stay.sum()), progression["transfer_in_rate"]), intake) if upper else 0
+        first_graders = intake - transfers
+        if intake:
+            mix = {str(MIN_GRADE): first_graders, **{str(g): transfers * w / sum(upper.values()) for g, w in upper.items()}}
+            new = build_population(intake, {**cfg, "grade_weights": mix}, first_year + year, rng, names)
+            new["student_id"] += sum(len(f) for f in frames)
+            frames.append(new)
+            entered = np.concatenate([entered, np.full(intake, year)])
+            left = np.concatenate([left, np.full(intake, -1)])
+            grade = np.concatenate([grade, new["grade"].to_numpy(dtype=np.int64)])
+
+        now = np.flatnonzero(left < 0)
+        history.append((now + 1, np.full(len(now), year), grade[now]))
+
+    starts, ends = zip(*(school_year_bounds(y) for y in range(first_year, first_year + years)))
+    starts = np.array(starts, dtype="datetime64[D]")
+    ends = np.array(list(ends) + [None], dtype="datetime64[D]")            # [-1] → NaT while enrolled
+    students = pd.concat(frames, ignore_index=True)
+    students["grade"] = grade
+    students["enrollment_date"] = starts[entered]
+    students["withdraw_date"] = ends[left]
+
+    ids, year_idx, grades = (np.concatenate(parts) for parts in zip(*history))
+    return students, pd.DataFrame({
+        "history_id":       np.arange(1, len(ids) + 1),
+        "student_id":       ids,
+        "academic_year_id": year_idx + 1,
+        "grade_level_id":   grades,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate students.csv and student_grade_history.csv.")
+    parser.add_argument("--out_dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    profile = active_profile()
+    rng = np.random.default_rng(args.seed)
+
+    cal = profile["calendar"]
+    names = load_names()
+
+    students = build_population(profile["students"]["count"], profile["students"], cal["first_year"], rng, names)
+    students, history = progress_cohorts(students, profile["students"], profile["progression"],
+                                         cal["first_year"], cal["years"], rng, names)
+
+    # ---------- SAVE CSVs ----------
+    write_frame(args.out_dir / "students.csv", students)
+    write_frame(args.out_dir / "student_grade_history.csv", history)
+
+    share = (students["gender"] == "M").mean() * 100
+    print(f"✅ Generated {len(students):,} students (M/F ~{share:.0f} / {100 - share:.0f})")
+    if cal["years"] > 1:
+        print(f"      → {cal['years']} school years, {len(history):,} history rows, "
+              f"{students['withdraw_date'].isna().sum():,} enrolled in the last year")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 """
 generate_teachers_classrooms.py
 —————————————
-• 18 classrooms (room_number, capacity, special_use flag)
-• ~48 teachers broken down per staffing plan
+• classrooms (room_number, capacity, special_use flag)
+• teachers broken down per staffing plan, scaled with the student count
+  of the active profile (profiles.py); for "school" (500 students):
+  – 18 classrooms
   – 28 elementary homeroom
   –  7 secondary core (Math, Eng, Sci, SocSt, CompSci, Econ)
   –  6 specials (Art, Music, PE, Health, Spanish, French)
@@ -11,18 +13,18 @@ generate_teachers_classrooms.py
 • teacher_subjects.csv maps each teacher to 1–3 subjects
 """
 
-import csv, os, random
+import argparse, csv, os, random
 from pathlib import Path
 from datetime import date, timedelta
 from faker import Faker
 
+from profiles import active_profile, scaled
+from staging import staged_text
+
 fake = Faker()
-random.seed(42)
-Faker.seed(42)
 
 YEAR          = 2015
 OUT_DIR       = Path(f"{YEAR}/csv")
-OUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # ------------ SUBJECT & DEPARTMENT REFS -----------------
 # These IDs should match your subjects.csv / departments.csv
@@ -46,98 +48,119 @@ SUBJECTS = {
     "Counseling"      : 504,
 }
 
-# ------------ CLASSROOMS --------------------------------
-classrooms = []
-for i in range(1, 19):                     # Rooms 101-118
-    classrooms.append({
-        "classroom_id": i,
-        "room_number": f"{100+i}",
-        "capacity": random.randint(25, 30),
-        "floor": 1 if i<=9 else 2,
-        "building": "Main",
-        "is_special_use": (i in (3, 7, 12, 16))  # mark a few special rooms
-    })
-
-# ------------ TEACHERS ----------------------------------
-teachers      = []
-teacher_subj  = []
-tid           = 1
-hire_start    = date(YEAR-20, 8, 1)
-
-def add_teacher(role:str, subj_keys:list[str], is_floater=False):
-    global tid
-    teachers.append({
-        "teacher_id":     tid,
-        "first_name":     fake.first_name(),
-        "last_name":      fake.last_name(),
-        "birthdate":      fake.date_of_birth(minimum_age=25, maximum_age=62),
-        "hire_date":      fake.date_between(hire_start, date(YEAR, 8, 1)),
-        "department_id":  1,         # simplify: use dept 1 for all
-        "is_floater":     is_floater,
-        "role_label":     role
-    })
-    # subject links
-    for key in subj_keys:
-        teacher_subj.append({
-            "teacher_id": tid,
-            "subject_id": SUBJECTS[key]
+def main():
+    parser = argparse.ArgumentParser(description="Generate classrooms, teachers and teacher_subjects.")
+    parser.add_argument("--out_dir", type=Path, default=OUT_DIR)
+    out_dir = parser.parse_args().out_dir
+
+    random.seed(42)
+    Faker.seed(42)
+    profile = active_profile()
+    staff = profile["staffing"]
+    students = profile["students"]["count"]
+    plan = {key: scaled(staff[f"{key}_per_1000"], students)
+            for key in ("classrooms", "homeroom", "core", "specials", "support", "floaters")}
+
+    # ------------ CLASSROOMS --------------------------------
+    classrooms = []
+    for i in range(1, plan["classrooms"] + 1):  # Rooms 101, 102, …
+        classrooms.append({
+            "classroom_id": i,
+            "room_number": f"{100+i}",
+            "capacity": random.randint(25, 30),
+            "floor": (i - 1) // 9 + 1,
+            "building": "Main",
+            "is_special_use": ((i - 1) % 18 + 1 in (3, 7, 12, 16))  # mark a few special rooms
+        })
+
+    # ------------ TEACHERS ----------------------------------
+    teachers      = []
+    teacher_subj  = []
+    tid           = 1
+    hire_start    = date(YEAR-20, 8, 1)
+
+    def add_teacher(role:str, subj_keys:list[str], is_floater=False):
+        nonlocal tid
+        teachers.append({
+            "teacher_id":     tid,
+            "first_name":     fake.first_name(),
+            "last_name":      fake.last_name(),
+            "birthdate":      fake.date_of_birth(minimum_age=25, maximum_age=62),
+            "hire_date":      fake.date_between(hire_start, date(YEAR, 8, 1)),
+            "department_id":  1,         # simplify: use dept 1 for all
+            "is_floater":     is_floater,
+            "role_label":     role
         })
-    tid += 1
-
-# 28 elementary homeroom teachers (teach “Elementary Core”)
-for _ in range(28):
-    add_teacher("Elementary Homeroom", ["Elementary Core"])
-
-# 7 secondary core teachers
-core_map = [
-    ("Math Teacher",   ["Math"]),
-    ("English Teacher",["English"]),
-    ("Science Teacher",["Science"]),
-    ("SocSt Teacher",  ["Social Studies"]),
-    ("CompSci Teacher",["Computer Science"]),
-    ("Economics Teacher",["Economics"]),
-    ("Integrated Sci/Math",["Science","Math"])
-]
-for role, subs in core_map:
-    add_teacher(role, subs)
-
-# 6 specials teachers
-specials_map = [
-    ("Art Teacher",      ["Art"]),
-    ("Music Teacher",    ["Music"]),
-    ("PE Teacher",       ["PE","Health"]),
-    ("Spanish Teacher",  ["Spanish"]),
-    ("French Teacher",   ["French"]),
-    ("Health Teacher",   ["Health"])
-]
-for role, subs in specials_map:
-    add_teacher(role, subs)
-
-# 4 support
-support_map = [
-    ("Reading Specialist",["Reading Support"]),
-    ("ESL Specialist",    ["ESL"]),
-    ("Special-Ed Teacher",["Special Ed"]),
-    ("School Counselor",  ["Counseling"])
-]
-for role, subs in support_map:
-    add_teacher(role, subs)
-
-# 2 floaters (no primary subjects)
-for _ in range(2):
-    add_teacher("Floater", [], is_floater=True)
-
-# ------------ SAVE CSVs ---------------------------------
-with open(OUT_DIR/"classrooms.csv","w",newline="") as f:
-    csv.DictWriter(f,fieldnames=classrooms[0]).writeheader()
-    csv.writer(f).writerows([c.values() for c in classrooms])
-
-with open(OUT_DIR/"teachers.csv","w",newline="") as f:
-    csv.DictWriter(f,fieldnames=teachers[0]).writeheader()
-    csv.writer(f).writerows([t.values() for t in teachers])
-
-with open(OUT_DIR/"teacher_subjects.csv","w",newline="") as f:
-    csv.DictWriter(f,fieldnames=teacher_subj[0]).writeheader()
-    csv.writer(f).writerows([ts.values() for ts in teacher_subj])
-
-print(f"✅ Created {len(teachers)} teachers, {len(classrooms)} classrooms, {len(teacher_subj)} teacher-subject links")
+        # subject links
+        for key in subj_keys:
+            teacher_subj.append({
+                "teacher_id": tid,
+                "subject_id": SUBJECTS[key]
+            })
+        tid += 1
+
+    # elementary homeroom teachers (teach “Elementary Core”)
+    for _ in range(plan["homeroom"]):
+        add_teacher("Elementary Homeroom", ["Elementary Core"])
+
+    # secondary core teachers (roles repeat when the plan needs more)
+    core_map = [
+        ("Math Teacher",   ["Math"]),
+        ("English Teacher",["English"]),
+        ("Science Teacher",["Science"]),
+        ("SocSt Teacher",  ["Social Studies"]),
+        ("CompSci Teacher",["Computer Science"]),
+        ("Economics Teacher",["Economics"]),
+        ("Integrated Sci/Math",["Science","Math"])
+    ]
+    for i in range(plan["core"]):
+        role, subs = core_map[i % len(core_map)]
+        add_teacher(role, subs)
+
+    # specials teachers
+    specials_map = [
+        ("Art Teacher",      ["Art"]),
+        ("Music Teacher",    ["Music"]),
+        ("PE Teacher",       ["PE","Health"]),
+        ("Spanish Teacher",  ["Spanish"]),
+        ("French Teacher",   ["French"]),
+        ("Health Teacher",   ["Health"])
+    ]
+    for i in range(plan["specials"]):
+        role, subs = specials_map[i % len(specials_map)]
+        add_teacher(role, subs)
+
+    # support
+    support_map = [
+        ("Reading Specialist",["Reading Support"]),
+        ("ESL Specialist",    ["ESL"]),
+        ("Special-Ed Teacher",["Special Ed"]),
+        ("School Counselor",  ["Counseling"])
+    ]
+    for i in range(plan["support"]):
+        role, subs = support_map[i % len(support_map)]
+        add_teacher(role, subs)
+
+    # floaters (no primary subjects)
+    for _ in range(plan["floaters"]):
+        add_teacher("Floater", [], is_floater=True)
+
+    # ------------ SAVE CSVs ---------------------------------
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with staged_text(out_dir/"classrooms.csv") as f:
+        csv.DictWriter(f,fieldnames=classrooms[0]).writeheader()
+        csv.writer(f).writerows([c.values() for c in classrooms])
+
+    with staged_text(out_dir/"teachers.csv") as f:
+        csv.DictWriter(f,fieldnames=teachers[0]).writeheader()
+        csv.writer(f).writerows([t.values() for t in teachers])
+
+    with staged_text(out_dir/"teacher_subjects.csv") as f:
+        csv.DictWriter(f,fieldnames=teacher_subj[0]).writeheader()
+        csv.writer(f).writerows([ts.values() for ts in teacher_subj])
+
+    print(f"✅ Created {len(teachers)} teachers, {len(classrooms)} classrooms, {len(teacher_subj)} teacher-subject links")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,18 @@
-import pandas as pd
-import os
+"""
+generate_terms.py
+Writes the terms (four quarters per school year of the profile's calendar) to 2015/csv.
+The rows are defined in reference_data.py; `luminosity.py reference` writes
+the whole reference layer in one step.
+"""
 
-# Output directory
-output_dir = os.path.join("2015", "csv")
-os.makedirs(output_dir, exist_ok=True)
+from reference_data import write_reference
 
-# Terms for 2015–2016 school year
-terms = [
-    {"term_id": 1, "school_year_id": 1, "name": "Q1 2015", "start_date": "2015-08-24", "end_date": "2015-10-30"},
-    {"term_id": 2, "school_year_id": 1, "name": "Q2 2015", "start_date": "2015-11-02", "end_date": "2016-01-15"},
-    {"term_id": 3, "school_year_id": 1, "name": "Q3 2016", "start_date": "2016-01-19", "end_date": "2016-03-25"},
-    {"term_id": 4, "school_year_id": 1, "name": "Q4 2016", "start_date": "2016-03-28", "end_date": "2016-06-09"},
-]
 
-# Save as CSV
-df = pd.DataFrame(terms)
-df.to_csv(os.path.join(output_dir, "terms.csv"), index=False)
+def main():
+    write_reference(names=["terms"])
 
-print("✅ terms.csv generated in '2015/csv/'")
+    print("✅ terms.csv generated in '2015/csv/'")
+
+
+if __name__ == "__main__":
+    main()
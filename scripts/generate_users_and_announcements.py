@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+generate_users_and_announcements.py
+-----------------------------------
+Creates portal accounts for the existing people and the class / school
+feed posts they read.
+
+INPUT (in --data_dir)
+  ├── students.csv, guardians.csv, teachers.csv
+  ├── student_grade_history.csv   # current grade, when students.csv has none
+  ├── classes.csv
+  ├── terms.csv
+  └── school_calendar.csv
+
+OUTPUT (in --out_dir)
+  ├── users.csv           (optionally .csv.gz / .zst / .lz4, see --compression)
+  └── announcements.csv   (same)
+
+Accounts: every teacher, students from portal.student_account_min_grade
+up, a portal.guardian_account_rate share of guardians, and a handful of
+admins (portal.admins_per_1000). `person_id` points back to the
+student / guardian / teacher row; usernames are unique across roles.
+
+Announcements: each class gets a Poisson number of posts per school week
+(portal.class_announcements_per_week) by its teacher, and the admins post
+school-wide ones (class_id blank). Both tables are built in chunks and
+streamed through the background writer.
+"""
+
+from __future__ import annotations
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from csv_writer import COMPRESSION_CHOICES, write_chunks
+from id_utils import IdSequence
+from profiles import active_profile, scaled
+from school_calendar import SchoolCalendar, load_terms
+
+CHUNK_ROWS      = 100_000      # people per users chunk
+CHUNK_CLASSES   = 2_000        # classes per announcements chunk
+SCHOOL_DOMAIN   = "luminosity.edu"
+GUARDIAN_DOMAINS = np.array(["gmail.com", "yahoo.com", "outlook.com", "icloud.com", "aol.com"])
+SIGNUP_DAYS     = 90           # accounts are created in the summer before the first school day
+DISABLED_PROB   = 0.02
+POST_HOURS      = (7, 17)      # announcements are posted during the school day
+LOGIN_HOURS     = (6, 23)
+
+# role → P(logged in during the last 30 days), scaled from portal.active_last_30_days
+ROLE_ACTIVITY = {"admin": 1.0, "teacher": 1.25, "student": 1.1, "guardian": 0.85}
+
+CLASS_POSTS = [
+    ("Homework reminder", "Don't forget tonight's homework – it is due at the start of next class."),
+    ("Quiz on Friday", "We will have a short quiz on Friday covering this week's material."),
+    ("Project update", "Project checkpoints are due next week. Bring your notes to class."),
+    ("Test next week", "Our unit test is next week. Review sessions are during lunch on Wednesday."),
+    ("Materials needed", "Please bring the materials listed on the syllabus to our next class."),
+    ("Great work", "Great work this week, everyone – keep it up!"),
+    ("Schedule change", "We are meeting in a different room tomorrow; check the door for directions."),
+]
+SCHOOL_POSTS = [
+    ("Picture day", "School picture day is coming up. Order forms are available in the front office."),
+    ("Early dismissal", "Students will be dismissed early on Friday for staff development."),
+    ("Parent-teacher conferences", "Sign-ups for parent-teacher conferences are now open in the portal."),
+    ("Lunch menu", "Next week's lunch menu has been posted."),
+    ("Spirit week", "Spirit week starts Monday – see the daily themes on the bulletin board."),
+    ("Weather closure policy", "In case of severe weather, closures will be announced here by 6 AM."),
+    ("Book fair", "The book fair is in the library all week during lunch and after school."),
+]
+
+
+def load_data(data_dir: Path):
+    students = pd.read_csv(data_dir / "students.csv")
+    if "grade" not in students:         # the current grade is only in student_grade_history
+        history = pd.read_csv(data_dir / "student_grade_history.csv")
+        latest = history.sort_values("academic_year_id").drop_duplicates("student_id", keep="last")
+        students = students.merge(latest[["student_id", "grade_level_id"]], on="student_id", how="left") \
+                           .rename(columns={"grade_level_id": "grade"})
+    guardians = pd.read_csv(data_dir / "guardians.csv")
+    teachers = pd.read_csv(data_dir / "teachers.csv")
+    classes = pd.read_csv(data_dir / "classes.csv")
+    terms = load_terms(data_dir / "terms.csv")
+    calendar = SchoolCalendar.from_csv(data_dir / "school_calendar.csv")
+    return students, guardians, teachers, classes, terms, calendar
+
+
+# ── users ─────────────────────────────────────────────────────────────
+
+def _slug(names: pd.Series) -> np.ndarray:
+    """Lower-case letters only; computed once per distinct name."""
+    codes, uniques = pd.factorize(names.astype(str))
+    slugs = pd.Series(uniques).str.lower().str.replace(r"[^a-z]", "", regex=True).to_numpy(dtype=object)
+    return slugs[codes]
+
+
+class Usernames:
+    """Unique usernames across chunks: a running count per base name → jsmith, jsmith2, …"""
+
+    def __init__(self):
+        self._seen = pd.Series(dtype="int64")
+
+    def assign(self, base: pd.Series) -> pd.Series:
+        base = base.reset_index(drop=True)
+        n = base.groupby(base).cumcount() + base.map(self._seen).fillna(0).astype("int64")
+        counts = base.value_counts()
+        self._seen = self._seen.add(counts, fill_value=0).astype("int64")
+        # bases are letters only, so a numeric suffix can never recreate another base
+        return base.where(n == 0, base + (n + 1).astype(str))
+
+
+def _datetimes(rng: np.random.Generator, days: np.ndarray, hours: tuple[int, int]) -> np.ndarray:
+    """A random time between `hours` on each day (datetime64[s]; to_csv writes "YYYY-MM-DD HH:MM:SS")."""
+    seconds = rng.integers(hours[0] * 3600, hours[1] * 3600, size=len(days))
+    return days.astype("datetime64[s]") + seconds.astype("timedelta64[s]")
+
+
+def _accounts(role: str, person_id, base: pd.Series, domain, usernames: Usernames, ids: IdSequence,
+              school_days: np.ndarray, activity: float, rng: np.random.Generator) -> pd.DataFrame:
+    n = len(base)
+    username = usernames.assign(base)
+    created = school_days[0] - rng.integers(1, SIGNUP_DAYS + 1, size=n).astype("timedelta64[D]")
+
+    recent = school_days[-30:] if len(school_days) else school_days
+    active = rng.random(n) < min(activity, 1.0)
+    last_login = np.full(n, np.datetime64("NaT"), dtype="datetime64[s]")
+    if active.any() and len(recent):
+        last_login[active] = _datetimes(rng, rng.choice(recent, size=int(active.sum())), LOGIN_HOURS)
+
+    return pd.DataFrame({
+        "user_id": ids.take(n),
+        "username": username,
+        "email": username + "@" + pd.Series(np.broadcast_to(domain, n)),
+        "role": role,
+        "person_id": person_id,
+        "created_on": np.datetime_as_string(created, unit="D"),
+        "last_login": last_login,
+        "is_active": rng.random(n) >= DISABLED_PROB,
+    })
+
+
+def generate_users_chunks(students: pd.DataFrame, guardians: pd.DataFrame, teachers: pd.DataFrame,
+                          school_days: np.ndarray, cfg: dict, rng: np.random.Generator | None = None,
+                          chunk_rows: int = CHUNK_ROWS, accounts: dict | None = None):
+    """Yield users DataFrames: admins, teachers, then students and guardians in chunks.
+
+    `accounts`, if given, is filled with {"teacher": {"<teacher_id>": user_id}, "admin": [user_id, …]}
+    for the announcement authors.
+    """
+    rng = rng or np.random.default_rng()
+    accounts = accounts if accounts is not None else {}
+    n_admins = scaled(cfg["admins_per_1000"], len(students))
+    students = students[students["grade"] >= cfg["student_account_min_grade"]]
+    guardians = guardians[rng.random(len(guardians)) < cfg["guardian_account_rate"]]
+    ids = IdSequence("U", n_admins + len(teachers) + len(students) + len(guardians), rng, table="users")
+    usernames = Usernames()
+    activity = {role: cfg["active_last_30_days"] * k for role, k in ROLE_ACTIVITY.items()}
+
+    admins = _accounts("admin", "", pd.Series(["admin"] * n_admins), SCHOOL_DOMAIN, usernames, ids,
+                       school_days, activity["admin"], rng)
+    accounts["admin"] = admins["user_id"].tolist()
+    yield admins
+
+    for start in range(0, len(teachers), chunk_rows):
+        chunk = teachers.iloc[start:start + chunk_rows]
+        base = pd.Series(_slug(chunk["first_name"].astype(str).str[0]) + _slug(chunk["last_name"]))
+        frame = _accounts("teacher", chunk["teacher_id"].to_numpy(), base, SCHOOL_DOMAIN, usernames, ids,
+                          school_days, activity["teacher"], rng)
+        accounts.setdefault("teacher", {}).update(zip(chunk["teacher_id"].astype(str), frame["user_id"]))
+        yield frame
+
+    for start in range(0, len(students), chunk_rows):
+        chunk = students.iloc[start:start + chunk_rows]
+        base = pd.Series(_slug(chunk["first_name"]) + "." + _slug(chunk["last_name"]))
+        yield _accounts("student", chunk["student_id"].to_numpy(), base, f"students.{SCHOOL_DOMAIN}",
+                        usernames, ids, school_days, activity["student"], rng)
+
+    for start in range(0, len(guardians), chunk_rows):
+        chunk = guardians.iloc[start:start + chunk_rows]
+        base = pd.Series(_slug(chunk["first_name"]) + _slug(chunk["last_name"]))
+        domains = GUARDIAN_DOMAINS[rng.integers(len(GUARDIAN_DOMAINS), size=len(chunk))]
+        yield _accounts("guardian", chunk["guardian_id"].to_numpy(), base, domains, usernames, ids,
+                        school_days, activity["guardian"], rng)
+
+
+# ── announcements ─────────────────────────────────────────────────────
+
+def _weeks(school_days: np.ndarray) -> np.ndarray:
+    """Monday of every school week."""
+    d = school_days.astype(np.int64)
+    return np.unique(d - (d + 3) % 7)
+
+
+def generate_announcements_chunks(classes: pd.DataFrame, school_days: np.ndarray, calendar: SchoolCalendar,
+                                  terms: list[dict], accounts: dict, cfg: dict,
+                                  rng: np.random.Generator | None = None,
+                                  chunk_classes: int = CHUNK_CLASSES):
+    """Yield announcements DataFrames: class posts per class shard, then the school-wide posts."""
+    rng = rng or np.random.default_rng()
+    if not len(school_days):
+        return
+    n_weeks = len(_weeks(school_days))
+    class_rate = cfg["class_announcements_per_week"] * n_weeks
+    school_rate = cfg["school_announcements_per_week"] * n_weeks
+    ids = IdSequence("N", int(len(classes) * class_rate * 1.5 + school_rate * 1.5) + 100, rng, table="announcements")
+    teacher_user = accounts.get("teacher", {})
+    admins = np.array(accounts.get("admin", []) or [""], dtype=object)
+
+    # titles are "<subject>: <kind>", looked up by (subject code, kind) instead of built per row
+    subject_code, subjects = pd.factorize(classes["subject"].astype(str))
+    class_titles = np.array([f"{subj}: {kind}" for subj in subjects for kind, _ in CLASS_POSTS], dtype=object)
+    class_bodies = np.array([body for _, body in CLASS_POSTS], dtype=object)
+
+    def frame(class_id, posted_by, days, titles, bodies, audience):
+        posted_at = _datetimes(rng, days, POST_HOURS)
+        order = np.argsort(posted_at, kind="stable")
+        term = calendar.term_of(days[order], terms)
+        return pd.DataFrame({
+            "announcement_id": ids.take(len(days)),
+            "class_id": class_id[order],
+            "term_id": pd.arrays.IntegerArray(term.astype(np.int64), term < 0),   # blank outside every term
+            "posted_by": posted_by[order],
+            "posted_at": posted_at[order],
+            "audience": audience,
+            "title": titles[order],
+            "body": bodies[order],
+        })
+
+    for start in range(0, len(classes), chunk_classes):
+        chunk = classes.iloc[start:start + chunk_classes]
+        counts = rng.poisson(class_rate, size=len(chunk))
+        if not counts.sum():
+            continue
+        rows = np.repeat(np.arange(len(chunk)), counts)
+        kind = rng.integers(len(CLASS_POSTS), size=len(rows))
+        # classes without a (known) teacher, e.g. UNASSIGNED sections, post as an admin
+        authors = chunk["teacher_id"].astype(str).map(teacher_user).to_numpy(dtype=object)
+        missing = pd.isna(authors)
+        authors[missing] = rng.choice(admins, size=int(missing.sum()))
+        titles = class_titles[subject_code[start:start + chunk_classes][rows] * len(CLASS_POSTS) + kind]
+        yield frame(chunk["class_id"].to_numpy()[rows], authors[rows], rng.choice(school_days, size=len(rows)),
+                    titles, class_bodies[kind], "class")
+
+    n = int(rng.poisson(school_rate))
+    if n and accounts.get("admin"):
+        kind = rng.integers(len(SCHOOL_POSTS), size=n)
+        titles = np.array([t for t, _ in SCHOOL_POSTS], dtype=object)[kind]
+        bodies = np.array([b for _, b in SCHOOL_POSTS], dtype=object)[kind]
+        yield frame(np.full(n, "", dtype=object), rng.choice(admins, size=n), rng.choice(school_days, size=n),
+                    titles, bodies, "school")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate portal users and announcements.")
+    parser.add_argument("--data_dir", required=True, type=Path)
+    parser.add_argument("--out_dir", default=None, type=Path, help="defaults to data_dir")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--compression", choices=COMPRESSION_CHOICES, default=None,
+                        help="Compress the output (adds .gz / .zst / .lz4; auto = best installed)")
+    args = parser.parse_args()
+    out_dir = args.out_dir or args.data_dir
+    cfg = active_profile()["portal"]
+    rng = np.random.default_rng(args.seed)
+
+    print("[1/3] Loading people, classes and calendar …")
+    students, guardians, teachers, classes, terms, calendar = load_data(args.data_dir)
+    school_days = calendar.school_days()
+
+    print("[2/3] Generating users (streaming to file) …")
+    accounts: dict = {}
+    users_file, n_users = write_chunks(
+        out_dir / "users.csv",
+        generate_users_chunks(students, guardians, teachers, school_days, cfg, rng, accounts=accounts),
+        compression=args.compression)
+    print(f"      → {n_users:,} accounts saved to {users_file}")
+
+    print("[3/3] Generating announcements (streaming to file) …")
+    posts_file, n_posts = write_chunks(
+        out_dir / "announcements.csv",
+        generate_announcements_chunks(classes, school_days, calendar, terms, accounts, cfg, rng),
+        compression=args.compression)
+    print(f"      → {n_posts:,} announcements saved to {posts_file}")
+    print(f"✅ Done! Files written to {out_dir.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+id_utils.py
+-----------
+Vectorized short-ID generation ("P_3fa9c1", "D_0b77e2", …).
+
+The per-row `f"{prefix}_{uuid.uuid4().hex[:6]}"` pattern costs one Python
+call per row and starts colliding after a few thousand rows. Here IDs are
+sequence numbers pushed through a keyed bijection of the hex space, so
+they look random but are unique by construction – also across the chunks
+of a streamed table – and are rendered as hex with a lookup table.
+
+The key comes from the caller's generator, mixed with the `table` name:
+generators seeded alike (every script of a seeded pipeline starts from
+default_rng(seed)) still get unrelated IDs per table.
+"""
+
+from __future__ import annotations
+import math
+import zlib
+
+import numpy as np
+
+_HEX = np.frombuffer(b"0123456789abcdef", dtype="S1")
+
+
+class IdSequence:
+    """Unique random-looking IDs for a table of (at most) `total` rows."""
+
+    def __init__(self, prefix: str, total: int, rng: np.random.Generator | None = None, width: int = 6,
+                 start: int = 0, table: str | None = None):
+        rng = rng or np.random.default_rng()
+        # keep the ID space >= 16× the row count
+        self.width = max(width, math.ceil(math.log(max(total, 1) * 16, 16)))
+        self.prefix = f"{prefix}_".encode()
+        self._bits = 4 * self.width
+        self._mask = np.uint64((1 << self._bits) - 1)
+        mul, add = int(rng.integers(1 << 40)), int(rng.integers(1 << 62))
+        if table is not None:                                      # per-table key from the same draws
+            salted = np.random.default_rng([mul, add, zlib.crc32(table.encode())])
+            mul, add = int(salted.integers(1 << 40)), int(salted.integers(1 << 62))
+        self._mul = np.uint64(mul * 2 + 1)                         # odd → invertible
+        self._add = np.uint64(add)
+        self._next = start          # resume a sequence (same rng seed) after `start` IDs
+
+    @property
+    def issued(self) -> int:
+        """Sequence numbers handed out so far (the `start` to resume from)."""
+        return self._next
+
+    def _scramble(self, x: np.ndarray) -> np.ndarray:
+        half = np.uint64(self._bits // 2)
+        for _ in range(2):
+            x = (x * self._mul + self._add) & self._mask
+            x ^= x >> half
+        return x
+
+    def take(self, n: int) -> np.ndarray:
+        """Next `n` IDs as a numpy str array."""
+        seq = np.arange(self._next, self._next + n, dtype=np.uint64)
+        self._next += n
+        values = self._scramble(seq)
+        shifts = np.arange(self._bits - 4, -1, -4, dtype=np.uint64)
+        digits = (values[:, None] >> shifts) & np.uint64(15)
+        hex_part = _HEX[digits].view(f"S{self.width}").ravel()
+        return np.char.add(self.prefix, hex_part).astype(str)
+
+
+def short_ids(prefix: str, n: int, rng: np.random.Generator | None = None, width: int = 6,
+              table: str | None = None) -> np.ndarray:
+    """Return `n` unique IDs like 'P_3fa9c1' as a numpy str array."""
+    return IdSequence(prefix, n, rng, width, table=table).take(n)
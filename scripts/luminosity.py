@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+luminosity.py
+-------------
+Single entry point for every generator, so a full run starts one
+interpreter instead of one per script:
+
+  python scripts/luminosity.py pipeline                       # all steps, in order
+  python scripts/luminosity.py --profile district pipeline    # sized by profiles/district.json
+  python scripts/luminosity.py --profile state pipeline --dry_run   # estimate only
+  python scripts/luminosity.py attendance --data_dir 2015/csv --out_file 2015/csv/attendance.csv
+  python scripts/luminosity.py reference --out_dir 2015/csv  # one step, same flags as the script
+
+Each subcommand maps to one scripts/<module>.py; the module is imported
+only when its command runs, and its own `main()` parses the remaining
+arguments. pandas / numpy / Faker are therefore loaded once per process at
+most, and never for the static reference layer (reference_data.py, one
+step). Imported modules stay cached in `sys.modules`, so `pipeline` pays
+each import once across all steps.
+
+`--profile` (a built-in name or a .json/.toml path, see profiles.py) is
+loaded and validated once, before the first step, and shared by all of them.
+
+Every output is staged and renamed into place when complete (staging.py).
+`pipeline` writes the cleaned tables to <data_dir>/clean_csv (never the
+tracked clean_csv/ at the repo root) and checks that folder. It tags the
+outputs of a run with one run id and finishes by writing manifest.json (seed, profile, per-file rows / bytes / sha256) into
+each folder it wrote to.
+"""
+
+from __future__ import annotations
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# make sibling modules importable when run from the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from profiles import BUILTIN, ENV_VAR, ProfileError, activate, active_profile, load_profile  # noqa: E402
+from staging import RUN_ENV, entries, new_run_id, write_manifest, write_text  # noqa: E402
+
+
+# subcommand → module in scripts/
+COMMANDS = {
+    "reference":           "reference_data",
+    "lookups":             "generate_lookups",
+    "school-years":        "generate_school_years",
+    "terms":               "generate_terms",
+    "periods":             "generate_periods",
+    "calendar":            "generate_school_calendar",
+    "teachers":            "generate_teachers_classrooms",
+    "students":            "generate_students",
+    "guardians":           "generate_guardians",
+    "classes":             "generate_classes",
+    "additional-teachers": "generate_additional_teachers",
+    "enrollments":         "generate_enrollments",
+    "assignments":         "generate_assignments_and_grades",
+    "attendance":          "generate_attendance",
+    "discipline":          "generate_discipline_reports",
+    "tests":               "generate_standardized_tests",
+    "fees":                "generate_fees_and_payments",
+    "portal":              "generate_users_and_announcements",
+    "advance":             "advance_dataset",
+    "estimate":            "estimate_run",
+    "transform":           "transform_csvs",
+    "index":               "query_data",
+    "check":               "check_schema_coverage",
+    "diff":                "diff_datasets",
+    "subset":              "subset_dataset",
+}
+
+
+def clean_dir_for(data_dir: Path) -> Path:
+    """Where `pipeline` puts the cleaned copy of `data_dir`."""
+    return Path(data_dir) / "clean_csv"
+
+
+def pipeline_steps(data_dir: Path, seed: int | None, compression: str | None,
+                   clean_dir: Path | None = None) -> list[tuple[str, list[str]]]:
+    """(command, argv) for a full run; every step reads and writes `data_dir`, transform writes the cleaned tables to `clean_dir` (default <data_dir>/clean_csv) and check reads them there."""
+    d, clean = str(data_dir), str(clean_dir or clean_dir_for(data_dir))
+    seeded = ["--seed", str(seed)] if seed is not None else []
+    packed = ["--compression", compression] if compression else []
+    return [
+        ("reference", ["--out_dir", d]),
+        ("teachers", ["--out_dir", d]),
+        ("students", ["--out_dir", d, *seeded]),
+        ("guardians", ["--data_dir", d, "--out_dir", d]),
+        ("classes", ["--data_dir", d, "--out_dir", d]),
+        ("additional-teachers", ["--data_dir", d]),
+        ("classes", ["--data_dir", d, "--out_dir", d]),
+        ("enrollments", ["--data_dir", d, "--out_file", f"{d}/enrollments.csv"]),
+        ("assignments", ["--data_dir", d, *seeded, *packed]),
+        ("attendance", ["--data_dir", d, "--out_file", f"{d}/attendance.csv", *seeded, *packed]),
+        ("discipline", ["--data_dir", d, "--out_file", f"{d}/discipline_reports.csv", *seeded]),
+        ("tests", ["--data_dir", d, "--out_file", f"{d}/standardized_tests.csv", *seeded]),
+        ("fees", ["--data_dir", d, "--out_dir", d, *seeded]),
+        ("portal", ["--data_dir", d, *seeded, *packed]),
+        ("transform", ["--data_dir", d, "--out_dir", clean, *packed]),
+        ("check", ["--data_dir", clean]),
+    ]
+
+
+def run(command: str, argv: list[str]):
+    """Import the command's module (first use only) and call its main()."""
+    module = importlib.import_module(COMMANDS[command])
+    saved = sys.argv
+    sys.argv = [f"{COMMANDS[command]}.py", *argv]
+    try:
+        module.main()
+    finally:
+        sys.argv = saved
+
+
+def run_pipeline(args):
+    if args.dry_run:
+        packed = ["--compression", args.compression] if args.compression else []
+        run("estimate", ["--out_dir", str(args.data_dir), *packed])
+        return
+
+    steps = pipeline_steps(args.data_dir, args.seed, args.compression)
+    run_id = os.environ[RUN_ENV] = new_run_id()
+    print(f"Profile: {active_profile()['name']} ({active_profile()['students']['count']:,} students), run {run_id}")
+    started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    started = time.perf_counter()
+    seconds: dict[str, float] = {}
+    for i, (command, argv) in enumerate(steps, 1):
+        print(f"\n[{i}/{len(steps)}] {command} {' '.join(argv)}".rstrip())
+        t0 = time.perf_counter()
+        run(command, argv)
+        seconds[command] = seconds.get(command, 0.0) + time.perf_counter() - t0
+        print(f"      → {time.perf_counter() - t0:.2f}s")
+
+    # per-step timings feed `estimate --calibrate`
+    write_text(args.data_dir / "run_stats.json", json.dumps(seconds, indent=2) + "\n")
+
+    from transform_csvs import SRC_DIR
+    meta = {"seed": args.seed, "profile": active_profile()["name"], "compression": args.compression,
+            "started_at": started_at, "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "seconds": seconds}
+    for folder in dict.fromkeys(p.resolve() for p in (args.data_dir, SRC_DIR, clean_dir_for(args.data_dir))):
+        if entries(folder, run_id):
+            print(f"      → manifest {write_manifest(folder, run_id, **meta)}")
+    print(f"\n✅ Pipeline done in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Luminosity data generators.",
+        epilog="Any other arguments are passed through to the command's script.")
+    parser.add_argument("--profile", default=None,
+                        help=f"built-in ({', '.join(BUILTIN)}) or path to a .json/.toml profile "
+                             f"(default: ${ENV_VAR} or 'school')")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_pipe = sub.add_parser("pipeline", help="Run every generator in order, in one process")
+    p_pipe.add_argument("--data_dir", type=Path, default=Path("2015/csv"))
+    p_pipe.add_argument("--seed", type=int, default=None)
+    p_pipe.add_argument("--compression", default=None,
+                        help="passed to the generators that support it (auto/gzip/zstd/lz4)")
+    p_pipe.add_argument("--dry_run", action="store_true",
+                        help="only print expected rows / size / runtime / memory (see estimate_run.py)")
+
+    for command, module in COMMANDS.items():
+        sub.add_parser(command, help=f"scripts/{module}.py", add_help=False)
+
+    args, rest = parser.parse_known_args()
+    try:
+        activate(load_profile(args.profile) if args.profile else active_profile())
+    except ProfileError as exc:
+        parser.error(f"profile: {exc}")
+    if args.command == "pipeline":
+        if rest:
+            parser.error(f"unrecognized arguments: {' '.join(rest)}")
+        run_pipeline(args)
+    else:
+        run(args.command, rest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+name_data.py
+------------
+Bundled, offline name data (surnames + first names with frequency weights)
+compiled into one binary file that is memory-mapped on load.
+
+INPUT  (utils/names/, tab-separated, '#' lines ignored)
+  ├── surnames.tsv             # name <TAB> weight
+  ├── first_names_female.tsv
+  └── first_names_male.tsv
+
+OUTPUT
+  └── utils/names/names.bin
+
+Layout of names.bin (little-endian):
+
+  header      b"LNAM", u32 version, u32 list count
+  directory   per list: 32s name, u32 count, u32 blob bytes,
+              u64 offsets pos, u64 cum-weights pos, u64 blob pos
+  arrays      u32 offsets[count + 1], f64 cumulative weights[count],
+              utf-8 blob of all names back to back
+
+Nothing is parsed on load: offsets and weights are zero-copy views into
+the mapping, and names are decoded only when indexed.
+
+    names = load_names()
+    names["surnames"].sample_unique(rng, 400)
+    names["first_names_female"].choices(rng, 10)
+
+    # array versions: numpy Generator → indices, decoded once per distinct name
+    idx = names["first_names_male"].draw(np.random.default_rng(1), 1_000_000)
+    names["first_names_male"].names_at(idx)
+
+`load_names()` uses the bundled names.bin as is; only when it is missing
+or of another format version does it compile one – in place, or in the
+temp dir when the install is read-only. After editing a .tsv, run this
+script to rebuild. It never touches the network.
+"""
+
+from __future__ import annotations
+import argparse
+import mmap
+import random
+import struct
+import sys
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+NAMES_DIR  = Path(__file__).resolve().parent.parent / "utils" / "names"
+NAMES_BIN  = NAMES_DIR / "names.bin"
+
+MAGIC      = b"LNAM"
+VERSION    = 1
+FALLBACK_BIN = Path(tempfile.gettempdir()) / f"luminosity_names.v{VERSION}.bin"   # read-only installs
+_HEADER    = struct.Struct("<4sII")
+_ENTRY     = struct.Struct("<32sIIQQQ")
+
+if sys.byteorder != "little":               # memoryview.cast uses native order
+    raise ImportError("name_data.py expects a little-endian platform")
+
+
+# ── compile ───────────────────────────────────────────────────────────
+
+def _read_tsv(path: Path) -> list[tuple[str, float]]:
+    rows = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip() or line.startswith("#"):
+            continue
+        name, weight = line.split("\t")
+        rows.append((name, float(weight)))
+    return rows
+
+
+def _align(buf: bytearray, to: int = 8):
+    buf.extend(b"\0" * (-len(buf) % to))
+
+
+def compile_names(src_dir: Path = NAMES_DIR, out_file: Path = NAMES_BIN) -> dict[str, int]:
+    """Pack every <list>.tsv in `src_dir` into `out_file`; returns list → count."""
+    lists = {p.stem: _read_tsv(p) for p in sorted(src_dir.glob("*.tsv"))}
+    body = bytearray()
+    entries = []
+    base = _HEADER.size + _ENTRY.size * len(lists)
+    base += -base % 8
+
+    for name, rows in lists.items():
+        blobs = [n.encode("utf-8") for n, _ in rows]
+        offsets, cum, total = [0], [], 0.0
+        for b, (_, w) in zip(blobs, rows):
+            offsets.append(offsets[-1] + len(b))
+            total += w
+            cum.append(total)
+
+        _align(body)
+        off_pos = base + len(body)
+        body += struct.pack(f"<{len(offsets)}I", *offsets)
+        _align(body)
+        cum_pos = base + len(body)
+        body += struct.pack(f"<{len(cum)}d", *cum)
+        blob_pos = base + len(body)
+        body += b"".join(blobs)
+        entries.append(_ENTRY.pack(name.encode(), len(rows), offsets[-1], off_pos, cum_pos, blob_pos))
+
+    head = bytearray(_HEADER.pack(MAGIC, VERSION, len(lists)) + b"".join(entries))
+    _align(head)
+    tmp = out_file.with_name(out_file.name + ".tmp")
+    tmp.write_bytes(bytes(head) + bytes(body))
+    tmp.replace(out_file)
+    return {name: len(rows) for name, rows in lists.items()}
+
+
+# ── load ──────────────────────────────────────────────────────────────
+
+class NameList:
+    """One weighted name list backed by the mapped file."""
+
+    def __init__(self, view: memoryview, count: int, blob_len: int, off_pos: int, cum_pos: int, blob_pos: int):
+        self._offsets = view[off_pos:off_pos + 4 * (count + 1)].cast("I")
+        self.cum_weights = view[cum_pos:cum_pos + 8 * count].cast("d")
+        self._blob = view[blob_pos:blob_pos + blob_len]
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += self._count
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(self._count))
+
+    def choice(self, rng: random.Random) -> str:
+        return self.choices(rng, 1)[0]
+
+    def choices(self, rng: random.Random, k: int) -> list[str]:
+        """`k` frequency-weighted draws (with replacement)."""
+        picks = rng.choices(range(self._count), cum_weights=self.cum_weights, k=k)
+        return [self[i] for i in picks]
+
+    def sample_unique(self, rng: random.Random, k: int) -> list[str]:
+        """`k` distinct names, common ones more likely (Efraimidis–Spirakis keys)."""
+        if k > self._count:
+            raise ValueError(f"asked for {k} unique names, list has {self._count}")
+        prev, keys = 0.0, []
+        for i, cum in enumerate(self.cum_weights):
+            weight, prev = cum - prev, cum
+            keys.append((rng.random() ** (1.0 / weight), i))
+        keys.sort(reverse=True)
+        return [self[i] for _, i in keys[:k]]
+
+    # -- vectorized -------------------------------------------------------
+
+    def draw(self, rng: np.random.Generator, k: int) -> np.ndarray:
+        """`k` frequency-weighted name indices (with replacement)."""
+        cum = np.frombuffer(self.cum_weights, dtype=np.float64)
+        picks = np.searchsorted(cum, rng.random(k) * cum[-1], side="right")
+        return np.minimum(picks, self._count - 1)
+
+    def draw_unique(self, rng: np.random.Generator, k: int) -> np.ndarray:
+        """`k` distinct name indices, common ones more likely (same keys as `sample_unique`)."""
+        if k > self._count:
+            raise ValueError(f"asked for {k} unique names, list has {self._count}")
+        weights = np.diff(np.frombuffer(self.cum_weights, dtype=np.float64), prepend=0.0)
+        keys = np.log(rng.random(self._count)) / weights
+        return np.argsort(-keys, kind="stable")[:k]
+
+    def names_at(self, indices: np.ndarray) -> np.ndarray:
+        """Indices → object array of names; each distinct name is decoded once."""
+        distinct, inverse = np.unique(indices, return_inverse=True)
+        return np.array([self[int(i)] for i in distinct], dtype=object)[inverse]
+
+
+def _current(bin_path: Path) -> bool:
+    """True when `bin_path` exists and has this module's format version."""
+    try:
+        with open(bin_path, "rb") as f:
+            magic, version, _ = _HEADER.unpack(f.read(_HEADER.size))
+    except (OSError, struct.error):
+        return False
+    return magic == MAGIC and version == VERSION
+
+
+def _bundled_bin() -> Path:
+    """The bundled names.bin, or a compiled copy when it is missing / outdated."""
+    for path in (NAMES_BIN, FALLBACK_BIN):
+        if _current(path):
+            return path
+    try:
+        compile_names(NAMES_DIR, NAMES_BIN)
+        return NAMES_BIN
+    except OSError:                         # read-only install → compile outside the package
+        compile_names(NAMES_DIR, FALLBACK_BIN)
+        return FALLBACK_BIN
+
+
+@lru_cache(maxsize=None)
+def load_names(bin_path: Path = NAMES_BIN) -> dict[str, NameList]:
+    """Map names.bin (compiling it first if missing / outdated) → {list name: NameList}."""
+    if bin_path == NAMES_BIN:
+        bin_path = _bundled_bin()
+    with open(bin_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    magic, version, n = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{bin_path} is not a v{VERSION} name index – rerun name_data.py")
+    lists = {}
+    for i in range(n):
+        name, *fields = _ENTRY.unpack_from(view, _HEADER.size + i * _ENTRY.size)
+        lists[name.rstrip(b"\0").decode()] = NameList(view, *fields)
+    return lists
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile utils/names/*.tsv into names.bin.")
+    parser.add_argument("--src_dir", type=Path, default=NAMES_DIR)
+    parser.add_argument("--out_file", type=Path, default=NAMES_BIN)
+    args = parser.parse_args()
+
+    counts = compile_names(args.src_dir, args.out_file)
+    for name, n in counts.items():
+        print(f"      → {name:<20} {n:,} names")
+    print(f"✅ Done! Saved to {args.out_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+profiles.py
+-----------
+Generator profiles: every scale / distribution knob in one validated
+JSON (or TOML) file instead of constants scattered across the scripts.
+
+Built-in profiles live in profiles/ at the repo root:
+
+  ├── tiny.json        #     50 students – smoke tests
+  ├── school.json      #    500 students – the original hard-coded dataset
+  ├── district.json    # 25 000 students
+  └── state.json       # 500 000 students
+
+A profile only lists what it changes; everything else comes from
+DEFAULTS below (which is the "school" dataset). Unknown keys, wrong types
+and out-of-range values are rejected up front with a ProfileError, so a
+typo fails before any step runs rather than halfway through a pipeline.
+
+    profile = load_profile("district")          # or a path: "perf/huge.json"
+    activate(profile)                           # luminosity.py --profile does this
+    active_profile()["students"]["count"]       # scripts read the knobs in main()
+
+When nothing was activated, `active_profile()` loads $LUMINOSITY_PROFILE
+(default "school"), so the scripts behave the same when run on their own.
+"""
+
+from __future__ import annotations
+import copy
+import json
+import os
+from pathlib import Path
+
+PROFILE_DIR = Path(__file__).resolve().parent.parent / "profiles"
+ENV_VAR     = "LUMINOSITY_PROFILE"
+BUILTIN     = ("tiny", "school", "district", "state")
+
+DEFAULTS = {
+    "students": {
+        "count": 500,
+        # grade → relative weight of a family's eldest child
+        "grade_weights": {"1": 0.12, "2": 0.12, "3": 0.11, "4": 0.10, "5": 0.10, "6": 0.10,
+                          "7": 0.15, "8": 0.06, "9": 0.05, "10": 0.04, "11": 0.03, "12": 0.02},
+        # family size → share of students living in families of that size
+        "family_mix": {"1": 0.70, "2": 0.148, "3": 0.084, "4": 0.048, "5": 0.02},
+        "twin_sets_per_1000": 8,
+        "triplet_sets_per_1000": 4,
+    },
+    "calendar": {
+        "first_year": 2015,
+        "years": 1,
+    },
+    # year-to-year cohort changes when calendar.years > 1 (see generate_students.py);
+    # each summer's leavers are replaced one for one (transfers first, the rest 1st graders)
+    "progression": {
+        "retention_rate": 0.02,         # share of students repeating their grade
+        "withdrawal_rate": 0.05,        # share leaving over the summer (grade 12 graduates on top)
+        "transfer_in_rate": 0.04,       # new students in grades 2-12, relative to those staying
+    },
+    # staffing plan, scaled with the student count
+    "staffing": {
+        "homeroom_per_1000": 56,
+        "core_per_1000": 14,
+        "specials_per_1000": 12,
+        "support_per_1000": 8,
+        "floaters_per_1000": 4,
+        "classrooms_per_1000": 36,
+        "max_sections_per_teacher": 5,
+    },
+    "classes": {
+        "max_class_size": 15,
+    },
+    "assignments": {
+        "per_week_range": [1, 2],
+        "late_submission_prob": 0.05,
+        "perfect_score_prob": 0.03,
+        "failing_score_prob": 0.07,
+    },
+    # portal accounts (users.csv) and feed posts (announcements.csv)
+    "portal": {
+        "student_account_min_grade": 3,
+        "guardian_account_rate": 0.85,
+        "admins_per_1000": 4,
+        "active_last_30_days": 0.75,
+        "class_announcements_per_week": 0.6,
+        "school_announcements_per_week": 2,
+    },
+}
+
+# free-form maps (keys are data, not knob names) → allowed key test
+_WEIGHT_MAPS = {
+    ("students", "grade_weights"): lambda k: k.isdigit() and 0 <= int(k) <= 12,
+    ("students", "family_mix"):    lambda k: k.isdigit() and int(k) >= 1,
+}
+
+
+class ProfileError(ValueError):
+    """A profile file is malformed or has out-of-range values."""
+
+
+# ── loading ───────────────────────────────────────────────────────────
+
+def _read(path: Path) -> dict:
+    if path.suffix == ".toml":
+        import tomllib                      # stdlib since 3.11
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+def _resolve(name_or_path: str | Path) -> Path:
+    if str(name_or_path) in BUILTIN:
+        return PROFILE_DIR / f"{name_or_path}.json"
+    path = Path(name_or_path)
+    if not path.exists():
+        raise ProfileError(f"no such profile: {name_or_path!r} (built-in: {', '.join(BUILTIN)})")
+    return path
+
+
+def _merge(base: dict, override: dict, where: tuple = ()) -> dict:
+    out = copy.deepcopy(base)
+    for key, value in override.items():
+        path = (*where, key)
+        dotted = ".".join(path)
+        if key not in base:
+            raise ProfileError(f"unknown setting: {dotted}")
+        if isinstance(base[key], dict):
+            if not isinstance(value, dict):
+                raise ProfileError(f"{dotted} must be a table/object")
+            if path in _WEIGHT_MAPS:
+                bad = [k for k in value if not _WEIGHT_MAPS[path](str(k))]
+                if bad:
+                    raise ProfileError(f"{dotted}: invalid key(s) {bad}")
+                out[key] = {str(k): v for k, v in value.items()}     # replaced, not merged
+            else:
+                out[key] = _merge(base[key], value, path)
+        else:
+            out[key] = value
+    return out
+
+
+def load_profile(name_or_path: str | Path = "school") -> dict:
+    """Read a built-in or user profile, merge it over DEFAULTS and validate."""
+    path = _resolve(name_or_path)
+    try:
+        raw = _read(path)
+    except (OSError, ValueError) as exc:
+        raise ProfileError(f"{path}: {exc}") from None
+    raw.pop("description", None)
+    name = raw.pop("name", path.stem)
+    profile = _merge(DEFAULTS, raw)
+    validate(profile)
+    profile["name"] = name
+    return profile
+
+
+# ── validation ────────────────────────────────────────────────────────
+
+def _number(value, dotted: str, lo=None, hi=None, integer=False):
+    kinds = (int,) if integer else (int, float)
+    if isinstance(value, bool) or not isinstance(value, kinds):
+        raise ProfileError(f"{dotted} must be {'an integer' if integer else 'a number'}, got {value!r}")
+    if (lo is not None and value < lo) or (hi is not None and value > hi):
+        raise ProfileError(f"{dotted} must be within [{lo}, {hi if hi is not None else '∞'}], got {value}")
+
+
+def _weights(mapping: dict, dotted: str):
+    for key, w in mapping.items():
+        _number(w, f"{dotted}.{key}", lo=0)
+    if not mapping or sum(mapping.values()) <= 0:
+        raise ProfileError(f"{dotted} needs at least one positive weight")
+
+
+def validate(profile: dict):
+    s, cal, prog, staff, cls, asg, portal = (profile[k] for k in ("students", "calendar", "progression", "staffing",
+                                                                  "classes", "assignments", "portal"))
+
+    _number(s["count"], "students.count", lo=1, integer=True)
+    _weights(s["grade_weights"], "students.grade_weights")
+    _weights(s["family_mix"], "students.family_mix")
+    if "1" not in s["family_mix"] or s["family_mix"]["1"] <= 0:
+        raise ProfileError("students.family_mix must give only-children (\"1\") a positive share")
+    _number(s["twin_sets_per_1000"], "students.twin_sets_per_1000", lo=0)
+    _number(s["triplet_sets_per_1000"], "students.triplet_sets_per_1000", lo=0)
+
+    _number(cal["first_year"], "calendar.first_year", lo=1900, hi=2200, integer=True)
+    _number(cal["years"], "calendar.years", lo=1, integer=True)
+
+    for key, value in prog.items():
+        _number(value, f"progression.{key}", lo=0, hi=1)
+    if prog["retention_rate"] + prog["withdrawal_rate"] > 1:
+        raise ProfileError("progression.retention_rate + progression.withdrawal_rate must not exceed 1")
+
+    for key, value in staff.items():
+        _number(value, f"staffing.{key}", lo=0)
+    _number(staff["max_sections_per_teacher"], "staffing.max_sections_per_teacher", lo=1, integer=True)
+    _number(cls["max_class_size"], "classes.max_class_size", lo=1, integer=True)
+
+    rng = asg["per_week_range"]
+    if (not isinstance(rng, list) or len(rng) != 2
+            or not all(isinstance(v, int) and not isinstance(v, bool) for v in rng)
+            or not 0 <= rng[0] <= rng[1]):
+        raise ProfileError(f"assignments.per_week_range must be [lo, hi] with 0 <= lo <= hi, got {rng!r}")
+    for key in ("late_submission_prob", "perfect_score_prob", "failing_score_prob"):
+        _number(asg[key], f"assignments.{key}", lo=0, hi=1)
+
+    _number(portal["student_account_min_grade"], "portal.student_account_min_grade", lo=0, hi=13, integer=True)
+    for key in ("guardian_account_rate", "active_last_30_days"):
+        _number(portal[key], f"portal.{key}", lo=0, hi=1)
+    for key in ("admins_per_1000", "class_announcements_per_week", "school_announcements_per_week"):
+        _number(portal[key], f"portal.{key}", lo=0)
+
+
+# ── process-wide active profile ───────────────────────────────────────
+
+_active: dict | None = None
+
+
+def activate(profile: dict):
+    global _active
+    _active = profile
+
+
+def active_profile() -> dict:
+    """The profile activated by the CLI, else $LUMINOSITY_PROFILE, else "school"."""
+    global _active
+    if _active is None:
+        _active = load_profile(os.environ.get(ENV_VAR, "school"))
+    return _active
+
+
+def scaled(per_1000: float, students: int) -> int:
+    """A per-1000-students rate → a head count (at least 1 when the rate is > 0)."""
+    return max(1, round(per_1000 * students / 1000)) if per_1000 > 0 else 0
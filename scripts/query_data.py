@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+query_data.py
+-------------
+Sorted, block-indexed store over the two big fact tables so that
+"attendance for student X in Q2" never has to read the whole CSV.
+
+`build` sorts attendance & grades by (student_id, date) and writes every
+column as a memory-mappable .npy file plus a sparse index:
+
+  • students.npy / offsets.npy   – row range of each student (point lookups)
+  • block_*.npy                  – student & date min/max per BLOCK_ROWS rows
+                                   (range scans skip non-overlapping blocks)
+
+INPUT  (in --data_dir)
+  ├── attendance.csv   # attendance_id, student_id, date, status   (.gz/.zst/.lz4 ok)
+  ├── grades.csv       # grade_id, student_id, assignment_id, score, submitted_on
+  └── terms.csv        # term_id, ..., name, start_date, end_date
+
+OUTPUT (to --index_dir)
+  ├── attendance/*.npy
+  ├── grades/*.npy
+  └── terms.csv
+
+Each table folder is built under a temp name and swapped in when complete
+(staging.staged_dir), so a rebuild never leaves a half-written index.
+
+Examples
+  python scripts/query_data.py build --data_dir 2015/csv --index_dir 2015/index
+  python scripts/query_data.py attendance --index_dir 2015/index --student_id 143 --term "Q2 2015"
+  python scripts/query_data.py grades --index_dir 2015/index --start 2015-11-02 --end 2015-11-06
+"""
+
+from __future__ import annotations
+import argparse
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from block_compression import read_csv, resolve_csv
+from staging import staged_dir, write_text
+
+
+# ── CONFIG ────────────────────────────────────────────────────────────
+
+# table name → column holding the row's date
+INDEXED_TABLES = {
+    "attendance": "date",
+    "grades":     "submitted_on",
+}
+
+BLOCK_ROWS = 4096          # rows per sparse-index block
+
+# ----------------------------------------------------------------------
+
+
+def _to_column(series: pd.Series) -> np.ndarray:
+    """Return a fixed-width numpy column that can be memory-mapped back."""
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series.to_numpy()
+    text = series.fillna("").astype(str).to_numpy(dtype=str)
+    return np.char.encode(text, "utf-8")
+
+
+def build_table_index(csv_path: Path, date_col: str, out_dir: Path) -> int:
+    """Sort one table by (student_id, date) and write columns + sparse index."""
+    df = read_csv(csv_path)
+    dates = pd.to_datetime(df[date_col]).to_numpy().astype("datetime64[D]")
+    student_ids = df["student_id"].to_numpy(dtype=np.int64)
+
+    order = np.lexsort((dates, student_ids))
+    df = df.iloc[order].reset_index(drop=True)
+    dates = dates[order]
+    student_ids = student_ids[order]
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for col in df.columns:
+        if col in ("student_id", date_col):
+            continue
+        np.save(out_dir / f"col_{col}.npy", _to_column(df[col]))
+    np.save(out_dir / "student_id.npy", student_ids)
+    np.save(out_dir / "date.npy", dates)
+
+    # point-lookup index: row range per student
+    students, starts = np.unique(student_ids, return_index=True)
+    offsets = np.append(starts, len(student_ids))
+    np.save(out_dir / "students.npy", students)
+    np.save(out_dir / "offsets.npy", offsets)
+
+    # range-scan index: min/max per block
+    block_starts = np.arange(0, len(df), BLOCK_ROWS)
+    if len(df):
+        np.save(out_dir / "block_min_date.npy", np.minimum.reduceat(dates, block_starts))
+        np.save(out_dir / "block_max_date.npy", np.maximum.reduceat(dates, block_starts))
+        np.save(out_dir / "block_min_student.npy", student_ids[block_starts])
+        np.save(out_dir / "block_max_student.npy",
+                student_ids[np.minimum(block_starts + BLOCK_ROWS, len(df)) - 1])
+    else:
+        for name, dtype in (("date", "datetime64[D]"), ("student", np.int64)):
+            np.save(out_dir / f"block_min_{name}.npy", np.empty(0, dtype=dtype))
+            np.save(out_dir / f"block_max_{name}.npy", np.empty(0, dtype=dtype))
+
+    # remember original column order + date column name for decoding
+    (out_dir / "columns.txt").write_text("\n".join([date_col, *df.columns]) + "\n")
+    return len(df)
+
+
+class TableIndex:
+    """Read-only, memory-mapped view of one indexed table."""
+
+    def __init__(self, table_dir: Path):
+        load = lambda name: np.load(table_dir / f"{name}.npy", mmap_mode="r")
+        date_col, *columns = (table_dir / "columns.txt").read_text().split()
+        self.date_col = date_col
+        self.columns = columns
+        self.student_id = load("student_id")
+        self.date = load("date")
+        self.students = load("students")
+        self.offsets = load("offsets")
+        self.block_min_date = load("block_min_date")
+        self.block_max_date = load("block_max_date")
+        self.block_min_student = load("block_min_student")
+        self.block_max_student = load("block_max_student")
+        self.extra = {
+            col: load(f"col_{col}")
+            for col in columns if col not in ("student_id", date_col)
+        }
+
+    def __len__(self) -> int:
+        return len(self.student_id)
+
+    def _frame(self, rows: np.ndarray | slice) -> pd.DataFrame:
+        data = {}
+        for col in self.columns:
+            if col == "student_id":
+                data[col] = np.asarray(self.student_id[rows])
+            elif col == self.date_col:
+                data[col] = np.datetime_as_string(self.date[rows], unit="D")
+            else:
+                values = np.asarray(self.extra[col][rows])
+                data[col] = np.char.decode(values, "utf-8") if values.dtype.kind == "S" else values
+        return pd.DataFrame(data, columns=self.columns)
+
+    def student_rows(self, student_id: int, start=None, end=None) -> slice:
+        """Row slice for one student, optionally limited to [start, end]."""
+        pos = np.searchsorted(self.students, student_id)
+        if pos >= len(self.students) or self.students[pos] != student_id:
+            return slice(0, 0)
+        lo, hi = int(self.offsets[pos]), int(self.offsets[pos + 1])
+        dates = self.date[lo:hi]
+        if start is not None:
+            lo += int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        if end is not None:
+            hi = int(self.offsets[pos]) + int(np.searchsorted(dates, np.datetime64(end, "D"), side="right"))
+        return slice(lo, max(lo, hi))
+
+    def lookup(self, student_id: int, start=None, end=None) -> pd.DataFrame:
+        """All rows for one student, optionally within a date range."""
+        return self._frame(self.student_rows(student_id, start, end))
+
+    def scan(self, start, end, student_ids=None) -> pd.DataFrame:
+        """All rows dated within [start, end], touching only overlapping blocks."""
+        start, end = np.datetime64(start, "D"), np.datetime64(end, "D")
+        hit = (self.block_max_date >= start) & (self.block_min_date <= end)
+        if student_ids is not None:
+            wanted = np.unique(np.asarray(student_ids, dtype=np.int64))
+            lo = np.searchsorted(wanted, self.block_min_student, side="left")
+            hi = np.searchsorted(wanted, self.block_max_student, side="right")
+            hit &= hi > lo
+
+        rows = []
+        for block in np.flatnonzero(hit):
+            lo = block * BLOCK_ROWS
+            hi = min(lo + BLOCK_ROWS, len(self))
+            dates = self.date[lo:hi]
+            mask = (dates >= start) & (dates <= end)
+            if student_ids is not None:
+                mask &= np.isin(self.student_id[lo:hi], wanted)
+            rows.append(lo + np.flatnonzero(mask))
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        return self._frame(rows)
+
+
+class DatasetIndex:
+    """Entry point for callers: `DatasetIndex(dir).attendance.lookup(143, ...)`."""
+
+    def __init__(self, index_dir: Path):
+        index_dir = Path(index_dir)
+        self.tables = {
+            name: TableIndex(index_dir / name)
+            for name in INDEXED_TABLES if (index_dir / name / "columns.txt").exists()
+        }
+        terms_path = index_dir / "terms.csv"
+        self.terms = pd.read_csv(terms_path) if terms_path.exists() else pd.DataFrame(
+            columns=["term_id", "name", "start_date", "end_date"])
+
+    def __getattr__(self, name: str) -> TableIndex:
+        try:
+            return self.__dict__["tables"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def term_bounds(self, term) -> tuple[str, str]:
+        """Return (start_date, end_date) for a term_id or term name."""
+        key = "term_id" if str(term).isdigit() else "name"
+        match = self.terms[self.terms[key].astype(str) == str(term)]
+        if match.empty:
+            raise KeyError(f"unknown term: {term!r}")
+        row = match.iloc[0]
+        return row["start_date"], row["end_date"]
+
+    def query(self, table: str, student_id=None, term=None, start=None, end=None) -> pd.DataFrame:
+        if term is not None:
+            start, end = self.term_bounds(term)
+        index = self.tables[table]
+        if student_id is not None:
+            return index.lookup(student_id, start, end)
+        if start is None or end is None:
+            raise ValueError("a range scan needs --term or both --start and --end")
+        return index.scan(start, end)
+
+
+@lru_cache(maxsize=None)
+def open_index(index_dir: str) -> DatasetIndex:
+    """Process-wide cached index, so a web backend only pays the open cost once."""
+    return DatasetIndex(Path(index_dir))
+
+
+def build(data_dir: Path, index_dir: Path):
+    index_dir.mkdir(parents=True, exist_ok=True)
+    for table, date_col in INDEXED_TABLES.items():
+        csv_path = resolve_csv(data_dir, table)
+        if csv_path is None:
+            print(f"⚠️  {table}.csv not found – skipping")
+            continue
+        with staged_dir(index_dir / table) as tmp:
+            n = build_table_index(csv_path, date_col, tmp)
+        print(f"      → {table:<12} {n:,} rows indexed")
+    if (data_dir / "terms.csv").exists():
+        write_text(index_dir / "terms.csv", (data_dir / "terms.csv").read_text(encoding="utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the attendance/grades index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Sort + index attendance.csv and grades.csv")
+    p_build.add_argument("--data_dir", required=True, type=Path)
+    p_build.add_argument("--index_dir", required=True, type=Path)
+
+    for table in INDEXED_TABLES:
+        p = sub.add_parser(table, help=f"Query {table} rows")
+        p.add_argument("--index_dir", required=True, type=Path)
+        p.add_argument("--student_id", type=int)
+        p.add_argument("--term", help="term_id or term name from terms.csv (e.g. 'Q2 2015')")
+        p.add_argument("--start", help="YYYY-MM-DD (inclusive)")
+        p.add_argument("--end", help="YYYY-MM-DD (inclusive)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print("[1/1] Building index …")
+        build(args.data_dir, args.index_dir)
+        print(f"✅ Index written to {args.index_dir.resolve()}")
+        return
+
+    index = open_index(str(args.index_dir))
+    result = index.query(args.command, args.student_id, args.term, args.start, args.end)
+    print(result.to_csv(index=False), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+reference_data.py
+-----------------
+The static reference layer – lookups, periods, school years, terms and the
+school calendar – as in-code constants and date rules, written in one go
+through csv_writer.write_rows. Only the stdlib is imported (no pandas /
+numpy), so the whole layer takes milliseconds.
+
+OUTPUT (to --out_dir, default 2015/csv)
+  ├── grade_levels.csv
+  ├── guardian_types.csv
+  ├── departments.csv
+  ├── school_profile.csv
+  ├── periods.csv
+  ├── school_years.csv       # one row per school year
+  ├── terms.csv              # four quarters per school year
+  └── school_calendar.csv    # one row per day of each school year
+
+The multi-year tables follow the profile's calendar.first_year / years (or
+--first_year / --years). Year bounds and holidays are rule-based (Labor
+Day = 1st Monday of September, …); quarters break on the last Friday of
+October, Martin Luther King Jr Day and the last Friday of March. The default
+run (2015, one year) reproduces the original hand-written 2015-16 tables.
+
+    python scripts/reference_data.py --out_dir 2015/csv --years 3
+    python scripts/luminosity.py reference --out_dir 2015/csv --tables terms periods
+"""
+
+from __future__ import annotations
+import argparse
+from datetime import date, timedelta
+from pathlib import Path
+
+from csv_writer import write_rows
+
+OUT_DIR = Path("2015", "csv")
+
+
+# ── constants ─────────────────────────────────────────────────────────
+
+GRADE_LEVELS = [
+    {"grade_level_id": g, "name": f"{g}{'st' if g == 1 else 'nd' if g == 2 else 'rd' if g == 3 else 'th'} Grade",
+     "level_order": g}
+    for g in range(1, 13)
+]
+
+GUARDIAN_TYPES = [
+    {"guardian_type_id": i, "name": name}
+    for i, name in enumerate(["Mother", "Father", "Step-Mother", "Step-Father", "Grandmother",
+                              "Grandfather", "Aunt", "Uncle", "Legal Guardian", "Other"], 1)
+]
+
+DEPARTMENTS = [
+    {"department_id": i, "name": name}
+    for i, name in enumerate(["Mathematics", "Science", "English", "Social Studies", "Foreign Languages",
+                              "Physical Education", "Fine Arts", "Technology", "Electives"], 1)
+]
+
+# one row per school; the generated data covers a single school
+SCHOOL_PROFILE = [
+    {"school_id": 1, "school_name": "Luminosity Academy", "address": "1200 Lakeview Drive",
+     "city": "Springfield", "state": "IL", "zip": "62704", "phone": "(217) 555-0142",
+     "founded_year": 1987},
+]
+
+# (start, end) of each period; lunch sits between periods 4 and 5
+PERIOD_TIMES = [("08:00", "08:50"), ("09:00", "09:50"), ("10:00", "10:50"), ("11:00", "11:50"),
+                ("12:30", "13:20"), ("13:30", "14:20"), ("14:30", "15:20")]
+
+PERIODS = [
+    {"period_id": i, "name": f"Period {i}", "start_time": f"{start}:00", "end_time": f"{end}:00"}
+    for i, (start, end) in enumerate(PERIOD_TIMES, 1)
+]
+
+CALENDAR_COLUMNS = ["calendar_date", "is_school_day", "is_holiday", "holiday_name", "comment"]
+
+
+# ── date rules ────────────────────────────────────────────────────────
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th (1-based) weekday (Mon=0) of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def school_year_bounds(year: int) -> tuple[date, date]:
+    """First and last day of the school year starting in `year`."""
+    return _nth_weekday(year, 8, 0, 4), _nth_weekday(year + 1, 6, 3, 2)
+
+
+def holidays_for_year(year: int) -> list[tuple[str, date, date]]:
+    """(name, first day, last day) of every break in the school year starting in `year`."""
+    nxt = year + 1
+    thanksgiving = _nth_weekday(year, 11, 3, 4)
+    dec21 = date(year, 12, 21)
+    jan2 = date(nxt, 1, 2)
+    easter_monday = _easter(nxt) + timedelta(days=1)
+    return [
+        ("Labor Day",                 _nth_weekday(year, 9, 0, 1),  _nth_weekday(year, 9, 0, 1)),
+        ("Fall PD Day",               _nth_weekday(year, 10, 4, 2), _nth_weekday(year, 10, 4, 2)),
+        ("Thanksgiving Break",        thanksgiving,                 thanksgiving + timedelta(days=1)),
+        ("Winter Break",              dec21 - timedelta(days=dec21.weekday()),
+                                      jan2 + timedelta(days=(7 - jan2.weekday()) % 7)),
+        ("Martin Luther King Jr Day", _nth_weekday(nxt, 1, 0, 3),   _nth_weekday(nxt, 1, 0, 3)),
+        ("Presidents' Day PD",        _nth_weekday(nxt, 2, 0, 3),   _nth_weekday(nxt, 2, 0, 3)),
+        ("Spring Break",              easter_monday,                easter_monday + timedelta(days=4)),
+        ("Memorial Day",              _nth_weekday(nxt, 5, 0, -1),  _nth_weekday(nxt, 5, 0, -1)),
+    ]
+
+
+def quarters_for_year(year: int) -> list[tuple[date, date]]:
+    """(first day, last day) of the four quarters of the school year starting in `year`."""
+    start, end = school_year_bounds(year)
+    q1_end = _nth_weekday(year, 10, 4, -1)                  # last Friday of October
+    mlk = _nth_weekday(year + 1, 1, 0, 3)
+    q3_end = _nth_weekday(year + 1, 3, 4, -1)               # last Friday of March
+    return [
+        (start,                         q1_end),
+        (q1_end + timedelta(days=3),    mlk - timedelta(days=3)),
+        (mlk + timedelta(days=1),       q3_end),
+        (q3_end + timedelta(days=3),    end),
+    ]
+
+
+# ── multi-year tables ─────────────────────────────────────────────────
+
+def school_years(first_year: int, years: int = 1) -> list[dict]:
+    rows = []
+    for i, year in enumerate(range(first_year, first_year + years), 1):
+        start, end = school_year_bounds(year)
+        rows.append({"school_year_id": i, "year_label": f"{year}–{year + 1}",
+                     "start_date": start.isoformat(), "end_date": end.isoformat()})
+    return rows
+
+
+def terms(first_year: int, years: int = 1) -> list[dict]:
+    rows = []
+    for i, year in enumerate(range(first_year, first_year + years), 1):
+        for q, (start, end) in enumerate(quarters_for_year(year), 1):
+            rows.append({"term_id": len(rows) + 1, "school_year_id": i, "name": f"Q{q} {start.year}",
+                         "start_date": start.isoformat(), "end_date": end.isoformat()})
+    return rows
+
+
+def calendar_rows(first_year: int, years: int = 1) -> list[dict]:
+    """school_calendar.csv rows, identical to SchoolCalendar.for_years(…).write_csv()."""
+    rows = []
+    for year in range(first_year, first_year + years):
+        start, end = school_year_bounds(year)
+        closed = {}
+        for name, first, last in sorted(holidays_for_year(year), key=lambda h: h[1]):
+            for k in range((last - first).days + 1):
+                closed[first + timedelta(days=k)] = name
+        for k in range((end - start).days + 1):
+            day = start + timedelta(days=k)
+            weekend = day.weekday() >= 5
+            name = closed.get(day, "")
+            rows.append({"calendar_date": day.isoformat(), "is_school_day": not weekend and day not in closed,
+                         "is_holiday": day in closed, "holiday_name": name,
+                         "comment": "Weekend" if weekend else ""})
+    return rows
+
+
+def tables(first_year: int, years: int = 1) -> dict[str, list[dict]]:
+    """Table name → rows of the whole reference layer."""
+    return {
+        "grade_levels":    GRADE_LEVELS,
+        "guardian_types":  GUARDIAN_TYPES,
+        "departments":     DEPARTMENTS,
+        "school_profile":  SCHOOL_PROFILE,
+        "periods":         PERIODS,
+        "school_years":    school_years(first_year, years),
+        "terms":           terms(first_year, years),
+        "school_calendar": calendar_rows(first_year, years),
+    }
+
+
+TABLES = list(tables(2015))
+
+
+def write_reference(out_dir: Path = OUT_DIR, names=None, first_year: int | None = None,
+                    years: int | None = None) -> dict[str, int]:
+    """Write the reference tables (all, or `names`) → rows per table."""
+    if first_year is None or years is None:
+        from profiles import active_profile
+        cal = active_profile()["calendar"]
+        first_year = cal["first_year"] if first_year is None else first_year
+        years = cal["years"] if years is None else years
+    written = {}
+    for name, rows in tables(first_year, years).items():
+        if names is None or name in names:
+            write_rows(Path(out_dir) / f"{name}.csv", rows)
+            written[name] = len(rows)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the static reference tables.")
+    parser.add_argument("--out_dir", type=Path, default=OUT_DIR)
+    parser.add_argument("--first_year", type=int, default=None, help="default: the profile's calendar.first_year")
+    parser.add_argument("--years", type=int, default=None, help="default: the profile's calendar.years")
+    parser.add_argument("--tables", nargs="+", choices=TABLES, default=None, help="default: all")
+    args = parser.parse_args()
+    if args.years is not None and args.years < 1:
+        parser.error("--years must be at least 1")
+
+    written = write_reference(args.out_dir, args.tables, args.first_year, args.years)
+    for name, rows in written.items():
+        print(f"  ✅ {name + '.csv':<22} {rows:>6,} rows")
+    print(f"✅ Done! {len(written)} reference tables in {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
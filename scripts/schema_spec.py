@@ -0,0 +1,216 @@
+"""
+schema_spec.py
+--------------
+The documented schema, read from the files at the repo root instead of
+hard-coded table lists:
+
+  ├── luminosity_schema_v15.dbml            # tables, column types, pk / not null, refs
+  └── luminosity_schema_comments*.sql       # COMMENT ON TABLE / COLUMN – the delivered layout
+
+The COMMENT ON files describe what the clean stage ships (clean_csv/), so
+they decide which tables and columns exist and in which order. The DBML
+is the older design: where it has the same table.column it supplies the
+type, nullability and reference; other columns get a type inferred from
+their comment ("Date of …" → date, "Boolean: …" → boolean, "Primary key"
+→ key, …). DBML tables that were never documented are kept as "planned".
+A key column whose comment names no target ("Foreign key: student who …")
+references the table whose primary key has the same name.
+
+    spec = load_schema()
+    spec["grades"]["columns"]["score"]
+    # {'type': 'float', 'required': False, 'key': False, 'ref': None, 'comment': 'Points earned'}
+
+Types: int, float, date, datetime, time, boolean, varchar, text, key. "key" and int
+key columns accept the generators' opaque IDs (A_3f9c01, FEE01) as well as
+plain integers.
+"""
+
+from __future__ import annotations
+import re
+from pathlib import Path
+
+ROOT_DIR      = Path(__file__).resolve().parent.parent
+DBML_FILE     = ROOT_DIR / "luminosity_schema_v15.dbml"
+COMMENT_GLOB  = "luminosity_schema_comments*.sql"
+
+_TABLE_RE   = re.compile(r'^Table\s+"?(\w+)"?(?:\s+as\s+\w+)?\s*\{', re.I)
+_COLUMN_RE  = re.compile(r'^"?(\w+)"?\s+("[^"]+"|[\w()]+(?:\([^)]*\))?)\s*(?:\[(.*)\])?\s*$')
+_REF_RE     = re.compile(r'ref:\s*[<>-]\s*"?(\w+)"?\."?(\w+)"?', re.I)
+_TOP_REF_RE = re.compile(r'^Ref\b[^:]*:\s*"?(\w+)"?\."?(\w+)"?\s*[<>-]\s*"?(\w+)"?\."?(\w+)"?', re.I)
+_COMMENT_RE = re.compile(r"COMMENT\s+ON\s+(TABLE|COLUMN)\s+([\w.]+)\s+IS\s+'((?:[^']|'')*)'\s*;", re.I)
+
+# DBML type → checker type
+_TYPE_ALIASES = {
+    "int": "int", "integer": "int", "bigint": "int", "smallint": "int", "serial": "int",
+    "float": "float", "double": "float", "decimal": "float", "numeric": "float", "real": "float",
+    "date": "date", "time": "time", "timestamp": "datetime", "datetime": "datetime",
+    "boolean": "boolean", "bool": "boolean",
+    "varchar": "varchar", "char": "varchar", "text": "text",
+}
+
+# (comment pattern, type) – first match wins; used when the DBML has no such column
+_COMMENT_TYPES = [
+    (re.compile(r"^(primary key|foreign key|soft reference)", re.I), "key"),
+    (re.compile(r"^boolean\b|^true if\b", re.I),                     "boolean"),
+    (re.compile(r"\bdate and time\b", re.I),                         "datetime"),
+    (re.compile(r"\btime the period|\btime of\b|24-hour", re.I),     "time"),
+    (re.compile(r"^(specific )?date\b|\bdate (of|the|for|assignment)\b|due date", re.I), "date"),
+    (re.compile(r"\b(amount|points|score|percentile)\b", re.I),      "float"),
+]
+
+
+# ── parsing ───────────────────────────────────────────────────────────
+
+def _strip_line_comments(text: str) -> str:
+    return "\n".join(line.split("//", 1)[0] if "//" in line else line for line in text.splitlines())
+
+
+def parse_dbml(path: Path = DBML_FILE) -> dict[str, dict]:
+    """Tables of a DBML file → {table: {"columns": {name: {...}}}} in file order."""
+    tables: dict[str, dict] = {}
+    table = None
+    depth = 0                           # nesting inside the current table (indexes { … })
+    for raw in _strip_line_comments(Path(path).read_text(encoding="utf-8")).splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if table is None:
+            if m := _TABLE_RE.match(line):
+                table = tables.setdefault(m.group(1), {"columns": {}})
+            elif m := _TOP_REF_RE.match(line):
+                # Ref: a.x > b.y  → a.x references b.y (the other arrow only swaps the sides)
+                a, b = (m.group(1, 2), m.group(3, 4))
+                if "<" in line.split(":", 1)[1]:
+                    a, b = b, a
+                col = tables.get(a[0], {}).get("columns", {}).get(a[1])
+                if col is not None:
+                    col["ref"] = f"{b[0]}.{b[1]}"
+            continue
+        if line.startswith("}"):
+            if depth:
+                depth -= 1
+            else:
+                table = None
+            continue
+        if line.endswith("{"):          # indexes { … } / Note { … }
+            depth += 1
+            continue
+        if depth:
+            # composite primary key: (a, b) [pk]
+            if re.search(r"\[.*\bpk\b.*\]", line) and line.startswith("("):
+                for name in re.findall(r"\w+", line.split(")", 1)[0]):
+                    if name in table["columns"]:
+                        table["columns"][name]["required"] = True
+            continue
+        if re.match(r"note\s*[:{]", line, re.I):
+            continue
+        m = _COLUMN_RE.match(line)
+        if not m:
+            raise ValueError(f"{path}: cannot parse DBML line: {raw!r}")
+        name, dbml_type, settings = m.group(1), m.group(2).strip('"'), (m.group(3) or "")
+        flags = {s.strip().lower() for s in settings.split(",")}
+        pk = bool(flags & {"pk", "primary key"})
+        ref = _REF_RE.search(settings)
+        table["columns"][name] = {
+            "type": _TYPE_ALIASES.get(dbml_type.split("(")[0].lower(), "text"),
+            "required": pk or "not null" in flags,
+            "key": pk or ref is not None,
+            "ref": f"{ref.group(1)}.{ref.group(2)}" if ref else None,
+        }
+    return tables
+
+
+def parse_comments(paths) -> dict[str, dict]:
+    """COMMENT ON statements → {table: {"comment": str, "columns": {name: comment}}}.
+
+    Files are read in order; a later comment on the same object replaces the
+    text but keeps the column's original position.
+    """
+    tables: dict[str, dict] = {}
+    for path in paths:
+        text = "\n".join(line for line in Path(path).read_text(encoding="utf-8").splitlines()
+                         if not line.lstrip().startswith("--"))
+        for kind, target, comment in _COMMENT_RE.findall(text):
+            comment = comment.replace("''", "'")
+            if kind.upper() == "TABLE":
+                tables.setdefault(target, {"comment": "", "columns": {}})["comment"] = comment
+            else:
+                table, _, column = target.partition(".")
+                tables.setdefault(table, {"comment": "", "columns": {}})["columns"][column] = comment
+    return tables
+
+
+def comment_files(root: Path = ROOT_DIR) -> list[Path]:
+    """luminosity_schema_comments.sql, then _part2, _part3, …"""
+    def order(p: Path):
+        m = re.search(r"_part(\d+)$", p.stem)
+        return int(m.group(1)) if m else 1
+    return sorted(Path(root).glob(COMMENT_GLOB), key=order)
+
+
+def infer_type(comment: str) -> str:
+    for pattern, kind in _COMMENT_TYPES:
+        if pattern.search(comment):
+            return kind
+    return "text"
+
+
+def key_owners(spec: dict[str, dict]) -> dict[str, str]:
+    """Primary-key column name → "table.column", for names that are the key of exactly one table.
+
+    A table's primary key is its first column when that is a required key
+    that references nothing.
+    """
+    seen: dict[str, list[str]] = {}
+    for table, t in spec.items():
+        if not t["columns"]:
+            continue
+        name, col = next(iter(t["columns"].items()))
+        if col["key"] and col["required"] and col["ref"] is None:
+            seen.setdefault(name, []).append(f"{table}.{name}")
+    return {name: owners[0] for name, owners in seen.items() if len(owners) == 1}
+
+
+# ── merged spec ───────────────────────────────────────────────────────
+
+def load_schema(dbml: Path = DBML_FILE, comments=None) -> dict[str, dict]:
+    """Documented tables (COMMENT ON layout, DBML types) plus DBML-only "planned" ones.
+
+    {table: {"comment": str, "planned": bool,
+             "columns": {name: {"type", "required", "key", "ref", "comment"}}}}
+    """
+    design = parse_dbml(dbml) if dbml else {}
+    documented = parse_comments(comment_files() if comments is None else comments)
+
+    spec: dict[str, dict] = {}
+    for table, doc in documented.items():
+        dbml_cols = design.get(table, {}).get("columns", {})
+        columns = {}
+        for name, comment in doc["columns"].items():
+            if name in dbml_cols:
+                col = dict(dbml_cols[name])
+            else:
+                kind = infer_type(comment)
+                col = {"type": kind, "required": False, "key": kind == "key", "ref": None}
+            if comment.lower().startswith("primary key"):
+                col["required"] = col["key"] = True
+            # "Foreign key to t.c" → ref; several targets (a polymorphic soft reference) → none
+            targets = set(re.findall(r"\b\w+\.\w+\b", comment))
+            if col["ref"] is None and col["key"] and len(targets) == 1 \
+                    and not comment.lower().startswith("primary key"):
+                col["ref"] = targets.pop()
+            col["comment"] = comment
+            columns[name] = col
+        spec[table] = {"comment": doc["comment"], "planned": False, "columns": columns}
+
+    owners = key_owners(spec)
+    for table, t in spec.items():
+        for name, col in list(t["columns"].items())[1:]:
+            if col["key"] and col["ref"] is None and owners.get(name, table).split(".")[0] != table:
+                col["ref"] = owners[name]
+
+    for table, t in design.items():
+        if table not in spec:
+            spec[table] = {"comment": "", "planned": True,
+                           "columns": {n: {**c, "comment": ""} for n, c in t["columns"].items()}}
+    return spec
@@ -0,0 +1,226 @@
+"""
+school_calendar.py
+------------------
+Array-backed school calendar shared by the generators.
+
+A `SchoolCalendar` holds one `datetime64[D]` array of dates plus boolean
+masks (school day / holiday / weekend) and a sorted holiday-interval
+index, so the usual questions are a `searchsorted` away:
+
+    cal = SchoolCalendar.for_years(2015, 3)               # 2015-16 … 2017-18
+    cal = SchoolCalendar.from_csv(data_dir / "school_calendar.csv")
+
+    cal.school_days("2015-11-01", "2015-11-30")           # datetime64 array
+    cal.nth_school_day(100)                               # 100th day of school
+    cal.holiday_name(dates)                               # '' when not a holiday
+    cal.term_of(dates, terms)                             # term_id or -1
+
+    windows = EnrollmentWindows(students)                 # enrollment_date … withdraw_date
+    windows.contains(student_ids, dates)                  # attended school that day?
+    shift_years(dates, 2)                                 # same dates two school years later
+
+Holidays are rule-based (Labor Day = 1st Monday of September, Spring Break
+= week after Easter, …) so any range of years can be built; the rules live
+in reference_data.py, which also writes school_calendar.csv without numpy,
+and reproduce the original hand-written 2015-16 calendar exactly.
+"""
+
+from __future__ import annotations
+import csv
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from reference_data import CALENDAR_COLUMNS, holidays_for_year, school_year_bounds
+from staging import staged_text
+
+CSV_COLUMNS = CALENDAR_COLUMNS
+
+
+# ── calendar ──────────────────────────────────────────────────────────
+
+def _d64(value) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+
+class SchoolCalendar:
+    """Dates + masks + holiday-interval index; all queries are vectorized."""
+
+    def __init__(self, dates: np.ndarray, holidays: list[tuple[str, date, date]]):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        holidays = sorted(holidays, key=lambda h: h[1])
+        self.holiday_names = np.array([name for name, _, _ in holidays] + [""], dtype=object)
+        self.holiday_starts = np.array([s for _, s, _ in holidays], dtype="datetime64[D]")
+        self.holiday_ends = np.array([e for _, _, e in holidays], dtype="datetime64[D]")
+
+        weekday = (self.dates.astype(np.int64) + 3) % 7             # Mon=0 (1970-01-01 was a Thursday)
+        self.is_weekend = weekday >= 5
+        self.is_holiday = self._holiday_index(self.dates) >= 0
+        self.is_school_day = ~self.is_weekend & ~self.is_holiday
+        self._school_days = self.dates[self.is_school_day]
+
+    # -- constructors -------------------------------------------------
+
+    @classmethod
+    def build(cls, start, end, holidays: list[tuple[str, date, date]]) -> "SchoolCalendar":
+        dates = np.arange(_d64(start), _d64(end) + 1, dtype="datetime64[D]")
+        return cls(dates, holidays)
+
+    @classmethod
+    def for_years(cls, first_year: int, n_years: int = 1) -> "SchoolCalendar":
+        """Consecutive school years (summers excluded), holidays from the rules above."""
+        dates, holidays = [], []
+        for year in range(first_year, first_year + n_years):
+            start, end = school_year_bounds(year)
+            dates.append(np.arange(_d64(start), _d64(end) + 1, dtype="datetime64[D]"))
+            holidays += holidays_for_year(year)
+        return cls(np.concatenate(dates), holidays)
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "SchoolCalendar":
+        """Rebuild from school_calendar.csv (consecutive same-name holiday rows → one interval)."""
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        dates = np.array([r["calendar_date"] for r in rows], dtype="datetime64[D]")
+        holidays: list[tuple[str, date, date]] = []
+        for r in rows:
+            name = r["holiday_name"]
+            if r["is_holiday"] != "True":
+                continue
+            day = date.fromisoformat(r["calendar_date"])
+            if holidays and holidays[-1][0] == name and holidays[-1][2] + timedelta(days=1) >= day:
+                holidays[-1] = (name, holidays[-1][1], day)
+            else:
+                holidays.append((name, day, day))
+        # a weekday that is neither weekend nor holiday but marked non-school still counts as closed
+        cal = cls(dates, holidays)
+        closed = np.array([r["is_school_day"] != "True" for r in rows])
+        cal.is_school_day &= ~closed
+        cal._school_days = cal.dates[cal.is_school_day]
+        return cal
+
+    # -- lookups ------------------------------------------------------
+
+    def _holiday_index(self, dates: np.ndarray) -> np.ndarray:
+        """Index of the holiday interval containing each date, -1 if none."""
+        i = np.searchsorted(self.holiday_starts, dates, side="right") - 1
+        hit = (i >= 0) & (dates <= self.holiday_ends[np.maximum(i, 0)]) if len(self.holiday_ends) else i >= 0
+        return np.where(hit, i, -1)
+
+    def holiday_name(self, dates) -> np.ndarray:
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        return self.holiday_names[self._holiday_index(dates)]
+
+    def school_days(self, start=None, end=None) -> np.ndarray:
+        """School days within [start, end] (inclusive; open-ended when None)."""
+        lo = 0 if start is None else np.searchsorted(self._school_days, _d64(start), side="left")
+        hi = len(self._school_days) if end is None else np.searchsorted(self._school_days, _d64(end), side="right")
+        return self._school_days[lo:hi]
+
+    def count_school_days(self, start=None, end=None) -> int:
+        return len(self.school_days(start, end))
+
+    def nth_school_day(self, n: int, start=None) -> np.datetime64:
+        """The n-th (1-based) school day on or after `start` (default: first day)."""
+        lo = 0 if start is None else np.searchsorted(self._school_days, _d64(start), side="left")
+        if n < 1 or lo + n - 1 >= len(self._school_days):
+            raise IndexError(f"calendar has no school day #{n} after {start}")
+        return self._school_days[lo + n - 1]
+
+    def is_school_day_at(self, dates) -> np.ndarray:
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        if not len(self._school_days):
+            return np.zeros(dates.shape, dtype=bool)
+        pos = np.minimum(np.searchsorted(self._school_days, dates), len(self._school_days) - 1)
+        return self._school_days[pos] == dates
+
+    def term_of(self, dates, terms) -> np.ndarray:
+        """term_id for each date (-1 outside every term); `terms` rows need term_id/start_date/end_date."""
+        terms = sorted(((_d64(t["start_date"]), _d64(t["end_date"]), int(t["term_id"])) for t in terms))
+        starts = np.array([s for s, _, _ in terms], dtype="datetime64[D]")
+        ends = np.array([e for _, e, _ in terms], dtype="datetime64[D]")
+        ids = np.array([i for _, _, i in terms] + [-1])
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        i = np.searchsorted(starts, dates, side="right") - 1
+        hit = (i >= 0) & (dates <= ends[np.maximum(i, 0)])
+        return ids[np.where(hit, i, -1)]
+
+    # -- export -------------------------------------------------------
+
+    def rows(self):
+        """school_calendar.csv rows (as lists, in CSV_COLUMNS order)."""
+        names = self.holiday_name(self.dates)
+        for d, school, holiday, weekend, name in zip(
+                np.datetime_as_string(self.dates, unit="D"), self.is_school_day,
+                self.is_holiday, self.is_weekend, names):
+            yield [d, bool(school), bool(holiday), name, "Weekend" if weekend else ""]
+
+    def write_csv(self, path: Path) -> int:
+        with staged_text(Path(path), rows=len(self.dates)) as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(CSV_COLUMNS)
+            writer.writerows(self.rows())
+        return len(self.dates)
+
+
+class EnrollmentWindows:
+    """Each student's [enrollment_date, withdraw_date] from students.csv, looked up by student_id.
+
+    A blank date (or a roster without the column) leaves that end open, so
+    single-year datasets keep every student enrolled for the whole calendar.
+    """
+
+    def __init__(self, students):
+        ids = np.asarray(students["student_id"], dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        self.student_ids = ids[order]
+        self.start = self._dates(students, "enrollment_date", np.datetime64("0001-01-01", "D"))[order]
+        self.end = self._dates(students, "withdraw_date", np.datetime64("9999-12-31", "D"))[order]
+
+    @staticmethod
+    def _dates(students, column: str, open_end: np.datetime64) -> np.ndarray:
+        if column not in students:
+            return np.full(len(students), open_end)
+        column = students[column]
+        if str(column.dtype).startswith("datetime64"):
+            dates = column.to_numpy().astype("datetime64[D]")
+        else:
+            dates = np.asarray(column.fillna("").astype(str).to_numpy(), dtype=str).astype("datetime64[D]")
+        return np.where(np.isnat(dates), open_end, dates)
+
+    def window(self, student_ids) -> tuple[np.ndarray, np.ndarray]:
+        """(first day, last day) enrolled for each of `student_ids` (unknown IDs raise)."""
+        student_ids = np.asarray(student_ids, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.student_ids, student_ids), max(len(self.student_ids) - 1, 0))
+        if len(student_ids) and not (self.student_ids[pos] == student_ids).all():
+            missing = student_ids[self.student_ids[pos] != student_ids]
+            raise KeyError(f"student_id(s) not in the roster: {missing[:5].tolist()}")
+        return self.start[pos], self.end[pos]
+
+    def contains(self, student_ids, dates) -> np.ndarray:
+        """True where the student was enrolled on the date (arrays of the same shape)."""
+        start, end = self.window(student_ids)
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        return (dates >= start) & (dates <= end)
+
+    def day_range(self, student_ids, school_days: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """[lo, hi) index range of each student's enrolled days within sorted `school_days`."""
+        start, end = self.window(student_ids)
+        return (np.searchsorted(school_days, start, side="left"),
+                np.searchsorted(school_days, end, side="right"))
+
+
+def shift_years(dates, years) -> np.ndarray:
+    """datetime64[D] `dates` moved by whole `years` (broadcasts); month ends clamp (29 Feb → 28 Feb)."""
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    month = dates.astype("datetime64[M]")
+    day = dates - month.astype("datetime64[D]")
+    target = month + 12 * np.asarray(years, dtype=np.int64)
+    month_end = (target + 1).astype("datetime64[D]") - 1
+    return np.minimum(target.astype("datetime64[D]") + day, month_end)
+
+
+def load_terms(path: Path) -> list[dict]:
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
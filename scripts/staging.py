@@ -0,0 +1,200 @@
+"""
+staging.py
+----------
+Atomic outputs. Every generated file is written to a hidden temp file
+next to its target and renamed over it only once it is complete, so
+readers (transform, loaders, a parallel worker) see either the previous
+file or the new one – never half of one – without taking locks.
+
+    with StagedFile(out_dir / "attendance.csv") as f:     # binary sink
+        f.write(data)
+    # → renamed into place; an exception leaves the old file untouched
+
+    with staged_text(out_dir / "students.csv") as f:      # text, for csv.writer
+        csv.writer(f).writerows(rows)
+
+    with staged_dir(index_dir / "attendance") as tmp:     # a whole folder of files
+        np.save(tmp / "date.npy", dates)
+    # → swapped in for the old folder (two renames, not one atomic step)
+
+After the rename, `record()` drops a manifest entry (rows, bytes, sha256 of
+the file as written, the command that wrote it, the run id) into
+<dir>/.manifest/<file>.json – one small atomic file per output, so
+concurrent writers never touch the same entry. `write_manifest()` merges
+the entries of one run into <dir>/manifest.json together with its seed
+and profile (luminosity.py pipeline does this at the end of a run).
+
+Temp files are named .<file>.<pid>.<random>.tmp; leftovers of a crashed
+run are harmless and can be deleted.
+"""
+
+from __future__ import annotations
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+RUN_ENV       = "LUMINOSITY_RUN_ID"    # set by the pipeline; tags every manifest entry
+MANIFEST_DIR  = ".manifest"
+MANIFEST_FILE = "manifest.json"
+
+
+def _temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+class StagedFile(io.RawIOBase):
+    """Binary sink written to a temp file; `commit()` renames it over `path`.
+
+    Used as a context manager it also records the file; `rows` defaults to
+    the line count minus the header (pass it for binary files).
+    """
+
+    def __init__(self, path: Path, rows: int | None = None):
+        super().__init__()
+        self.path = Path(path)
+        self.rows = rows
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._temp = _temp_path(self.path)
+        self._file = open(self._temp, "wb")
+        self._hash = hashlib.sha256()
+        self.bytes = 0
+        self.lines = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._hash.update(data)
+        self.bytes += len(data)
+        self.lines += data.count(b"\n")
+        self._file.write(data)
+        return len(data)
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def commit(self) -> Path:
+        """Flush to disk and atomically replace the target."""
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self._temp, self.path)
+        return self.path
+
+    def abort(self):
+        """Drop what was written; the target is left as it was."""
+        if not self._file.closed:
+            self._file.close()
+            self._temp.unlink(missing_ok=True)
+
+    def close(self):
+        # io.RawIOBase calls close() on collection – never commit implicitly
+        self.abort()
+        super().close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+            rows = max(self.lines - 1, 0) if self.rows is None else self.rows
+            record(self.path, rows, self.bytes, self.sha256)
+        else:
+            self.abort()
+        return False
+
+
+@contextmanager
+def staged_text(path: Path, rows: int | None = None):
+    """Text file (UTF-8, newline="" for csv) committed atomically and recorded on success."""
+    raw = StagedFile(path)
+    try:
+        text = io.TextIOWrapper(io.BufferedWriter(raw), encoding="utf-8", newline="")
+        yield text
+        text.flush()
+        text.detach().detach()
+        raw.commit()
+    except BaseException:
+        raw.abort()
+        raise
+    record(raw.path, max(raw.lines - 1, 0) if rows is None else rows, raw.bytes, raw.sha256)
+
+
+@contextmanager
+def staged_dir(path: Path):
+    """Folder filled under a temp name, then swapped in for `path`; not recorded in the manifest."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = _temp_path(path)
+    temp.mkdir()
+    try:
+        yield temp
+    except BaseException:
+        shutil.rmtree(temp, ignore_errors=True)
+        raise
+    old = _temp_path(path)
+    if path.exists():
+        os.replace(path, old)
+    os.replace(temp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def write_text(path: Path, text: str):
+    """Atomically replace a small file (JSON state, stats); not recorded in the manifest."""
+    raw = StagedFile(path)
+    try:
+        raw.write(text.encode("utf-8"))
+        raw.commit()
+    except BaseException:
+        raw.abort()
+        raise
+
+
+# ── manifest ──────────────────────────────────────────────────────────
+
+def record(path: Path, rows: int, size: int, sha256: str):
+    """Write the manifest entry of one committed output."""
+    path = Path(path)
+    entry = {
+        "file": path.name,
+        "rows": rows,
+        "bytes": size,
+        "sha256": sha256,
+        "command": " ".join([Path(sys.argv[0]).name, *sys.argv[1:]]),
+        "run_id": os.environ.get(RUN_ENV),
+        "written_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    write_text(path.parent / MANIFEST_DIR / f"{path.name}.json", json.dumps(entry, indent=2) + "\n")
+
+
+def entries(data_dir: Path, run_id: str | None = None) -> dict[str, dict]:
+    """file name → manifest entry for the outputs in data_dir (of one run, if given)."""
+    out = {}
+    for path in sorted((Path(data_dir) / MANIFEST_DIR).glob("*.json")):
+        entry = json.loads(path.read_text())
+        if run_id is None or entry.get("run_id") == run_id:
+            out[entry["file"]] = entry
+    return out
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+
+def write_manifest(data_dir: Path, run_id: str, **meta) -> Path:
+    """Merge one run's entries into <data_dir>/manifest.json (with seed, profile, … from `meta`)."""
+    manifest = {"run_id": run_id, **meta, "files": entries(data_dir, run_id)}
+    path = Path(data_dir) / MANIFEST_FILE
+    write_text(path, json.dumps(manifest, indent=2) + "\n")
+    return path
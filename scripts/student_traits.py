@@ -0,0 +1,145 @@
+"""
+student_traits.py
+-----------------
+One latent-trait table per student, shared by every generator so the
+datasets are internally consistent (strong students score well on both
+assignments and standardized tests, chronically absent students get
+more discipline incidents, …).
+
+The table is a NumPy structured array sorted by student_id:
+
+    student_id       int64
+    ability          float64   z-score  (grades, standardized tests)
+    trend            float64   points/week drift in assignment scores
+    reliability      float64   P(present) on a school day, 0.85–0.99
+    behaviour_risk   float64   multiplier on discipline incident rate (mean ≈ 1)
+
+Each student's traits are a pure function of (seed, student_id): the
+random numbers come from a counter-based hash, not from a stream shared
+by the whole table. New students are therefore appended without changing
+anyone else's traits, and a run with the same seed gets the same table
+whatever was generated before.
+
+It is built once and cached as `student_traits.npy` next to students.csv;
+later generators load the cache and index it by student_id. A cache drawn
+with another seed is rebuilt; missing students are added to it.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+
+from staging import StagedFile
+
+TRAITS_FILE = "student_traits.npy"
+
+TRAIT_DTYPE = np.dtype([
+    ("student_id", np.int64),
+    ("ability", np.float64),
+    ("trend", np.float64),
+    ("reliability", np.float64),
+    ("behaviour_risk", np.float64),
+])
+
+# correlation between the latent normals behind ability / reliability / behaviour
+LATENT_CORRELATION = np.array([
+    #  ability  reliab.  behaviour
+    [  1.00,    0.35,   -0.30],
+    [  0.35,    1.00,   -0.45],
+    [ -0.30,   -0.45,    1.00],
+])
+DEFAULT_SEED       = 0                     # traits of unseeded runs (the generators' own draws stay random)
+SAMPLE_CHECK       = 64                    # cached rows re-derived to verify the cache's seed
+TREND_CHOICES      = (-0.1, 0.0, 0.1)      # declining, flat, improving
+RELIABILITY_RANGE  = (0.85, 0.99)
+BEHAVIOUR_SIGMA    = 0.6                   # log-sd of the behaviour multiplier
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer (uint64 arithmetic wraps)."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _uniforms(seed: int, ids: np.ndarray, k: int) -> np.ndarray:
+    """(len(ids), k) uniforms in (0, 1), each a hash of (seed, student_id, column)."""
+    key = _mix(np.full(1, (seed if seed is not None else DEFAULT_SEED) % 2 ** 64, dtype=np.uint64))
+    base = _mix(ids.astype(np.uint64) ^ key)
+    bits = _mix(base[:, None] + np.arange(1, k + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+    return ((bits >> np.uint64(11)).astype(np.float64) + 0.5) / 2.0 ** 53
+
+
+def _normal_cdf(z: np.ndarray) -> np.ndarray:
+    """Φ(z), Abramowitz–Stegun 7.1.26 (|error| < 1.5e-7)."""
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+def build_traits(student_ids, seed: int | None = None) -> np.ndarray:
+    """Derive traits for every student from (seed, student_id), all in one pass."""
+    ids = np.unique(np.asarray(student_ids, dtype=np.int64))
+    n = len(ids)
+    u = _uniforms(seed, ids, 5)
+
+    # Box–Muller: four uniforms → three independent normals, then correlate them
+    radius = np.sqrt(-2.0 * np.log(u[:, [0, 2]]))
+    normals = np.column_stack([radius[:, 0] * np.cos(2 * np.pi * u[:, 1]),
+                               radius[:, 0] * np.sin(2 * np.pi * u[:, 1]),
+                               radius[:, 1] * np.cos(2 * np.pi * u[:, 3])])
+    latent = normals @ np.linalg.cholesky(LATENT_CORRELATION).T
+
+    # reliability: the latent normal's CDF is uniform, then rescaled
+    lo, hi = RELIABILITY_RANGE
+
+    traits = np.empty(n, dtype=TRAIT_DTYPE)
+    traits["student_id"] = ids
+    traits["ability"] = latent[:, 0]
+    traits["trend"] = np.asarray(TREND_CHOICES)[(u[:, 4] * len(TREND_CHOICES)).astype(np.int64)]
+    traits["reliability"] = lo + (hi - lo) * _normal_cdf(latent[:, 1])
+    traits["behaviour_risk"] = np.exp(BEHAVIOUR_SIGMA * latent[:, 2] - BEHAVIOUR_SIGMA ** 2 / 2)
+    return traits
+
+
+def _drawn_with(traits: np.ndarray, seed: int | None) -> bool:
+    """True when a sample of the cached rows re-derives identically under `seed`."""
+    sample = traits[::max(1, len(traits) // SAMPLE_CHECK)]
+    fresh = build_traits(sample["student_id"], seed)
+    return all(np.allclose(fresh[f], sample[f], rtol=1e-12, atol=0) for f in TRAIT_DTYPE.names)
+
+
+def load_traits(data_dir: Path, student_ids, seed: int | None = None) -> np.ndarray:
+    """Load the cached table; rebuild it for another seed, add students it lacks."""
+    path = Path(data_dir) / TRAITS_FILE
+    ids = np.unique(np.asarray(student_ids, dtype=np.int64))
+    traits = None
+    if path.exists():
+        cached = np.load(path)
+        if cached.dtype == TRAIT_DTYPE and len(cached) and _drawn_with(cached, seed):
+            traits = cached
+    if traits is None:
+        traits = build_traits(ids, seed)
+    else:
+        missing = ids[~np.isin(ids, traits["student_id"])]
+        if not len(missing):
+            return traits
+        traits = np.concatenate([traits, build_traits(missing, seed)])
+        traits = traits[np.argsort(traits["student_id"], kind="stable")]
+    with StagedFile(path, rows=len(traits)) as f:                 # concurrent first users: last complete table wins
+        np.save(f, traits)
+    return traits
+
+
+def traits_for(traits: np.ndarray, student_ids) -> np.ndarray:
+    """Trait rows aligned with `student_ids` (any order, repeats allowed)."""
+    student_ids = np.asarray(student_ids, dtype=np.int64)
+    pos = np.searchsorted(traits["student_id"], student_ids)
+    pos = np.minimum(pos, len(traits) - 1)
+    if len(student_ids) and not (traits["student_id"][pos] == student_ids).all():
+        missing = student_ids[traits["student_id"][pos] != student_ids]
+        raise KeyError(f"no traits for student_id(s) {missing[:5].tolist()}")
+    return traits[pos]
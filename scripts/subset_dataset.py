@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+subset_dataset.py
+-----------------
+A small, referentially consistent slice of a big dataset for developer
+laptops: a sample of students plus every row that belongs to them, and
+only the rows of other tables those rows point at. Nothing outside the
+sample leaves the source folder (beyond the untouched lookup tables).
+
+INPUT
+  ├── --data_dir   full dataset               # .csv, .csv.gz, .csv.zst, .csv.lz4
+  └── luminosity_schema_v15.dbml + luminosity_schema_comments*.sql   # the FK graph
+
+OUTPUT (to --out_dir)
+  └── the same tables, filtered             # WHOLE lookups and unreached tables are copied as-is
+
+Students are picked by a hash of student_id (--fraction, salted by --seed),
+so the sample needs no count and is stable across runs. The FK graph is
+then walked outward from students:
+
+  • child   – a table referencing a kept table (enrollments, grades,
+              attendance, student_guardians, teacher_subjects, …) keeps the
+              rows whose references are all kept
+  • parent  – a table first reached *from* a kept table (guardians,
+              classes, assignments, teachers, terms, …) keeps exactly the
+              rows referenced by what was kept
+
+Tables are processed in dependency order and each is streamed once; the
+semi-joins compare 64-bit value hashes against sorted key arrays. Tables
+outside the schema get references by column name (student_id → students).
+
+Example
+  python scripts/subset_dataset.py --data_dir district/csv --out_dir laptop/csv --fraction 0.01 --seed 1
+"""
+
+from __future__ import annotations
+import argparse
+import shutil
+from graphlib import CycleError, TopologicalSorter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from check_schema_coverage import open_frames, table_files
+from csv_writer import COMPRESSION_CHOICES, write_chunks
+from schema_spec import DBML_FILE, comment_files, key_owners, load_schema
+
+ROOT         = ("students", "student_id")
+HEADER_BYTES = 1 << 16
+
+# small reference tables copied whole even when the walk reaches them: trimming
+# them would only drop unused lookup rows (and leave empty ones behind)
+WHOLE = {"grade_levels", "guardian_types", "departments", "classrooms", "periods", "school_years",
+         "terms", "fee_types", "school_calendar", "school_profile"}
+
+# polymorphic references the schema can only describe in prose:
+# table → (column, role column, {role: "table.column"}); other roles are kept
+SOFT_REFS = {
+    "users": ("person_id", "role", {"student": "students.student_id",
+                                    "guardian": "guardians.guardian_id",
+                                    "teacher": "teachers.teacher_id"}),
+}
+
+
+# ── FK graph ──────────────────────────────────────────────────────────
+
+def _hash(values: pd.Series) -> np.ndarray:
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def read_header(path: Path) -> list[str]:
+    frames, _ = open_frames(path, HEADER_BYTES)
+    first = next(frames, None)
+    return [] if first is None else [c.strip().lstrip("\ufeff") for c in first.columns]
+
+
+def edges(schema: dict, headers: dict[str, list[str]]) -> list[tuple]:
+    """(table, column, target table, target column, role condition) for every FK present in the files."""
+    owners = key_owners({t: s for t, s in schema.items() if not s["planned"]})
+    out = []
+    for table, columns in headers.items():
+        spec = schema.get(table)
+        if spec is not None:
+            refs = [(c, col["ref"]) for c, col in spec["columns"].items() if col["ref"]]
+        else:               # undocumented table: reference by column name
+            refs = [(c, owners[c]) for c in columns[1:] if c.endswith("_id") and c in owners]
+        for column, ref in refs:
+            out.append((table, column, *ref.split("."), None))
+        if table in SOFT_REFS:
+            column, role_column, targets = SOFT_REFS[table]
+            out += [(table, column, *ref.split("."), (role_column, role)) for role, ref in targets.items()]
+    # only references whose both ends exist in this folder; lookups stay out of the walk
+    return [e for e in out if e[1] in headers[e[0]] and e[2] in headers and e[3] in headers[e[2]]
+            and (e[4] is None or e[4][0] in headers[e[0]]) and not {e[0], e[2]} & WHOLE]
+
+
+def plan(graph: list[tuple], root: str = ROOT[0]):
+    """Classify tables from the root outwards → (mode per table, filter edges, need edges, order)."""
+    mode = {root: "root"}
+    filters, needs = [], []
+    queue = [root]
+
+    def reach(table: str, edge: tuple):
+        target = edge[2]
+        if target not in mode:
+            mode[target] = "parent"            # reached from a kept table: keep what is referenced
+            queue.append(target)
+            needs.append(edge)
+        elif edge[4] is None and mode[target] == "parent" and mode[table] == "parent":
+            needs.append(edge)
+        else:
+            filters.append(edge)
+
+    while queue:
+        table = queue.pop(0)
+        if mode[table] != "child":
+            for edge in (e for e in graph if e[0] == table):
+                reach(table, edge)
+        for edge in graph:
+            if edge[2] == table and edge[0] not in mode:
+                mode[edge[0]] = "child"
+                queue.append(edge[0])
+                for own in (e for e in graph if e[0] == edge[0]):
+                    # soft references only ever filter; the other end may not be classified yet
+                    if own[4] is not None:
+                        filters.append(own)
+                    else:
+                        reach(edge[0], own)
+
+    filters = [e for e in filters if e[2] in mode]
+    deps: dict[str, set[str]] = {t: set() for t in mode}
+    for table, _, target, _, _ in filters:
+        deps[table].add(target)
+    for table, _, target, _, _ in needs:
+        deps[target].add(table)
+    try:
+        order = list(TopologicalSorter(deps).static_order())
+    except CycleError as exc:
+        raise SystemExit(f"❌ FK graph has a cycle the subsetter cannot order: {exc.args[1]}")
+    return mode, filters, needs, order
+
+
+# ── streaming semi-joins ──────────────────────────────────────────────
+
+class KeySet:
+    """Value hashes of a column, collected chunk by chunk, looked up as a sorted array."""
+
+    def __init__(self):
+        self._parts: list[np.ndarray] = []
+        self._keys: np.ndarray | None = None
+
+    def add(self, values: pd.Series):
+        values = values[values != ""]
+        self._parts.append(np.unique(_hash(values)))
+        self._keys = None
+
+    @property
+    def keys(self) -> np.ndarray:
+        if self._keys is None:
+            self._keys = np.unique(np.concatenate(self._parts)) if self._parts else np.empty(0, np.uint64)
+            self._parts = [self._keys]
+        return self._keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def contains(self, values: pd.Series) -> np.ndarray:
+        """True where the value is in the set; blanks count as present (optional references)."""
+        keys = self.keys
+        hashes = _hash(values)
+        if not len(keys):
+            return (values == "").to_numpy()
+        pos = np.minimum(np.searchsorted(keys, hashes), len(keys) - 1)
+        return (keys[pos] == hashes) | (values == "").to_numpy()
+
+
+def sample_mask(ids: pd.Series, fraction: float, seed: int) -> np.ndarray:
+    """Stable pseudo-random sample: keep an ID when its salted hash falls below `fraction`."""
+    salt = f"{seed:016d}"[-16:]
+    h = pd.util.hash_pandas_object(ids, index=False, hash_key=salt).to_numpy()
+    return h < np.uint64(min(fraction, 1.0) * float(np.iinfo(np.uint64).max))
+
+
+def subset_table(table: str, path: Path, mode: str, filters: list[tuple], wanted: dict[str, KeySet],
+                 keys: dict[str, KeySet], collect: dict[str, set[str]], fraction: float, seed: int):
+    """Yield the kept chunks of one table.
+
+    A parent keeps the rows whose `wanted` columns were referenced; every table
+    drops rows whose `filters` references were not kept. Kept values of each
+    `collect` column go to the named key sets in `keys`.
+    """
+    frames, _ = open_frames(path, 0, full=True)
+    for frame in frames:
+        frame.columns = [c.strip().lstrip("\ufeff") for c in frame.columns]
+        keep = np.ones(len(frame), dtype=bool)
+        if mode == "root":
+            keep &= sample_mask(frame[ROOT[1]], fraction, seed)
+        if mode == "parent" and wanted:
+            needed = np.zeros(len(frame), dtype=bool)
+            for column, referenced in wanted.items():
+                needed |= referenced.contains(frame[column]) & (frame[column] != "").to_numpy()
+            keep &= needed
+        for _, column, target, target_column, cond in filters:
+            ok = keys[f"{target}.{target_column}"].contains(frame[column])
+            if cond is not None:
+                ok |= (frame[cond[0]] != cond[1]).to_numpy()
+            keep &= ok
+        kept = frame[keep]
+        for column, names in collect.items():
+            for name in names:
+                keys.setdefault(name, KeySet()).add(kept[column])
+        yield kept
+
+
+# ── main ──────────────────────────────────────────────────────────────
+
+def subset(data_dir: Path, out_dir: Path, fraction: float, seed: int = 0, compression: str | None = None,
+           dbml: Path = DBML_FILE):
+    """Write the slice; yields (table, mode, rows kept or None when copied, output path)."""
+    schema = load_schema(dbml, comment_files())
+    files = table_files(data_dir)
+    if ROOT[0] not in files:
+        raise SystemExit(f"❌ no {ROOT[0]}.csv in {data_dir}")
+    headers = {table: read_header(path) for table, path in files.items()}
+    graph = edges(schema, headers)
+    mode, filters, needs, order = plan(graph)
+
+    # table → column → key sets its kept values feed: "t.c" (kept keys other tables
+    # filter on) and "need:t.c" (values a parent t must keep in its column c)
+    collect: dict[str, dict[str, set[str]]] = {}
+    for _, _, target, target_column, _ in filters:
+        collect.setdefault(target, {}).setdefault(target_column, set()).add(f"{target}.{target_column}")
+    for table, column, target, target_column, _ in needs:
+        collect.setdefault(table, {}).setdefault(column, set()).add(f"need:{target}.{target_column}")
+    keys: dict[str, KeySet] = {}
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for table in order:
+        wanted = {c: keys.get(f"need:{table}.{c}", KeySet())
+                  for c in {target_column for _, _, target, target_column, _ in needs if target == table}}
+        chunks = subset_table(table, files[table], mode[table], [e for e in filters if e[0] == table],
+                              wanted, keys, collect.get(table, {}), fraction, seed)
+        out_path, rows = write_chunks(out_dir / f"{table}.csv", chunks, compression=compression)
+        yield table, mode[table], rows, out_path
+
+    for table in sorted(set(files) - set(mode)):
+        src = files[table]
+        shutil.copyfile(src, out_dir / src.name)
+        if Path(f"{src}.idx").exists():
+            shutil.copyfile(f"{src}.idx", out_dir / f"{src.name}.idx")
+        yield table, "copied", None, out_dir / src.name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract a consistent sample of students and their rows.")
+    parser.add_argument("--data_dir", required=True, type=Path)
+    parser.add_argument("--out_dir", required=True, type=Path)
+    parser.add_argument("--fraction", type=float, default=0.01, help="share of students to keep (default 1%%)")
+    parser.add_argument("--seed", type=int, default=0, help="salt for the student sample")
+    parser.add_argument("--compression", choices=COMPRESSION_CHOICES, default=None,
+                        help="compress the filtered tables (copied lookups keep their format)")
+    parser.add_argument("--dbml", type=Path, default=DBML_FILE)
+    args = parser.parse_args()
+    if not 0 < args.fraction <= 1:
+        parser.error("--fraction must be in (0, 1]")
+    if args.out_dir.resolve() == args.data_dir.resolve():
+        parser.error("--out_dir must differ from --data_dir")
+
+    print(f"[1/2] Planning the slice of {args.data_dir} ({args.fraction:.2%} of students) …")
+    print("[2/2] Streaming tables …")
+    total = 0
+    for table, mode, rows, path in subset(args.data_dir, args.out_dir, args.fraction, args.seed,
+                                          args.compression, args.dbml):
+        if rows is None:
+            print(f"  · {table:<25} {'copied':>12}")
+        else:
+            total += rows
+            print(f"  ✅ {table:<25} {rows:>12,} rows  ({mode})")
+    print(f"✅ Done! {total:,} rows written to {args.out_dir.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
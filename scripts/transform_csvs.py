@@ -2,17 +2,22 @@
 import pandas as pd
 from pathlib import Path
 
+from block_compression import read_csv, resolve_csv
+from code_tables import CodeTable
+from csv_writer import COMPRESSION_CHOICES, write_frame
+
 # ----------------------------------------------------------
 # Locate folders RELATIVE to this script, so path issues vanish
 BASE_DIR = Path(__file__).resolve().parent        # …/luminosity-data/scripts
 SRC_DIR  = BASE_DIR.parent / "2015" / "csv"       # …/luminosity-data/2015/csv
 DEST_DIR = BASE_DIR.parent / "clean_csv"          # …/luminosity-data/clean_csv
-DEST_DIR.mkdir(exist_ok=True)
 # ----------------------------------------------------------
 
 SCHEMA_SPECS = {
     "students": {
-        "expected": ["student_id","first_name","last_name","birthdate","gender","grade"],
+        "add":    ["enrollment_date","withdraw_date"],
+        "expected": ["student_id","first_name","last_name","birthdate","gender","grade",
+                     "enrollment_date","withdraw_date"],
     },
     "guardians": {
         "rename": {"guardian_type_id": None},
@@ -48,7 +53,7 @@ SCHEMA_SPECS = {
                  "room_id", "period_id", "term_id"]
 },
     "enrollments": {
-        "add": ["enrollment_id"],
+        "ids": ["enrollment_id"],
         "expected": ["enrollment_id","student_id","class_id"]
     },
     "assignments": {
@@ -69,6 +74,9 @@ SCHEMA_SPECS = {
         "expected": ["history_id","student_id","year_id","grade"]
     },
     "periods": { "expected": ["period_id","name","start_time","end_time"] },
+    "school_calendar": {
+        "expected": ["calendar_date","is_school_day","is_holiday","holiday_name","comment"]
+    },
     "classrooms": {
         "rename": {"classroom_id":"room_id"},
         "drop": ["capacity","floor","is_special_use"],
@@ -84,12 +92,20 @@ SCHEMA_SPECS = {
     "rename": {"school_year_id": "year_id"},      # map CSV → expected
     "expected": ["term_id", "year_id", "name", "start_date", "end_date"]
 },
-    "fee_types": { "expected": ["fee_type_id","name","amount","due_by","recurring"] },
+    "fee_types": {
+        "map": {"recurring": {"Annual": "True", "Monthly": "True", "One-Time": "False"}},
+        "expected": ["fee_type_id","name","amount","due_by","recurring"]
+    },
     "payments": {
         "expected": ["payment_id","student_id","fee_type_id","amount_paid","date_paid"]
     },
-    "attendance": { "expected": ["attendance_id","student_id","date","status"] },
+    "attendance": {
+        "codes": {"status": "attendance_statuses"},
+        "expected": ["attendance_id","student_id","date","status"]
+    },
     "discipline_reports": {
+        "codes": {"type": "incident_types", "severity": "severities",
+                  "action_taken": "disciplinary_actions", "description": "incident_descriptions"},
         "expected": ["report_id","student_id","date","type","severity",
                      "action_taken","description"]
     },
@@ -97,28 +113,31 @@ SCHEMA_SPECS = {
         "expected": ["test_id","student_id","test_name","test_date",
                      "subject","score","percentile"]
     },
+    "school_profile": {
+        "expected": ["school_id","school_name","address","city","state","zip","phone","founded_year"]
+    },
+    "users": {
+        "expected": ["user_id","username","email","role","person_id","created_on",
+                     "last_login","is_active"]
+    },
+    "announcements": {
+        "expected": ["announcement_id","class_id","term_id","posted_by","posted_at",
+                     "audience","title","body"]
+    },
 }
 
-# -------------------- MAIN LOOP -------------------- #
-if __name__ == "__main__":
-    for table, spec in SCHEMA_SPECS.items():
-        csv_path = SRC_DIR / f"{table}.csv"
-        if not csv_path.exists():
-            print(f"⚠️  {table}.csv not found – skipping")
-            continue
-
-        df = pd.read_csv(csv_path)
-        df.columns = df.columns.str.strip().str.replace("\ufeff", "", regex=False)  # remove spaces + BOM
-
-        # ... (rest of the loop body, indented 4 spaces)
+# -------------------- TRANSFORM -------------------- #
+def decode_columns(spec: dict, df: pd.DataFrame, data_dir: Path) -> pd.DataFrame:
+    """Columns written as integer codes (generators' --codes) → labels, via <data_dir>/<lookup>.csv."""
+    for col, lookup in (spec.get("codes") or {}).items():
+        path = data_dir / f"{lookup}.csv"
+        if col in df and path.exists():
+            df[col] = CodeTable.read(path).decode(df[col])
+    return df
 
-for table, spec in SCHEMA_SPECS.items():
-    csv_path = SRC_DIR / f"{table}.csv"
-    if not csv_path.exists():
-        print(f"⚠️  {csv_path.relative_to(BASE_DIR.parent)} missing – skipping")
-        continue
 
-    df = pd.read_csv(csv_path)
+def transform_table(table: str, spec: dict, df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = df.columns.str.strip().str.replace("\ufeff", "", regex=False)  # remove spaces + BOM
 
     # 1) rename / drop
     rename_map = {k:v for k,v in (spec.get("rename") or {}).items() if v}
@@ -132,13 +151,48 @@ for table, spec in SCHEMA_SPECS.items():
         if col not in df.columns:
             df[col] = ""
 
-    # 3) reorder & assert
+    # 3) generated row numbers for blank ID columns, value mappings (e.g. labels → booleans)
+    for col in spec.get("ids", []):
+        if col not in df.columns or (df[col] == "").all():
+            df[col] = [str(i) for i in range(1, len(df) + 1)]
+    for col, mapping in (spec.get("map") or {}).items():
+        if col in df:
+            df[col] = df[col].map(lambda v: mapping.get(v, v))
+
+    # 4) reorder & assert
     expected = spec["expected"]
     df = df[expected]   # raises if any column missing
     if list(df.columns) != expected:
         raise ValueError(f"{table}: column mismatch after transform")
+    return df
+
+
+# -------------------- MAIN LOOP -------------------- #
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Clean generated CSVs into clean_csv/.")
+    parser.add_argument("--data_dir", type=Path, default=SRC_DIR)
+    parser.add_argument("--out_dir", type=Path, default=DEST_DIR)
+    parser.add_argument("--compression", choices=COMPRESSION_CHOICES, default=None,
+                        help="Block-compress the cleaned CSVs (auto = best installed codec)")
+    args = parser.parse_args()
+    args.out_dir.mkdir(exist_ok=True)
+
+    for table, spec in SCHEMA_SPECS.items():
+        csv_path = resolve_csv(args.data_dir, table)      # plain, .gz, .zst or .lz4
+        if csv_path is None:
+            print(f"⚠️  {args.data_dir / f'{table}.csv'} missing – skipping")
+            continue
+
+        # read as text so IDs in columns with blanks stay "12", not "12.0"
+        df = read_csv(csv_path, dtype=str, keep_default_na=False)
+        df = transform_table(table, spec, decode_columns(spec, df, args.data_dir))
 
-    # 4) write out
-    out_path = DEST_DIR / f"{table}.csv"
-    df.to_csv(out_path, index=False)
-    print(f"✅  {table:<25} → {out_path.relative_to(BASE_DIR.parent)}")
+        # 5) write out
+        out_path = write_frame(args.out_dir / f"{table}.csv", df, compression=args.compression)
+        print(f"✅  {table:<25} → {out_path}")
+
+
+if __name__ == "__main__":
+    main()